@@ -12,12 +12,19 @@ from routes.report_incidents import report_incidents_bp
 from flask import request, jsonify
 from models import FacultyUser
 from routes.alerts import alerts_bp
+from routes.closures import closures_bp
+from routes.saved_routes import saved_routes_bp
+from routes.search import search_bp
+from recent_history import start_compaction
+from config import RECENT_SEARCH_COMPACT_SECONDS
 
 app = Flask(__name__)
 CORS(app)
 
 app.config["SQLALCHEMY_DATABASE_URI"] = SQLALCHEMY_DATABASE_URI
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = SQLALCHEMY_TRACK_MODIFICATIONS
+# Seconds between recent-search trims; 0 or None turns the background job off
+app.config["RECENT_SEARCH_COMPACT_SECONDS"] = RECENT_SEARCH_COMPACT_SECONDS
 
 db.init_app(app)
 migrate = Migrate(app, db)
@@ -25,10 +32,21 @@ migrate = Migrate(app, db)
 app.register_blueprint(directions_bp, url_prefix="/api/route")
 app.register_blueprint(locations_bp, url_prefix="/api/locations")
 app.register_blueprint(maps_bp, url_prefix="/api/maps")
+app.register_blueprint(search_bp, url_prefix="/api/search")
 app.register_blueprint(saved_items_bp, url_prefix="/api/saved-items")
+app.register_blueprint(saved_routes_bp, url_prefix="/api/saved-routes")
 app.register_blueprint(user_db_bp, url_prefix="/api/user")
 app.register_blueprint(report_incidents_bp)
 app.register_blueprint(alerts_bp)
+app.register_blueprint(closures_bp)
+
+# Trim recent-search histories in the background, started by the first
+# request rather than at import so scripts and tests importing app run none
+@app.before_request
+def start_background_jobs():
+    interval = app.config.get("RECENT_SEARCH_COMPACT_SECONDS")
+    if interval and "recent_search_compaction" not in app.extensions:
+        start_compaction(app, interval)
 
 @app.route("/")
 def home():
@@ -0,0 +1,235 @@
+"""Routing benchmarks on synthetic campus graphs.
+
+Run from the backend directory:
+
+    python -m benchmarks.bench_routing run --sizes 1k,10k,100k --output bench.json
+    python -m benchmarks.bench_routing compare old.json new.json
+
+``run`` loads each synthetic graph into an in-memory SQLite database, times
+``build_graph`` (and its peak memory), then times single Dijkstra/A*/CH
+queries, k-shortest queries and one-to-many batch queries, reporting latency
+percentiles. ``compare`` flags any latency that got slower than the
+tolerance and exits non-zero, so it can gate a CI job.
+"""
+import argparse
+import json
+import platform
+import random
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+from flask import Flask
+from sqlalchemy import insert
+
+from db import db
+from models import Location, Path
+from contraction import ContractionHierarchy
+from graph_engine import k_shortest_paths
+from location_cache import location_cache
+from routes.directions import build_graph, routes_from_origins
+from benchmarks.synthetic_graphs import TOPOLOGIES, generate
+
+INSERT_CHUNK = 20000
+BATCH_TARGETS = 20
+
+
+def parse_size(text):
+    text = text.strip().lower()
+    for suffix, factor in (("m", 1_000_000), ("k", 1_000)):
+        if text.endswith(suffix):
+            return int(float(text[:-1]) * factor)
+    return int(text)
+
+
+def percentiles(samples):
+    """Latency summary in milliseconds."""
+    ordered = sorted(s * 1000 for s in samples)
+    if not ordered:
+        return {}
+
+    def pick(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered),
+        "p50_ms": pick(0.50),
+        "p90_ms": pick(0.90),
+        "p99_ms": pick(0.99),
+        "max_ms": ordered[-1],
+    }
+
+
+def timed(fn, inputs):
+    samples = []
+    for args in inputs:
+        started = time.perf_counter()
+        fn(*args)
+        samples.append(time.perf_counter() - started)
+    return percentiles(samples)
+
+
+def make_app():
+    app = Flask(__name__)
+    app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite://"
+    app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+    db.init_app(app)
+    return app
+
+
+def load_into_db(edges, coords):
+    """Replace the locations/paths tables with a synthetic graph."""
+    db.drop_all()
+    db.create_all()
+    locations = [{"id": i, "name": f"Node {i}", "x": x, "y": y} for i, (x, y) in coords.items()]
+    paths = [
+        {"start_id": u, "end_id": v, "distance": w, "stairs": s, "elevator": e, "indoor": ind, "slope": sl}
+        for u, v, w, s, e, ind, sl in edges
+    ]
+    for rows, model in ((locations, Location), (paths, Path)):
+        for i in range(0, len(rows), INSERT_CHUNK):
+            db.session.execute(insert(model), rows[i:i + INSERT_CHUNK])
+    db.session.commit()
+    location_cache.clear()
+
+
+def bench_graph(topology, num_edges, args, rng):
+    edges, coords = generate(topology, num_edges, seed=args.seed)
+    load_into_db(edges, coords)
+
+    started = time.perf_counter()
+    graph = build_graph()
+    load_seconds = time.perf_counter() - started
+
+    # Measure memory on a second build: tracemalloc slows the first one down
+    location_cache.clear()
+    tracemalloc.start()
+    build_graph()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    result = {
+        "topology": topology,
+        "edges": graph.num_edges,
+        "nodes": graph.num_nodes,
+        "graph_load_s": load_seconds,
+        "graph_load_peak_mb": peak / 1e6,
+        "graph_nbytes_mb": graph.nbytes() / 1e6,
+        "queries": {},
+    }
+
+    n = graph.num_nodes
+    pairs = [(rng.randrange(n), rng.randrange(n)) for _ in range(args.queries)]
+    few = pairs[: max(1, args.queries // 10)]
+    queries = result["queries"]
+
+    queries["dijkstra"] = timed(graph.search, pairs)
+    queries["astar"] = timed(graph.astar_search, pairs)
+    for profile in ("fastest", "accessible"):
+        queries[f"dijkstra_{profile}"] = timed(graph.profiles[profile].search, few)
+
+    if graph.num_edges <= args.ch_max_edges:
+        started = time.perf_counter()
+        hierarchy = ContractionHierarchy.build(graph, 0)
+        result["ch_build_s"] = time.perf_counter() - started
+        queries["ch"] = timed(hierarchy.search, pairs)
+
+    for k in (3, 10):
+        queries[f"yen_k{k}"] = timed(lambda s, t: k_shortest_paths(graph, s, t, k), few)
+
+    def batch(source, _):
+        ends = {graph.node_ids[rng.randrange(n)] for _ in range(BATCH_TARGETS)}
+        routes_from_origins(graph, {graph.node_ids[source]: ends})
+
+    queries[f"batch_1x{BATCH_TARGETS}"] = timed(batch, few)
+    return result
+
+
+def run(args):
+    rng = random.Random(args.seed)
+    app = make_app()
+    results = []
+    with app.app_context():
+        for topology in args.topologies.split(","):
+            for size in args.sizes.split(","):
+                print(f"{topology} {size} ...", file=sys.stderr, flush=True)
+                results.append(bench_graph(topology, parse_size(size), args, rng))
+
+    report = {
+        "meta": {
+            "created_at": datetime.utcnow().isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "queries": args.queries,
+        },
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+def compare(args):
+    with open(args.old) as f:
+        old = json.load(f)
+    with open(args.new) as f:
+        new = json.load(f)
+
+    baseline = {(r["topology"], r["edges"]): r for r in old["results"]}
+    regressions = 0
+    for result in new["results"]:
+        before = baseline.get((result["topology"], result["edges"]))
+        if before is None:
+            continue
+        rows = [("graph_load_s", before["graph_load_s"], result["graph_load_s"])]
+        for name, stats in result["queries"].items():
+            if name in before["queries"]:
+                rows.append((f"{name} p50_ms", before["queries"][name]["p50_ms"], stats["p50_ms"]))
+                rows.append((f"{name} p99_ms", before["queries"][name]["p99_ms"], stats["p99_ms"]))
+
+        for label, was, now in rows:
+            ratio = now / was if was else 1.0
+            flag = ""
+            if ratio > 1 + args.tolerance:
+                flag = "  <-- REGRESSION"
+                regressions += 1
+            print(f"{result['topology']:>10} {result['edges']:>8} {label:<28} {was:10.3f} -> {now:10.3f} ({ratio:5.2f}x){flag}")
+
+    print(f"{regressions} regression(s) beyond {args.tolerance:.0%}")
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = sub.add_parser("run", help="benchmark and write JSON results")
+    run_parser.add_argument("--sizes", default="1k,10k,100k", help="edge counts, e.g. 1k,10k,100k,1m")
+    run_parser.add_argument("--topologies", default=",".join(TOPOLOGIES))
+    run_parser.add_argument("--queries", type=int, default=200, help="point-to-point queries per graph")
+    run_parser.add_argument("--ch-max-edges", type=int, default=20000,
+                            help="skip contraction-hierarchy timings above this size")
+    run_parser.add_argument("--seed", type=int, default=42)
+    run_parser.add_argument("--output", help="write JSON here instead of stdout")
+
+    compare_parser = sub.add_parser("compare", help="compare two result files")
+    compare_parser.add_argument("old")
+    compare_parser.add_argument("new")
+    compare_parser.add_argument("--tolerance", type=float, default=0.2,
+                                help="allowed slowdown before flagging, e.g. 0.2 = 20%%")
+
+    args = parser.parse_args()
+    if args.command == "run":
+        run(args)
+    else:
+        sys.exit(compare(args))
+
+
+if __name__ == "__main__":
+    main()
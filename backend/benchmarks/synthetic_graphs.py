@@ -0,0 +1,100 @@
+"""Synthetic campus graphs for the routing benchmarks.
+
+Each generator returns ``(edges, coords)`` in the shape ``build_graph``
+feeds to ``CSRGraph.from_edges``: edge rows are ``(start_id, end_id,
+distance, stairs, elevator, indoor, slope)`` and ``coords`` maps location
+id -> ``(x, y)``. Distances are the straight-line length times a small
+random detour factor, so the A* heuristic stays meaningful.
+"""
+import math
+import random
+
+TOPOLOGIES = ("grid", "clustered", "multifloor")
+
+
+def _edge(coords, u, v, rng, **attrs):
+    (x1, y1), (x2, y2) = coords[u], coords[v]
+    distance = math.hypot(x2 - x1, y2 - y1) * rng.uniform(1.0, 1.3)
+    return (u, v, distance, attrs.get("stairs", False), attrs.get("elevator", False),
+            attrs.get("indoor", False), attrs.get("slope", 0.0))
+
+
+def grid(num_edges, rng, spacing=10.0, first_id=1):
+    """Outdoor street grid with roughly ``num_edges`` paths."""
+    side = max(2, int(math.sqrt(num_edges / 2)) + 1)
+    coords = {}
+    for row in range(side):
+        for col in range(side):
+            coords[first_id + row * side + col] = (col * spacing, row * spacing)
+
+    edges = []
+    for row in range(side):
+        for col in range(side):
+            u = first_id + row * side + col
+            if col + 1 < side:
+                edges.append(_edge(coords, u, u + 1, rng, slope=rng.choice((0.0, 0.0, 2.0, 6.0, 10.0))))
+            if row + 1 < side:
+                edges.append(_edge(coords, u, u + side, rng, slope=rng.choice((0.0, 0.0, 2.0, 6.0, 10.0))))
+    return edges[:num_edges], coords
+
+
+def clustered(num_edges, rng, building_edges=400):
+    """Buildings with dense indoor corridors, linked by outdoor paths."""
+    buildings = max(2, num_edges // (building_edges + 4))
+    per_side = int(math.ceil(math.sqrt(buildings)))
+    edges, coords = [], {}
+    doors = []
+
+    next_id = 1
+    for b in range(buildings):
+        inner, inner_coords = grid(building_edges, rng, spacing=3.0, first_id=next_id)
+        ox, oy = (b % per_side) * 200.0, (b // per_side) * 200.0
+        for node, (x, y) in inner_coords.items():
+            coords[node] = (ox + x, oy + y)
+        edges.extend(_edge(coords, u, v, rng, indoor=True) for u, v, *_ in inner)
+        doors.append(next_id)
+        next_id += len(inner_coords)
+
+    # Outdoor paths to the building to the right and the one below
+    for b, door in enumerate(doors):
+        right = b + 1 if (b + 1) % per_side else None
+        for other in (right, b + per_side):
+            if other is not None and other < len(doors):
+                edges.append(_edge(coords, door, doors[other], rng, slope=rng.choice((0.0, 3.0, 9.0))))
+    return edges, coords
+
+
+def multifloor(num_edges, rng, floors=5):
+    """Stacked floor grids joined by stairwells and elevators."""
+    per_floor = max(4, num_edges // floors)
+    edges, coords = [], {}
+    floor_nodes = []
+
+    next_id = 1
+    for floor in range(floors):
+        inner, inner_coords = grid(per_floor, rng, spacing=4.0, first_id=next_id)
+        for node, (x, y) in inner_coords.items():
+            # Offset each floor slightly so stacked nodes are not coincident
+            coords[node] = (x + floor * 0.5, y + floor * 0.5)
+        edges.extend(_edge(coords, u, v, rng, indoor=True) for u, v, *_ in inner)
+        floor_nodes.append(sorted(inner_coords))
+        next_id += len(inner_coords)
+
+    for lower, upper in zip(floor_nodes, floor_nodes[1:]):
+        count = min(len(lower), len(upper))
+        for i in range(0, count, max(1, count // 8)):
+            stairs = i % 2 == 0
+            row = (lower[i], upper[i], 6.0, stairs, not stairs, True, 0.0)
+            edges.append(row)
+    return edges, coords
+
+
+GENERATORS = {
+    "grid": grid,
+    "clustered": clustered,
+    "multifloor": multifloor,
+}
+
+
+def generate(topology, num_edges, seed=0):
+    return GENERATORS[topology](num_edges, random.Random(seed))
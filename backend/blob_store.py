@@ -0,0 +1,43 @@
+"""Content-addressed blob storage on local disk.
+
+Each blob is stored under its SHA-256 digest, once as-is and once gzipped,
+so it can be served without compressing per request. A digest names exactly
+one content, which lets URLs built from it be cached forever.
+"""
+import gzip
+import hashlib
+import os
+import re
+
+DIGEST = re.compile(r"^[0-9a-f]{64}$")
+
+
+class BlobStore:
+    def __init__(self, root):
+        self.root = root
+
+    def path(self, digest, gzipped=False):
+        if not DIGEST.match(digest):
+            raise ValueError("not a sha256 digest")
+        name = f"{digest}.gz" if gzipped else digest
+        return os.path.join(self.root, digest[:2], name)
+
+    def exists(self, digest):
+        return DIGEST.match(digest) is not None and os.path.exists(self.path(digest))
+
+    def put(self, data):
+        """Store ``data`` (bytes) and return its digest; existing blobs are kept."""
+        digest = hashlib.sha256(data).hexdigest()
+        if not self.exists(digest):
+            os.makedirs(os.path.dirname(self.path(digest)), exist_ok=True)
+            # gz first: a blob counts as stored once the raw file exists
+            self._write(self.path(digest, gzipped=True), gzip.compress(data, compresslevel=9, mtime=0))
+            self._write(self.path(digest), data)
+        return digest
+
+    @staticmethod
+    def _write(path, data):
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
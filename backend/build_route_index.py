@@ -0,0 +1,17 @@
+from app import app
+from config import ROUTE_INDEX_PATH
+from contraction import ContractionHierarchy
+from routes.directions import graph_cache
+import time
+
+# Offline preprocessing: build the contraction hierarchy for the current
+# graph version so /api/route/ can use it straight away after a restart.
+with app.app_context():
+    graph, version = graph_cache.get()
+    started = time.perf_counter()
+    hierarchy = ContractionHierarchy.build(graph, version)
+    hierarchy.save(ROUTE_INDEX_PATH)
+
+    print(f"Route index built for graph version {version} in {time.perf_counter() - started:.1f}s")
+    print(f"{graph.num_nodes} nodes, {graph.num_edges} paths, {len(hierarchy.neighbors)} upward edges")
+    print(f"Saved to {ROUTE_INDEX_PATH}")
@@ -0,0 +1,152 @@
+"""Temporary path and location closures laid over the routing graph.
+
+Closures live in ``route_closures`` and are loaded once per "closures"
+version. They never touch the cached graph: every search gets the active
+closures as banned half-edges and nodes, so closing a hallway costs a set
+lookup per relaxed edge instead of a graph and route-index rebuild.
+
+Cached routes are tagged with the edges and nodes they use. When a closure
+starts only the entries crossing it are dropped; when it ends (deleted or
+expired) the entries computed while it was active are dropped, since they
+may hold a detour that is no longer needed.
+"""
+import math
+import threading
+from collections import namedtuple
+from datetime import datetime
+
+from db import db
+from data_versions import CLOSURES, VersionedCache
+from location_cache import get_spatial_index
+from models import RouteClosure
+
+ClosureRow = namedtuple("ClosureRow", ["id", "start_id", "end_id", "location_id", "expires_at"])
+
+
+def edge_tag(a, b):
+    return ("edge", min(a, b), max(a, b))
+
+
+def node_tag(location_id):
+    return ("node", location_id)
+
+
+def route_tags(path):
+    """Cache tags for a path of location ids: every node and edge on it."""
+    tags = {node_tag(node) for node in path}
+    tags.update(edge_tag(a, b) for a, b in zip(path, path[1:]))
+    return tags
+
+
+class ActiveClosures:
+    """The closures in force at one moment."""
+
+    def __init__(self, rows):
+        self.tags = {}      # closure id -> edge/node tag
+        for row in rows:
+            if row.location_id is not None:
+                self.tags[row.id] = node_tag(row.location_id)
+            elif row.start_id is not None and row.end_id is not None:
+                self.tags[row.id] = edge_tag(row.start_id, row.end_id)
+        self.closed = set(self.tags.values())
+
+    def __len__(self):
+        return len(self.tags)
+
+    def mask(self, graph):
+        """Return ``(banned half-edges, banned dense nodes)`` for ``graph``.
+
+        Profile views share the structure of their graph, so one mask works
+        for all of them.
+        """
+        edges, nodes = set(), set()
+        index = graph.index
+        for kind, *ids in self.closed:
+            if any(i not in index for i in ids):
+                continue
+            if kind == "node":
+                nodes.add(index[ids[0]])
+            else:
+                u, v = index[ids[0]], index[ids[1]]
+                edges.update(graph.half_edges(u, v))
+                edges.update(graph.half_edges(v, u))
+        return edges, nodes
+
+    def crosses(self, path):
+        """True if the path of location ids uses a closed edge or location."""
+        return not self.closed.isdisjoint(route_tags(path))
+
+    def cache_tags(self):
+        """Tags tying a cached result to the closures it was computed under."""
+        return {("closure", closure_id) for closure_id in self.tags}
+
+
+def load_closures():
+    rows = db.session.query(
+        RouteClosure.id, RouteClosure.start_id, RouteClosure.end_id,
+        RouteClosure.location_id, RouteClosure.expires_at
+    ).filter(RouteClosure.expires_at > datetime.utcnow())
+    return [ClosureRow(*row) for row in rows]
+
+
+closure_cache = VersionedCache(CLOSURES, load_closures)
+
+
+def get_active_closures(now=None):
+    """Closures not yet expired; expiry needs no write, so it is checked here."""
+    rows, _ = closure_cache.get()
+    now = now or datetime.utcnow()
+    return ActiveClosures(row for row in rows if row.expires_at > now)
+
+
+class ClosureInvalidator:
+    """Drops the entries of a ``RouteCache`` affected by closure changes."""
+
+    def __init__(self, cache):
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._seen = {}     # closure id -> tag, as of the last sync
+
+    def sync(self, closures):
+        with self._lock:
+            started = [tag for closure_id, tag in closures.tags.items() if closure_id not in self._seen]
+            ended = [("closure", closure_id) for closure_id in self._seen if closure_id not in closures.tags]
+            if started or ended:
+                self.cache.invalidate(started + ended)
+            self._seen = dict(closures.tags)
+
+
+# ----------------------------------------------------------
+#  Finding what to close around an incident
+# ----------------------------------------------------------
+
+def _segment_distance(px, py, ax, ay, bx, by):
+    dx, dy = bx - ax, by - ay
+    length2 = dx * dx + dy * dy
+    t = 0.0 if length2 == 0 else max(0.0, min(1.0, ((px - ax) * dx + (py - ay) * dy) / length2))
+    return math.hypot(px - (ax + t * dx), py - (ay + t * dy))
+
+
+def edges_near(graph, x, y, radius):
+    """``(start id, end id)`` of every path passing within ``radius`` of (x, y)."""
+    found = set()
+    xs, ys = graph.xs, graph.ys
+    for u in range(graph.num_nodes):
+        for e in range(graph.offsets[u], graph.offsets[u + 1]):
+            v = graph.neighbors[e]
+            # nan coordinates compare false, so unplaced paths are skipped
+            if u < v and _segment_distance(x, y, xs[u], ys[u], xs[v], ys[v]) <= radius:
+                found.add((graph.node_ids[u], graph.node_ids[v]))
+    return found
+
+
+def locations_near(x, y, radius):
+    """Ids of the locations within ``radius`` of (x, y)."""
+    return [location_id for _, location_id in get_spatial_index().within(x, y, radius)]
+
+
+def closures_near(graph, x, y, radius, target="paths", **fields):
+    """New (unsaved) ``RouteClosure`` rows for paths or locations near (x, y)."""
+    if target == "locations":
+        return [RouteClosure(location_id=location_id, **fields) for location_id in locations_near(x, y, radius)]
+    return [RouteClosure(start_id=a, end_id=b, **fields) for a, b in sorted(edges_near(graph, x, y, radius))]
@@ -1,2 +1,43 @@
-SQLALCHEMY_DATABASE_URI = "sqlite:///campus.db"
+import os
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# DATABASE_URL points the app at another database (the tests use a temporary file)
+SQLALCHEMY_DATABASE_URI = os.environ.get("DATABASE_URL", "sqlite:///campus.db")
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+
+# Contraction-hierarchy route index (see build_route_index.py)
+ROUTE_INDEX_PATH = os.path.join(BASE_DIR, "instance", "route_index.pickle")
+
+# Memory budget for cached /api/route/ responses
+ROUTE_CACHE_MAX_BYTES = 32 * 1024 * 1024
+
+# Walking pace used to judge itinerary transfers (Path.distance units per minute)
+WALKING_SPEED_PER_MINUTE = 80.0
+
+# Anchor for converting GPS lat/lng to Location x/y (see spatial_index.to_xy);
+# calibrate both values against the campus map
+CAMPUS_ORIGIN = (43.6577, -79.3788)
+CAMPUS_XY_PER_METRE = 1.0
+
+# Closures made around an incident's position: search radius (x/y units)
+# and how long they last when no expiry is given
+CLOSURE_RADIUS = 25.0
+CLOSURE_DEFAULT_MINUTES = 240
+
+# Saved-route opens are counted in memory and written in one batch once this
+# many are pending or this many seconds have passed since the last write
+USAGE_FLUSH_BATCH = 100
+USAGE_FLUSH_SECONDS = 30.0
+
+# Content-addressed floor-plan blobs (raw + gzipped) and the upload limit
+FLOOR_PLAN_DIR = os.path.join(BASE_DIR, "instance", "floor_plans")
+FLOOR_PLAN_MAX_BYTES = 20 * 1024 * 1024
+
+# Recent searches kept per user, and how often older ones are trimmed
+RECENT_SEARCH_LIMIT = 50
+RECENT_SEARCH_COMPACT_SECONDS = 300
+
+# What a view decorated with query_budget does when it runs more queries
+# than allowed: "off", "warn" (log) or "raise" (useful in tests)
+QUERY_BUDGET_MODE = os.environ.get("QUERY_BUDGET_MODE", "off")
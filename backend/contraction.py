@@ -0,0 +1,324 @@
+"""Contraction-hierarchy index for fast point-to-point route queries.
+
+Nodes are contracted one at a time in order of importance. Whenever removing
+a node would break the shortest path between two of its neighbours, a
+shortcut edge is added between them. Afterwards every shortest path can be
+found by searching only "upward" edges (towards more important nodes) from
+both ends, which settles a few hundred nodes instead of the whole campus.
+
+The index is built from a ``CSRGraph`` and saved to disk together with the
+graph version and a fingerprint of the graph's arrays. ``HierarchyIndex``
+loads it only when both match, and rebuilds it in a background thread
+otherwise: version counters start over when the database is recreated, so
+a stale file can carry the current version number for a different graph.
+"""
+import heapq
+import logging
+import os
+import pickle
+import tempfile
+import threading
+from array import array
+
+from graph_engine import INF
+
+logger = logging.getLogger(__name__)
+
+FORMAT_VERSION = 2
+
+# Witness searches stop after settling this many nodes; a missed witness
+# only costs an unnecessary shortcut, never a wrong answer.
+WITNESS_SETTLE_LIMIT = 60
+
+
+class ContractionHierarchy:
+    def __init__(self, graph_version, fingerprint, node_ids, rank, offsets, neighbors, weights, middles):
+        self.graph_version = graph_version
+        self.fingerprint = fingerprint  # CSRGraph.fingerprint() of the source graph
+        self.node_ids = node_ids        # dense index -> location id
+        self.rank = rank                # dense index -> contraction order
+        self.offsets = offsets          # upward edges of node i: offsets[i]:offsets[i + 1]
+        self.neighbors = neighbors
+        self.weights = weights
+        self.middles = middles          # contracted node a shortcut skips, -1 for real edges
+
+    # ------------------------------------------------------------------
+    #  Preprocessing
+    # ------------------------------------------------------------------
+
+    @classmethod
+    def build(cls, graph, graph_version):
+        """Contract every node of ``graph`` and return the resulting index."""
+        n = graph.num_nodes
+        # adj[u][v] = (weight, middle); only the cheapest parallel edge is kept
+        adj = [dict() for _ in range(n)]
+        for u in range(n):
+            for e in range(graph.offsets[u], graph.offsets[u + 1]):
+                v, w = graph.neighbors[e], graph.weights[e]
+                if v != u and w < adj[u].get(v, (INF, -1))[0]:
+                    adj[u][v] = (w, -1)
+
+        contracted = [False] * n
+        deleted_neighbors = [0] * n
+        rank = array("q", [0]) * n
+        upward = [None] * n
+
+        def priority(v):
+            shortcuts = _shortcuts_for(adj, v)
+            return len(shortcuts) - len(adj[v]) + deleted_neighbors[v]
+
+        queue = [(priority(v), v) for v in range(n)]
+        heapq.heapify(queue)
+        order = 0
+        while queue:
+            _, v = heapq.heappop(queue)
+            if contracted[v]:
+                continue
+            # Lazy update: re-queue if the node became more expensive
+            current = priority(v)
+            if queue and current > queue[0][0]:
+                heapq.heappush(queue, (current, v))
+                continue
+
+            for u, w, weight in _shortcuts_for(adj, v):
+                if weight < adj[u].get(w, (INF, -1))[0]:
+                    adj[u][w] = (weight, v)
+                    adj[w][u] = (weight, v)
+
+            upward[v] = list(adj[v].items())
+            contracted[v] = True
+            rank[v] = order
+            order += 1
+            for u in adj[v]:
+                del adj[u][v]
+                deleted_neighbors[u] += 1
+            adj[v] = {}
+
+        offsets = array("q", [0]) * (n + 1)
+        for v in range(n):
+            offsets[v + 1] = offsets[v] + len(upward[v])
+        neighbors = array("q")
+        weights = array("d")
+        middles = array("q")
+        for v in range(n):
+            for u, (w, middle) in upward[v]:
+                neighbors.append(u)
+                weights.append(w)
+                middles.append(middle)
+
+        return cls(graph_version, graph.fingerprint(), array("q", graph.node_ids), rank,
+                   offsets, neighbors, weights, middles)
+
+    # ------------------------------------------------------------------
+    #  Queries
+    # ------------------------------------------------------------------
+
+    def search(self, source, target):
+        """Bidirectional upward search between dense indices.
+
+        Returns ``(path, cumulative costs)`` like ``CSRGraph.search``.
+        """
+        if source == target:
+            return [source], [0.0]
+
+        dists = ({source: 0.0}, {target: 0.0})
+        preds = ({source: -1}, {target: -1})
+        queues = ([(0.0, source)], [(0.0, target)])
+        settled = (set(), set())
+        best, meet = INF, -1
+
+        while queues[0] or queues[1]:
+            # Stop once neither frontier can improve on the best meeting point
+            if min(q[0][0] if q else INF for q in queues) >= best:
+                break
+            side = 0 if queues[0] and (not queues[1] or queues[0][0][0] <= queues[1][0][0]) else 1
+            cost, node = heapq.heappop(queues[side])
+            if node in settled[side]:
+                continue
+            settled[side].add(node)
+
+            other = dists[1 - side].get(node)
+            if other is not None and cost + other < best:
+                best, meet = cost + other, node
+
+            dist, pred = dists[side], preds[side]
+            for e in range(self.offsets[node], self.offsets[node + 1]):
+                nbr = self.neighbors[e]
+                new_cost = cost + self.weights[e]
+                if new_cost < dist.get(nbr, INF):
+                    dist[nbr] = new_cost
+                    pred[nbr] = node
+                    heapq.heappush(queues[side], (new_cost, nbr))
+
+        if meet == -1:
+            return [], []
+
+        up = _chain(preds[0], meet)
+        down = _chain(preds[1], meet)
+        hops = list(reversed(up)) + down[1:]
+
+        path, costs = [hops[0]], [0.0]
+        for a, b in zip(hops, hops[1:]):
+            for node, weight in self._unpack(a, b):
+                path.append(node)
+                costs.append(costs[-1] + weight)
+        return path, costs
+
+    def _edge(self, a, b):
+        """Return ``(weight, middle)`` of the upward edge between a and b."""
+        low, high = (a, b) if self.rank[a] < self.rank[b] else (b, a)
+        for e in range(self.offsets[low], self.offsets[low + 1]):
+            if self.neighbors[e] == high:
+                return self.weights[e], self.middles[e]
+        raise KeyError((a, b))
+
+    def _unpack(self, a, b):
+        """Yield ``(node, weight)`` for each real edge on the hop a -> b."""
+        stack = [(a, b)]
+        while stack:
+            u, v = stack.pop()
+            weight, middle = self._edge(u, v)
+            if middle == -1:
+                yield v, weight
+            else:
+                # Visit u -> middle first, so push it last
+                stack.append((middle, v))
+                stack.append((u, middle))
+
+    # ------------------------------------------------------------------
+    #  Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path):
+        """Write the index atomically so readers never see a partial file."""
+        directory = os.path.dirname(path) or "."
+        os.makedirs(directory, exist_ok=True)
+        # A private temp file per writer: workers rebuilding at once race
+        # only on the final rename, and either result is a whole file
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=os.path.basename(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump({"format": FORMAT_VERSION, **self.__dict__}, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    @classmethod
+    def load(cls, path):
+        """Return the index stored at ``path``, or None if missing/outdated.
+
+        A file that cannot be read back for any reason is treated the same as
+        a missing one; the caller rebuilds and overwrites it.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = pickle.load(f)
+            if data.pop("format", None) != FORMAT_VERSION:
+                return None
+            return cls(**data)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            logger.warning("Ignoring unreadable contraction hierarchy at %s", path, exc_info=True)
+            return None
+
+
+def _shortcuts_for(adj, v):
+    """Shortcuts ``(u, w, weight)`` needed if v were contracted now."""
+    neighbors = list(adj[v].items())
+    shortcuts = []
+    for i, (u, (w_uv, _)) in enumerate(neighbors):
+        targets = {w: w_uv + w_vw for w, (w_vw, _) in neighbors[i + 1:]}
+        if not targets:
+            continue
+        witnessed = _witness_search(adj, u, v, targets)
+        for w, via_v in targets.items():
+            if witnessed.get(w, INF) > via_v:
+                shortcuts.append((u, w, via_v))
+    return shortcuts
+
+
+def _witness_search(adj, source, skip, targets):
+    """Bounded Dijkstra from source avoiding ``skip``; returns distances."""
+    limit = max(targets.values())
+    dist = {source: 0.0}
+    pq = [(0.0, source)]
+    settled = 0
+    remaining = set(targets)
+    while pq and remaining and settled < WITNESS_SETTLE_LIMIT:
+        cost, node = heapq.heappop(pq)
+        if cost > dist[node]:
+            continue
+        if cost > limit:
+            break
+        settled += 1
+        remaining.discard(node)
+        for nbr, (w, _) in adj[node].items():
+            if nbr == skip:
+                continue
+            new_cost = cost + w
+            if new_cost < dist.get(nbr, INF):
+                dist[nbr] = new_cost
+                heapq.heappush(pq, (new_cost, nbr))
+    return dist
+
+
+def _chain(pred, node):
+    chain = [node]
+    while pred[chain[-1]] != -1:
+        chain.append(pred[chain[-1]])
+    return chain
+
+
+class HierarchyIndex:
+    """Process-wide holder for the on-disk contraction hierarchy.
+
+    ``get`` never blocks on preprocessing: when the stored index is for an
+    older graph version it starts a background rebuild and returns None so
+    the caller can fall back to a plain search in the meantime.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._hierarchy = None
+        self._building = None       # graph version currently being built
+        self._checked_disk = None   # graph version last looked for on disk
+
+    def get(self, graph, graph_version):
+        key = (graph_version, graph.fingerprint())
+        hierarchy = self._hierarchy
+        if hierarchy is not None and (hierarchy.graph_version, hierarchy.fingerprint) == key:
+            return hierarchy
+
+        with self._lock:
+            if self._checked_disk != key:
+                self._checked_disk = key
+                stored = ContractionHierarchy.load(self.path)
+                if stored is not None and (stored.graph_version, stored.fingerprint) == key:
+                    self._hierarchy = stored
+                    return stored
+
+            if self._building != key:
+                self._building = key
+                threading.Thread(
+                    target=self._rebuild, args=(graph, graph_version, key), daemon=True
+                ).start()
+        return None
+
+    def _rebuild(self, graph, graph_version, key):
+        try:
+            hierarchy = ContractionHierarchy.build(graph, graph_version)
+            hierarchy.save(self.path)
+        except Exception:
+            logger.exception("Contraction hierarchy rebuild failed")
+            with self._lock:
+                if self._building == key:
+                    self._building = None
+            return
+
+        with self._lock:
+            # Keep it unless a newer graph's build has started meanwhile
+            if self._building == key or self._hierarchy is None:
+                self._hierarchy = hierarchy
@@ -0,0 +1,23 @@
+"""Opaque pagination cursors.
+
+A cursor is the sort key of the last row a client has seen, JSON-encoded
+and base64url-wrapped so clients treat it as a token rather than building
+one themselves.
+"""
+import base64
+import binascii
+import json
+
+
+def encode_cursor(values):
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token):
+    """Return the values packed into ``token``; raises ValueError if it is malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        return json.loads(raw)
+    except (binascii.Error, UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise ValueError("invalid cursor") from exc
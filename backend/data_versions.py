@@ -0,0 +1,98 @@
+"""Version counters for tables that feed in-process caches.
+
+Each worker keeps its own copy of expensive derived data (the routing graph,
+for example). A cache remembers the counter it was built against and rebuilds
+once the value stored in ``data_versions`` moves on, so a write made through
+any worker is picked up by every other worker on its next request.
+
+Counters are bumped automatically whenever a tracked model is written through
+the ORM. Bulk ``query.update()``/``query.delete()`` calls and raw SQL bypass
+the session events, so code doing that must call ``bump_version`` itself.
+"""
+import threading
+from itertools import chain
+
+from sqlalchemy import event, insert, select, update
+from sqlalchemy.orm import Session
+
+from db import db
+from models import DataVersion, Location, Path, RouteClosure
+
+GRAPH = "graph"
+LOCATIONS = "locations"
+CLOSURES = "closures"
+SEARCH = "search"
+
+# Counters bumped by a write to each model
+TRACKED_MODELS = {
+    Location: (GRAPH, LOCATIONS),
+    Path: (GRAPH,),
+    RouteClosure: (CLOSURES,),
+}
+
+
+def get_version(name):
+    """Return the current counter for ``name`` (0 if it was never bumped)."""
+    value = db.session.execute(
+        select(DataVersion.version).where(DataVersion.name == name)
+    ).scalar()
+    return value or 0
+
+
+def _bump(connection, name):
+    result = connection.execute(
+        update(DataVersion)
+        .where(DataVersion.name == name)
+        .values(version=DataVersion.version + 1)
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(DataVersion).values(name=name, version=1))
+        return 1
+    return connection.execute(select(DataVersion.version).where(DataVersion.name == name)).scalar()
+
+
+def bump_version(name, connection=None):
+    """Bump ``name`` inside the current transaction (committed with it).
+
+    Returns the new value, which no other transaction can have seen yet.
+    """
+    return _bump(connection or db.session.connection(), name)
+
+
+@event.listens_for(Session, "after_flush")
+def _bump_on_write(session, flush_context):
+    names = set()
+    for obj in chain(session.new, session.deleted):
+        names.update(TRACKED_MODELS.get(type(obj), ()))
+    for obj in session.dirty:
+        if type(obj) in TRACKED_MODELS and session.is_modified(obj):
+            names.update(TRACKED_MODELS[type(obj)])
+
+    connection = session.connection()
+    for name in sorted(names):
+        _bump(connection, name)
+
+
+class VersionedCache:
+    """Process-wide value rebuilt by ``loader`` whenever ``name`` is bumped."""
+
+    def __init__(self, name, loader):
+        self.name = name
+        self.loader = loader
+        self._lock = threading.Lock()
+        self._value = None
+        self._version = None
+
+    def get(self):
+        """Return ``(value, version)``, rebuilding first if the data changed."""
+        version = get_version(self.name)
+        with self._lock:
+            if self._version != version:
+                self._value = self.loader()
+                self._version = version
+            return self._value, version
+
+    def clear(self):
+        with self._lock:
+            self._value = None
+            self._version = None
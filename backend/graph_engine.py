@@ -0,0 +1,364 @@
+"""Compact array-backed graph used by the routing endpoints.
+
+The campus graph is stored in compressed sparse row (CSR) form: node ``i``'s
+outgoing edges are ``neighbors[offsets[i]:offsets[i + 1]]`` with matching
+``weights``. Location ids are mapped to a dense ``0..n-1`` index so searches
+can use flat lists instead of dicts, and every undirected path is stored as
+two directed half-edges.
+
+Location coordinates, when known, drive the A* heuristic. The straight-line
+distance is scaled by the smallest weight/length ratio seen on any edge, so
+it never overestimates even when ``Path.distance`` is in different units
+from ``Location.x/y``.
+
+Routing profiles share one structure: ``profiles[name]`` is a view with the
+same node and neighbour arrays but its own weight array, computed once when
+the graph is loaded.
+"""
+import copy
+import hashlib
+import heapq
+import math
+from array import array
+
+INF = float("inf")
+
+
+class CSRGraph:
+    def __init__(self, node_ids, offsets, neighbors, weights, xs=None, ys=None):
+        self.node_ids = node_ids        # dense index -> location id
+        self.offsets = offsets          # len(node_ids) + 1 entries
+        self.neighbors = neighbors      # half-edge -> dense index of head
+        self.weights = weights          # half-edge -> routing cost
+        self.distances = weights        # half-edge -> Path.distance
+        self.index = {node_id: i for i, node_id in enumerate(node_ids)}
+        self.profiles = {}
+
+        # Coordinates (nan when unknown) and the admissible heuristic scale
+        n = len(node_ids)
+        self.xs = xs if xs is not None else array("d", [math.nan]) * n
+        self.ys = ys if ys is not None else array("d", [math.nan]) * n
+        self.heuristic_scale = self._heuristic_scale()
+        self._fingerprint = None
+
+    @classmethod
+    def from_edges(cls, edges, coords=None, profiles=None):
+        """Build from ``(start_id, end_id, distance, *attrs)`` rows (undirected).
+
+        ``coords`` optionally maps location id -> ``(x, y)``; those locations
+        become nodes even if no path touches them yet. ``profiles`` maps a
+        profile name to ``weight(distance, *attrs)``; each gets a view in
+        ``graph.profiles``.
+        """
+        coords = coords or {}
+        profiles = profiles or {}
+        edges = [row for row in edges if row[0] is not None and row[1] is not None]
+        node_ids = array("q", sorted({row[0] for row in edges} | {row[1] for row in edges} | set(coords)))
+        index = {node_id: i for i, node_id in enumerate(node_ids)}
+        n = len(node_ids)
+
+        degree = [0] * (n + 1)
+        for row in edges:
+            degree[index[row[0]] + 1] += 1
+            degree[index[row[1]] + 1] += 1
+        for i in range(n):
+            degree[i + 1] += degree[i]
+        offsets = array("q", degree)
+
+        size = 2 * len(edges)
+        neighbors = array("q", bytes(8 * size))
+        weights = array("d", bytes(8 * size))
+        profile_weights = {name: array("d", bytes(8 * size)) for name in profiles}
+        fill = list(offsets[:-1])
+        for u, v, w, *attrs in edges:
+            w = float(w or 0.0)
+            costs = [(profile_weights[name], float(fn(w, *attrs))) for name, fn in profiles.items()]
+            for a, b in ((index[u], index[v]), (index[v], index[u])):
+                slot = fill[a]
+                neighbors[slot] = b
+                weights[slot] = w
+                for target, cost in costs:
+                    target[slot] = cost
+                fill[a] = slot + 1
+
+        xs = array("d", [math.nan]) * n
+        ys = array("d", [math.nan]) * n
+        for node_id, (x, y) in coords.items():
+            if x is not None and y is not None:
+                xs[index[node_id]] = x
+                ys[index[node_id]] = y
+
+        graph = cls(node_ids, offsets, neighbors, weights, xs, ys)
+        graph.profiles = {name: graph.with_weights(arr) for name, arr in profile_weights.items()}
+        return graph
+
+    def with_weights(self, weights):
+        """Return a view sharing this graph's structure with other costs."""
+        view = copy.copy(self)
+        view.weights = weights
+        view.heuristic_scale = view._heuristic_scale()
+        view._fingerprint = None
+        return view
+
+    def _heuristic_scale(self):
+        # A location without x/y can sit on a shortest path between placed
+        # ones, where the straight-line bound no longer holds: no heuristic
+        xs, ys = self.xs, self.ys
+        if any(math.isnan(x) or math.isnan(y) for x, y in zip(xs, ys)):
+            return 0.0
+        scale = INF
+        for u in range(len(self.node_ids)):
+            for e in range(self.offsets[u], self.offsets[u + 1]):
+                v = self.neighbors[e]
+                length = math.hypot(xs[u] - xs[v], ys[u] - ys[v])
+                if length > 0:          # false for coincident points
+                    scale = min(scale, self.weights[e] / length)
+        return 0.0 if scale == INF else scale
+
+    def fingerprint(self):
+        """sha256 of the node ids and CSR arrays: equal only for the same graph."""
+        if self._fingerprint is None:
+            digest = hashlib.sha256()
+            for a in (self.node_ids, self.offsets, self.neighbors, self.weights):
+                digest.update(len(a).to_bytes(8, "little"))
+                digest.update(array(a.typecode, a).tobytes())
+            self._fingerprint = digest.hexdigest()
+        return self._fingerprint
+
+    @property
+    def num_nodes(self):
+        return len(self.node_ids)
+
+    @property
+    def num_edges(self):
+        return len(self.neighbors) // 2
+
+    def nbytes(self):
+        """Approximate size of the CSR arrays (all profiles) in bytes."""
+        arrays = [self.node_ids, self.offsets, self.neighbors, self.weights, self.xs, self.ys]
+        arrays += [view.weights for view in self.profiles.values() if view.weights is not self.weights]
+        return sum(a.itemsize * len(a) for a in arrays)
+
+    def half_edges(self, u, v):
+        """Dense half-edge indices running from dense node ``u`` to ``v``."""
+        return [e for e in range(self.offsets[u], self.offsets[u + 1]) if self.neighbors[e] == v]
+
+    def to_ids(self, nodes):
+        return [self.node_ids[i] for i in nodes]
+
+    def path_distance(self, path):
+        """Real length of a dense path, taking the cheapest edge per hop."""
+        total = 0.0
+        for a, b in zip(path, path[1:]):
+            e = min(self.half_edges(a, b), key=lambda e: self.weights[e])
+            total += self.distances[e]
+        return total
+
+    def shortest_path(self, source, target, banned_edges=(), banned_nodes=()):
+        """Dijkstra between dense indices, skipping banned half-edges/nodes.
+
+        Returns ``(cost, [dense indices])`` or ``(inf, [])``.
+        """
+        path, costs = self.search(source, target, banned_edges, banned_nodes)
+        return (costs[-1], path) if path else (INF, [])
+
+    def search(self, source, target, banned_edges=(), banned_nodes=()):
+        """Dijkstra returning ``(path, cumulative cost at each path node)``.
+
+        Predecessors are tracked in a flat list and the path is rebuilt once
+        at the end. The masks are per call, so the graph itself is never
+        modified and one instance can serve concurrent requests.
+        """
+        if source in banned_nodes or target in banned_nodes:
+            return [], []
+
+        offsets, neighbors, weights = self.offsets, self.neighbors, self.weights
+        dist = [INF] * self.num_nodes
+        pred = [-1] * self.num_nodes
+        done = [False] * self.num_nodes
+        dist[source] = 0.0
+        pq = [(0.0, source)]
+
+        while pq:
+            cost, node = heapq.heappop(pq)
+            if done[node]:
+                continue
+            done[node] = True
+            if node == target:
+                path = _unwind(pred, target)
+                return path, [dist[i] for i in path]
+
+            for e in range(offsets[node], offsets[node + 1]):
+                nbr = neighbors[e]
+                if done[nbr] or e in banned_edges or nbr in banned_nodes:
+                    continue
+                new_cost = cost + weights[e]
+                if new_cost < dist[nbr]:
+                    dist[nbr] = new_cost
+                    pred[nbr] = node
+                    heapq.heappush(pq, (new_cost, nbr))
+
+        return [], []
+
+    def shortest_path_tree(self, source, targets=None, budget=INF, banned_edges=(), banned_nodes=()):
+        """One-to-many Dijkstra from ``source``; returns ``(dist, pred)``.
+
+        With ``targets`` (dense indices) the search stops once all of them
+        are settled; with ``budget`` nothing further than that is explored
+        (``dist`` stays inf beyond it). Use ``tree_path`` to read individual
+        routes out of the result.
+        """
+        offsets, neighbors, weights = self.offsets, self.neighbors, self.weights
+        dist = [INF] * self.num_nodes
+        pred = [-1] * self.num_nodes
+        done = [False] * self.num_nodes
+        if source in banned_nodes:
+            return dist, pred
+        dist[source] = 0.0
+        pq = [(0.0, source)]
+        remaining = set(targets) if targets is not None else None
+
+        while pq:
+            cost, node = heapq.heappop(pq)
+            if done[node]:
+                continue
+            done[node] = True
+            if remaining is not None:
+                remaining.discard(node)
+                if not remaining:
+                    break
+
+            for e in range(offsets[node], offsets[node + 1]):
+                nbr = neighbors[e]
+                if e in banned_edges or nbr in banned_nodes:
+                    continue
+                new_cost = cost + weights[e]
+                if new_cost < dist[nbr] and new_cost <= budget:
+                    dist[nbr] = new_cost
+                    pred[nbr] = node
+                    heapq.heappush(pq, (new_cost, nbr))
+
+        return dist, pred
+
+    def astar_search(self, source, target, banned_edges=(), banned_nodes=()):
+        """A* with the same inputs and result as ``search``.
+
+        Falls back to plain Dijkstra when there is no usable heuristic,
+        which includes any graph with a location that has no coordinates.
+        """
+        scale = self.heuristic_scale
+        if scale == 0:
+            return self.search(source, target, banned_edges, banned_nodes)
+        if source in banned_nodes or target in banned_nodes:
+            return [], []
+        xs, ys = self.xs, self.ys
+        tx, ty = xs[target], ys[target]
+
+        def h(node):
+            return scale * math.hypot(xs[node] - tx, ys[node] - ty)
+
+        offsets, neighbors, weights = self.offsets, self.neighbors, self.weights
+        dist = [INF] * self.num_nodes
+        pred = [-1] * self.num_nodes
+        dist[source] = 0.0
+        pq = [(h(source), 0.0, source)]
+
+        while pq:
+            _, cost, node = heapq.heappop(pq)
+            if cost > dist[node]:
+                continue
+            if node == target:
+                path = _unwind(pred, target)
+                return path, [dist[i] for i in path]
+
+            for e in range(offsets[node], offsets[node + 1]):
+                nbr = neighbors[e]
+                if e in banned_edges or nbr in banned_nodes:
+                    continue
+                new_cost = cost + weights[e]
+                if new_cost < dist[nbr]:
+                    dist[nbr] = new_cost
+                    pred[nbr] = node
+                    heapq.heappush(pq, (new_cost + h(nbr), new_cost, nbr))
+
+        return [], []
+
+
+def k_shortest_paths(graph, source, target, k, search=None, first=None,
+                     banned_edges=(), banned_nodes=()):
+    """Yen's algorithm: up to ``k`` loopless paths in increasing cost order.
+
+    Returns ``[(cost, [dense indices]), ...]``. Candidates sit in a min-heap
+    and are de-duplicated by node sequence; root-path edges and nodes are
+    hidden through per-search masks; the cost of each root path is read from
+    the cumulative costs recorded for the path it was cut from.
+
+    ``search`` is the point-to-point search to use (``graph.search`` by
+    default, or ``graph.astar_search``). ``first`` is an already known
+    ``(path, costs)`` for the shortest route, e.g. from a route index.
+    ``banned_edges``/``banned_nodes`` are hidden from every search (closures).
+    """
+    search = search or graph.search
+    closed_edges, closed_nodes = banned_edges, banned_nodes
+    path, costs = first if first is not None else search(source, target, closed_edges, closed_nodes)
+    if not path:
+        return []
+
+    routes = [(path, costs)]
+    seen = {tuple(path)}
+    candidates = []
+    counter = 0
+
+    while len(routes) < k:
+        prev_path, prev_costs = routes[-1]
+
+        for j in range(len(prev_path) - 1):
+            spur_node = prev_path[j]
+            root_path = prev_path[: j + 1]
+
+            # Edges already used to leave this root, and the root itself
+            banned_edges = set(closed_edges)
+            for path_r, _ in routes:
+                if len(path_r) > j + 1 and path_r[: j + 1] == root_path:
+                    banned_edges.update(graph.half_edges(path_r[j], path_r[j + 1]))
+            banned_nodes = set(closed_nodes)
+            banned_nodes.update(root_path[:-1])
+
+            spur_path, spur_costs = search(spur_node, target, banned_edges, banned_nodes)
+            if not spur_path:
+                continue
+
+            full_path = root_path[:-1] + spur_path
+            key = tuple(full_path)
+            if key in seen:
+                continue
+            seen.add(key)
+
+            root_cost = prev_costs[j]
+            full_costs = prev_costs[:j] + [root_cost + c for c in spur_costs]
+            counter += 1
+            heapq.heappush(candidates, (full_costs[-1], counter, full_path, full_costs))
+
+        if not candidates:
+            break
+
+        _, _, path, costs = heapq.heappop(candidates)
+        routes.append((path, costs))
+
+    return [(costs[-1], path) for path, costs in routes]
+
+
+def tree_path(dist, pred, target):
+    """Read ``(path, costs)`` to ``target`` out of a shortest-path tree."""
+    if dist[target] == INF:
+        return [], []
+    path = _unwind(pred, target)
+    return path, [dist[i] for i in path]
+
+
+def _unwind(pred, target):
+    path = [target]
+    while pred[path[-1]] != -1:
+        path.append(pred[path[-1]])
+    path.reverse()
+    return path
@@ -0,0 +1,87 @@
+"""Process-level lookup table of campus locations.
+
+Route responses need the name and coordinates of every location on every
+returned path. Locations rarely change, so the whole table is loaded once
+per worker and reloaded only after a write bumps the "locations" version.
+"""
+import gzip
+import hashlib
+import json
+from collections import namedtuple
+
+from db import db
+from data_versions import LOCATIONS, VersionedCache
+from models import Location
+from spatial_index import KDTree
+
+LocationRow = namedtuple("LocationRow", ["id", "name", "x", "y"])
+
+
+class LocationTable(dict):
+    """``{location id: LocationRow}`` plus a case-insensitive name lookup."""
+
+    def __init__(self, rows):
+        super().__init__((row.id, row) for row in rows)
+        self.by_name = {}
+        for row in sorted(self.values()):
+            if row.name:
+                self.by_name.setdefault(row.name.strip().lower(), row)
+
+    def find(self, name):
+        """Return the location called ``name`` (ignoring case), or None."""
+        return self.by_name.get((name or "").strip().lower())
+
+
+def load_locations():
+    rows = db.session.query(Location.id, Location.name, Location.x, Location.y)
+    return LocationTable(LocationRow(*row) for row in rows)
+
+
+location_cache = VersionedCache(LOCATIONS, load_locations)
+
+
+def get_locations():
+    """Return the ``LocationTable`` for the current version."""
+    table, _ = location_cache.get()
+    return table
+
+
+def load_spatial_index():
+    return KDTree((loc.x, loc.y, loc.id) for loc in get_locations().values())
+
+
+# Rebuilt alongside the location table whenever locations change
+spatial_cache = VersionedCache(LOCATIONS, load_spatial_index)
+
+
+def get_spatial_index():
+    """Return the ``KDTree`` over location x/y for the current version."""
+    tree, _ = spatial_cache.get()
+    return tree
+
+
+class LocationListing:
+    """The full ``/api/locations/`` body, serialized and gzipped once.
+
+    The ETag is a hash of the body, so every worker hands out the same tag
+    for the same table without coordinating.
+    """
+
+    def __init__(self, table):
+        rows = [row._asdict() for row in sorted(table.values())]
+        self.body = json.dumps(rows, separators=(",", ":")).encode()
+        self.gzipped = gzip.compress(self.body, compresslevel=9)
+        self.etag = hashlib.sha256(self.body).hexdigest()[:32]
+
+
+def load_listing():
+    return LocationListing(get_locations())
+
+
+listing_cache = VersionedCache(LOCATIONS, load_listing)
+
+
+def get_listing():
+    """Return the ``LocationListing`` for the current version."""
+    listing, _ = listing_cache.get()
+    return listing
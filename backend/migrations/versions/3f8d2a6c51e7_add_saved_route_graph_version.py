@@ -0,0 +1,33 @@
+"""add profile, k and graph_version to saved_routes
+
+Revision ID: 3f8d2a6c51e7
+Revises: 9e41c07a2b13
+Create Date: 2026-10-17 16:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f8d2a6c51e7'
+down_revision = '9e41c07a2b13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('saved_routes', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('profile', sa.String(length=20), nullable=True))
+        batch_op.add_column(sa.Column('k', sa.Integer(), nullable=True))
+        batch_op.add_column(sa.Column('graph_version', sa.Integer(), nullable=True))
+
+    # Routes saved before profiles existed were all shortest-distance routes
+    op.execute("UPDATE saved_routes SET profile = 'shortest' WHERE profile IS NULL")
+
+
+def downgrade():
+    with op.batch_alter_table('saved_routes', schema=None) as batch_op:
+        batch_op.drop_column('graph_version')
+        batch_op.drop_column('k')
+        batch_op.drop_column('profile')
@@ -0,0 +1,32 @@
+"""add routing profile attributes to paths
+
+Revision ID: 586de3d4492d
+Revises: 6c9cab246f29
+Create Date: 2026-10-17 13:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '586de3d4492d'
+down_revision = '6c9cab246f29'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('paths', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('stairs', sa.Boolean(), nullable=False, server_default=sa.false()))
+        batch_op.add_column(sa.Column('elevator', sa.Boolean(), nullable=False, server_default=sa.false()))
+        batch_op.add_column(sa.Column('indoor', sa.Boolean(), nullable=False, server_default=sa.false()))
+        batch_op.add_column(sa.Column('slope', sa.Float(), nullable=False, server_default='0'))
+
+
+def downgrade():
+    with op.batch_alter_table('paths', schema=None) as batch_op:
+        batch_op.drop_column('slope')
+        batch_op.drop_column('indoor')
+        batch_op.drop_column('elevator')
+        batch_op.drop_column('stairs')
@@ -0,0 +1,26 @@
+"""add (user_id, created_at) index to saved_items
+
+Revision ID: 5a0f3d8e6c92
+Revises: e2a91c5b7f08
+Create Date: 2026-10-17 18:40:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5a0f3d8e6c92'
+down_revision = 'e2a91c5b7f08'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('saved_items', schema=None) as batch_op:
+        batch_op.create_index('idx_user_created', ['user_id', 'created_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('saved_items', schema=None) as batch_op:
+        batch_op.drop_index('idx_user_created')
@@ -0,0 +1,46 @@
+"""add route_closures table
+
+Revision ID: 9e41c07a2b13
+Revises: 586de3d4492d
+Create Date: 2026-10-17 15:10:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9e41c07a2b13'
+down_revision = '586de3d4492d'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('route_closures',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('start_id', sa.Integer(), nullable=True),
+    sa.Column('end_id', sa.Integer(), nullable=True),
+    sa.Column('location_id', sa.Integer(), nullable=True),
+    sa.Column('reason', sa.String(length=200), nullable=True),
+    sa.Column('created_by', sa.String(length=200), nullable=True),
+    sa.Column('alert_id', sa.Integer(), nullable=True),
+    sa.Column('lat', sa.Float(), nullable=True),
+    sa.Column('lng', sa.Float(), nullable=True),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('expires_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['alert_id'], ['alerts.id'], ),
+    sa.ForeignKeyConstraint(['end_id'], ['locations.id'], ),
+    sa.ForeignKeyConstraint(['location_id'], ['locations.id'], ),
+    sa.ForeignKeyConstraint(['start_id'], ['locations.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    with op.batch_alter_table('route_closures', schema=None) as batch_op:
+        batch_op.create_index(batch_op.f('ix_route_closures_expires_at'), ['expires_at'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('route_closures', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_route_closures_expires_at'))
+
+    op.drop_table('route_closures')
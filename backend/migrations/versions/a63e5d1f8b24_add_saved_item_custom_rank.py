@@ -0,0 +1,60 @@
+"""add custom_rank to saved_items for drag-and-drop ordering
+
+Revision ID: a63e5d1f8b24
+Revises: f18b3c6d2e47
+Create Date: 2026-10-17 20:30:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a63e5d1f8b24'
+down_revision = 'f18b3c6d2e47'
+branch_labels = None
+depends_on = None
+
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+
+
+def _spread_keys(count):
+    # Same keys as rank_keys.spread_keys at the time of writing
+    base, width = len(DIGITS), 1
+    while base ** width <= count:
+        width += 1
+    keys = []
+    for i in range(1, count + 1):
+        value, digits = i * base ** width // (count + 1), []
+        for _ in range(width):
+            value, digit = divmod(value, base)
+            digits.append(DIGITS[digit])
+        keys.append("".join(reversed(digits)).rstrip("0"))
+    return keys
+
+
+def upgrade():
+    with op.batch_alter_table('saved_items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('custom_rank', sa.String(length=255), nullable=True))
+        batch_op.create_index('idx_user_rank', ['user_id', 'custom_rank'], unique=True)
+
+    # Rank each user's items in their current custom order
+    connection = op.get_bind()
+    by_user = {}
+    for item_id, user_id in connection.execute(sa.text(
+        "SELECT id, user_id FROM saved_items ORDER BY user_id, custom_order, id"
+    )):
+        by_user.setdefault(user_id, []).append(item_id)
+    updates = [
+        {'id': item_id, 'rank': rank}
+        for ids in by_user.values()
+        for item_id, rank in zip(ids, _spread_keys(len(ids)))
+    ]
+    if updates:
+        connection.execute(sa.text("UPDATE saved_items SET custom_rank = :rank WHERE id = :id"), updates)
+
+
+def downgrade():
+    with op.batch_alter_table('saved_items', schema=None) as batch_op:
+        batch_op.drop_index('idx_user_rank')
+        batch_op.drop_column('custom_rank')
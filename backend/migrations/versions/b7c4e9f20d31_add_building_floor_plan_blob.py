@@ -0,0 +1,32 @@
+"""add floor-plan blob columns to buildings
+
+Revision ID: b7c4e9f20d31
+Revises: 3f8d2a6c51e7
+Create Date: 2026-10-17 17:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7c4e9f20d31'
+down_revision = '3f8d2a6c51e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('buildings', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('floor_plan_hash', sa.String(length=64), nullable=True))
+        batch_op.add_column(sa.Column('floor_plan_type', sa.String(length=100), nullable=True))
+        batch_op.add_column(sa.Column('floor_plan_size', sa.Integer(), nullable=True))
+        batch_op.create_index(batch_op.f('ix_buildings_floor_plan_hash'), ['floor_plan_hash'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('buildings', schema=None) as batch_op:
+        batch_op.drop_index(batch_op.f('ix_buildings_floor_plan_hash'))
+        batch_op.drop_column('floor_plan_size')
+        batch_op.drop_column('floor_plan_type')
+        batch_op.drop_column('floor_plan_hash')
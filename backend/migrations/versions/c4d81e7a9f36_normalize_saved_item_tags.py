@@ -0,0 +1,77 @@
+"""move saved item tags into saved_item_tags
+
+Revision ID: c4d81e7a9f36
+Revises: 5a0f3d8e6c92
+Create Date: 2026-10-17 19:20:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c4d81e7a9f36'
+down_revision = '5a0f3d8e6c92'
+branch_labels = None
+depends_on = None
+
+
+def _split(tags):
+    # Case and length are kept as stored; only blanks and repeats are dropped
+    found = []
+    for tag in (tags or "").split(","):
+        tag = tag.strip()
+        if tag and tag not in found:
+            found.append(tag)
+    return found
+
+
+def upgrade():
+    tag_table = op.create_table('saved_item_tags',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('item_id', sa.Integer(), nullable=False),
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('tag', sa.String(length=255), nullable=False),
+    sa.ForeignKeyConstraint(['item_id'], ['saved_items.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('item_id', 'tag', name='uq_saved_item_tag')
+    )
+    with op.batch_alter_table('saved_item_tags', schema=None) as batch_op:
+        batch_op.create_index('idx_user_tag', ['user_id', 'tag', 'item_id'], unique=False)
+
+    # Copy the comma-separated tags across, one row per tag
+    connection = op.get_bind()
+    items = connection.execute(sa.text(
+        "SELECT id, user_id, tags FROM saved_items WHERE tags IS NOT NULL AND tags != ''"
+    ))
+    rows = [
+        {'item_id': item_id, 'user_id': user_id, 'tag': tag}
+        for item_id, user_id, tags in items
+        for tag in _split(tags)
+    ]
+    if rows:
+        op.bulk_insert(tag_table, rows)
+
+    with op.batch_alter_table('saved_items', schema=None) as batch_op:
+        batch_op.drop_column('tags')
+
+
+def downgrade():
+    with op.batch_alter_table('saved_items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('tags', sa.String(length=255), nullable=True))
+
+    connection = op.get_bind()
+    joined = {}
+    for item_id, tag in connection.execute(sa.text("SELECT item_id, tag FROM saved_item_tags ORDER BY id")):
+        joined.setdefault(item_id, []).append(tag)
+    for item_id, tags in joined.items():
+        connection.execute(
+            sa.text("UPDATE saved_items SET tags = :tags WHERE id = :id"),
+            {'tags': ",".join(tags)[:255], 'id': item_id}
+        )
+
+    with op.batch_alter_table('saved_item_tags', schema=None) as batch_op:
+        batch_op.drop_index('idx_user_tag')
+
+    op.drop_table('saved_item_tags')
@@ -0,0 +1,52 @@
+"""unique (user, term) on recent searches
+
+Revision ID: e2a91c5b7f08
+Revises: b7c4e9f20d31
+Create Date: 2026-10-17 18:05:00.000000
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e2a91c5b7f08'
+down_revision = 'b7c4e9f20d31'
+branch_labels = None
+depends_on = None
+
+
+def _dedupe(table, term):
+    # Keep only the newest row of each (user_id, term) pair
+    op.execute(f"""
+        DELETE FROM {table}
+        WHERE EXISTS (
+            SELECT 1 FROM {table} AS newer
+            WHERE newer.user_id = {table}.user_id
+              AND newer.{term} = {table}.{term}
+              AND (COALESCE(newer.timestamp, '') > COALESCE({table}.timestamp, '')
+                   OR (COALESCE(newer.timestamp, '') = COALESCE({table}.timestamp, '') AND newer.id > {table}.id))
+        )
+    """)
+
+
+def upgrade():
+    _dedupe('user_recent_searches', 'search_term')
+    with op.batch_alter_table('user_recent_searches', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_user_search_term', ['user_id', 'search_term'])
+        batch_op.create_index('idx_user_search_time', ['user_id', 'timestamp'], unique=False)
+
+    _dedupe('recent_searches', 'destination')
+    with op.batch_alter_table('recent_searches', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_recent_user_destination', ['user_id', 'destination'])
+        batch_op.create_index('idx_recent_user_time', ['user_id', 'timestamp'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('recent_searches', schema=None) as batch_op:
+        batch_op.drop_index('idx_recent_user_time')
+        batch_op.drop_constraint('uq_recent_user_destination', type_='unique')
+
+    with op.batch_alter_table('user_recent_searches', schema=None) as batch_op:
+        batch_op.drop_index('idx_user_search_time')
+        batch_op.drop_constraint('uq_user_search_term', type_='unique')
@@ -0,0 +1,67 @@
+"""promote semester and credits out of saved_items.item_metadata
+
+Revision ID: f18b3c6d2e47
+Revises: c4d81e7a9f36
+Create Date: 2026-10-17 19:55:00.000000
+
+"""
+import json
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f18b3c6d2e47'
+down_revision = 'c4d81e7a9f36'
+branch_labels = None
+depends_on = None
+
+
+def _value(convert, value):
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    try:
+        return convert(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def upgrade():
+    with op.batch_alter_table('saved_items', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('semester', sa.String(length=50), nullable=True))
+        batch_op.add_column(sa.Column('credits', sa.Float(), nullable=True))
+        batch_op.create_index('idx_type_semester', ['item_type', 'semester', 'user_id'], unique=False)
+        batch_op.create_index('idx_type_credits', ['item_type', 'credits', 'user_id'], unique=False)
+
+    # Backfill from the existing JSON
+    connection = op.get_bind()
+    rows = connection.execute(sa.text(
+        "SELECT id, item_metadata FROM saved_items WHERE item_metadata IS NOT NULL"
+    )).fetchall()
+    updates = []
+    for item_id, text in rows:
+        try:
+            metadata = json.loads(text)
+        except ValueError:
+            continue
+        if not isinstance(metadata, dict):
+            continue
+        updates.append({
+            'id': item_id,
+            'semester': _value(str, metadata.get('semester')),
+            'credits': _value(float, metadata.get('credits')),
+        })
+    if updates:
+        connection.execute(
+            sa.text("UPDATE saved_items SET semester = :semester, credits = :credits WHERE id = :id"),
+            updates
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('saved_items', schema=None) as batch_op:
+        batch_op.drop_index('idx_type_credits')
+        batch_op.drop_index('idx_type_semester')
+        batch_op.drop_column('credits')
+        batch_op.drop_column('semester')
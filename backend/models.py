@@ -1,4 +1,9 @@
 from db import db
+import json
+from functools import lru_cache
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import Session, validates
+from rank_keys import key_between
 from datetime import datetime
 from werkzeug.security import generate_password_hash, check_password_hash
 
@@ -16,6 +21,18 @@ class Path(db.Model):
     end_id = db.Column(db.Integer, db.ForeignKey("locations.id"))
     distance = db.Column(db.Float)
 
+    # Edge attributes used by the routing profiles (see route_profiles.py)
+    stairs = db.Column(db.Boolean, nullable=False, default=False)
+    elevator = db.Column(db.Boolean, nullable=False, default=False)
+    indoor = db.Column(db.Boolean, nullable=False, default=False)
+    slope = db.Column(db.Float, nullable=False, default=0.0)  # percent grade
+
+class DataVersion(db.Model):
+    __tablename__ = "data_versions"
+    # One counter per cached dataset, e.g. "graph"
+    name = db.Column(db.String(50), primary_key=True)
+    version = db.Column(db.Integer, nullable=False, default=0)
+
 class User(db.Model):
     __tablename__ = "users"
     id = db.Column(db.Integer, primary_key=True)
@@ -44,6 +61,9 @@ class SavedItem(db.Model):
     
     # Additional metadata stored as JSON
     item_metadata = db.Column(db.Text)  # JSON string for flexible data
+    # Copies of commonly queried metadata keys (see METADATA_COLUMNS)
+    semester = db.Column(db.String(50))
+    credits = db.Column(db.Float)
     
     # Timestamps
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
@@ -51,10 +71,38 @@ class SavedItem(db.Model):
     
     # For sorting preferences
     custom_order = db.Column(db.Integer, default=0)  # User-defined order
-    tags = db.Column(db.String(255))  # Comma-separated tags for filtering
+    # Drag-and-drop position as a rank_keys string; new items go last
+    custom_rank = db.Column(db.String(255))
     
     # Relationship
     location = db.relationship("Location", backref="saved_items")
+    # Tags live in saved_item_tags; selectin loads them for a whole page at once
+    tag_rows = db.relationship("SavedItemTag", backref="item", lazy="selectin",
+                               cascade="all, delete-orphan", order_by="SavedItemTag.id")
+    
+    @validates("item_metadata")
+    def _sync_metadata_columns(self, key, value):
+        parsed = parse_metadata(value)
+        for name, (column, convert) in METADATA_COLUMNS.items():
+            setattr(self, column, _convert(convert, parsed.get(name)))
+        return value
+    
+    @property
+    def parsed_metadata(self):
+        """Decoded ``item_metadata`` (shared and cached: do not modify)."""
+        return parse_metadata(self.item_metadata)
+    
+    @property
+    def tags(self):
+        return [row.tag for row in self.tag_rows]
+    
+    @tags.setter
+    def tags(self, value):
+        """Accepts a list or a comma-separated string; keeps unchanged rows."""
+        wanted = normalize_tags(value)
+        self.tag_rows = [row for row in self.tag_rows if row.tag in wanted]
+        have = {row.tag for row in self.tag_rows}
+        self.tag_rows += [SavedItemTag(tag=tag, user_id=self.user_id) for tag in wanted if tag not in have]
     
     # Indexes for fast sorting
     __table_args__ = (
@@ -62,8 +110,96 @@ class SavedItem(db.Model):
         db.Index('idx_user_professor', 'user_id', 'professor_name'),
         db.Index('idx_user_course', 'user_id', 'course_code'),
         db.Index('idx_user_custom', 'user_id', 'custom_order'),
+        # Unique: two items allocated the same key by concurrent requests fail
+        # to commit (and are retried) instead of sorting in an arbitrary order
+        db.Index('idx_user_rank', 'user_id', 'custom_rank', unique=True),
+        db.Index('idx_user_created', 'user_id', 'created_at'),
+        db.Index('idx_type_semester', 'item_type', 'semester', 'user_id'),
+        db.Index('idx_type_credits', 'item_type', 'credits', 'user_id'),
     )
 
+# Metadata key -> (SavedItem column, type). The column is rewritten whenever
+# item_metadata is set, so filters on it are index lookups on plain columns.
+# To promote another key: add the column, an index, an entry here and a
+# migration that backfills it.
+METADATA_COLUMNS = {
+    "semester": ("semester", str),
+    "credits": ("credits", float),
+}
+
+@lru_cache(maxsize=4096)
+def _decode_metadata(text):
+    try:
+        value = json.loads(text)
+    except (TypeError, ValueError):
+        return {}
+    return value if isinstance(value, dict) else {}
+
+def parse_metadata(text):
+    """Decode item_metadata; many items share the same text, so it is cached."""
+    return _decode_metadata(text) if text else {}
+
+def _convert(convert, value):
+    if value is None or isinstance(value, (dict, list)):
+        return None
+    try:
+        return convert(value)
+    except (TypeError, ValueError):
+        return None
+
+TAG_MAX_LENGTH = 50
+
+def normalize_tags(value):
+    """Distinct tags, in order and as typed, from a list or comma-separated string.
+
+    Raises ValueError for a tag longer than TAG_MAX_LENGTH.
+    """
+    if isinstance(value, str):
+        value = value.split(",")
+    tags = []
+    for tag in value or []:
+        tag = str(tag).strip()
+        if len(tag) > TAG_MAX_LENGTH:
+            raise ValueError(f"tags must be at most {TAG_MAX_LENGTH} characters")
+        if tag and tag not in tags:
+            tags.append(tag)
+    return tags
+
+@event.listens_for(Session, "before_flush")
+def _rank_new_items(session, flush_context, instances):
+    # One MAX per user (off idx_user_rank), then keys in insertion order
+    unranked = {}
+    for obj in session.new:
+        if isinstance(obj, SavedItem) and obj.custom_rank is None and obj.user_id is not None:
+            unranked.setdefault(obj.user_id, []).append(obj)
+    for user_id, items in unranked.items():
+        last = session.execute(
+            select(func.max(SavedItem.custom_rank)).where(SavedItem.user_id == user_id)
+        ).scalar()
+        for item in items:
+            item.custom_rank = last = key_between(last, None)
+
+class SavedItemTag(db.Model):
+    __tablename__ = "saved_item_tags"
+    id = db.Column(db.Integer, primary_key=True)
+    item_id = db.Column(db.Integer, db.ForeignKey("saved_items.id", ondelete="CASCADE"), nullable=False)
+    # Copied from the item so tag lookups and counts never touch saved_items
+    user_id = db.Column(db.Integer, db.ForeignKey("users.id"), nullable=False)
+    # New tags are limited to TAG_MAX_LENGTH; the column is as wide as the old
+    # comma-separated one so migrated tags are kept whole
+    tag = db.Column(db.String(255), nullable=False)
+    
+    __table_args__ = (
+        db.UniqueConstraint('item_id', 'tag', name='uq_saved_item_tag'),
+        db.Index('idx_user_tag', 'user_id', 'tag', 'item_id'),
+    )
+
+@event.listens_for(SavedItemTag, "before_insert")
+def _tag_owner(mapper, connection, target):
+    # Tags set before the item's user_id was known
+    if target.user_id is None:
+        target.user_id = target.item.user_id
+
 class SavedRoute(db.Model):
     __tablename__ = "saved_routes"
     id = db.Column(db.Integer, primary_key=True)
@@ -72,6 +208,9 @@ class SavedRoute(db.Model):
     start_location_id = db.Column(db.Integer, db.ForeignKey("locations.id"))
     end_location_id = db.Column(db.Integer, db.ForeignKey("locations.id"))
     route_data = db.Column(db.Text)  # JSON string storing route steps
+    profile = db.Column(db.String(20))  # Routing profile the route was computed for
+    k = db.Column(db.Integer, default=1)  # Number of alternatives requested
+    graph_version = db.Column(db.Integer)  # "graph" data version route_data was computed against
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     last_used = db.Column(db.DateTime)
     use_count = db.Column(db.Integer, default=0)
@@ -102,6 +241,12 @@ class UserRecentSearches(db.Model):
     resolved_location_id = db.Column(db.Integer, db.ForeignKey("locations.id"))
     timestamp = db.Column(db.DateTime, default=datetime.utcnow)
     
+    # One row per term (re-searching bumps the timestamp); newest-first per user
+    __table_args__ = (
+        db.UniqueConstraint('user_id', 'search_term', name='uq_user_search_term'),
+        db.Index('idx_user_search_time', 'user_id', 'timestamp'),
+    )
+    
     # Relationships
     user = db.relationship("User", backref="recent_searches")
     location = db.relationship("Location", backref="recent_searches")
@@ -152,6 +297,21 @@ class StudentIncidentReport(db.Model):
     photo_url = db.Column(db.String(500))
     status = db.Column(db.String(20), default="new")   
 
+class RouteClosure(db.Model):
+    """A path (start_id/end_id) or a location (location_id) closed to routing until expires_at."""
+    __tablename__ = "route_closures"
+    id = db.Column(db.Integer, primary_key=True)
+    start_id = db.Column(db.Integer, db.ForeignKey("locations.id"))
+    end_id = db.Column(db.Integer, db.ForeignKey("locations.id"))
+    location_id = db.Column(db.Integer, db.ForeignKey("locations.id"))
+    reason = db.Column(db.String(200))
+    created_by = db.Column(db.String(200))
+    alert_id = db.Column(db.Integer, db.ForeignKey("alerts.id"))
+    lat = db.Column(db.Float)
+    lng = db.Column(db.Float)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow, nullable=False)
+    expires_at = db.Column(db.DateTime, nullable=False, index=True)
+
 class FacultyUser(db.Model):
     __tablename__ = "faculty_users"
     id = db.Column(db.Integer, primary_key=True)
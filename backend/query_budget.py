@@ -0,0 +1,90 @@
+"""Query counting for spotting N+1 loads.
+
+``QueryCounter`` counts the SQL statements run by the current thread while
+it is active. ``assert_max_queries`` wraps it for tests, and the
+``query_budget`` view decorator checks every request against a budget,
+logging or raising according to ``QUERY_BUDGET_MODE``.
+
+    with assert_max_queries(2):
+        client.get("/api/saved-items/?user_id=1")
+"""
+import functools
+import logging
+import threading
+from contextlib import contextmanager
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from config import QUERY_BUDGET_MODE
+
+logger = logging.getLogger(__name__)
+
+_local = threading.local()
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+@event.listens_for(Engine, "before_cursor_execute")
+def _count_statement(conn, cursor, statement, parameters, context, executemany):
+    for counter in getattr(_local, "counters", ()):
+        counter.count += 1
+        if len(counter.statements) < counter.keep:
+            counter.statements.append(statement)
+
+
+class QueryCounter:
+    """Counts statements executed by this thread inside the ``with`` block."""
+
+    def __init__(self, keep=20):
+        self.count = 0
+        self.statements = []    # the first ``keep`` statements, for messages
+        self.keep = keep
+
+    def __enter__(self):
+        if not hasattr(_local, "counters"):
+            _local.counters = []
+        _local.counters.append(self)
+        return self
+
+    def __exit__(self, *exc_info):
+        _local.counters.remove(self)
+        return False
+
+    def report(self, budget, label):
+        shown = "\n".join(f"  {s.splitlines()[0][:200]}" for s in self.statements)
+        return f"{label} ran {self.count} queries (budget {budget}):\n{shown}"
+
+
+@contextmanager
+def assert_max_queries(budget, label="block"):
+    """Raise ``QueryBudgetExceeded`` if the block runs more than ``budget`` queries."""
+    with QueryCounter() as counter:
+        yield counter
+    if counter.count > budget:
+        raise QueryBudgetExceeded(counter.report(budget, label))
+
+
+def query_budget(budget, mode=None):
+    """Check a view against ``budget`` queries per request.
+
+    ``mode`` overrides ``QUERY_BUDGET_MODE`` for this view.
+    """
+    def decorator(view):
+        @functools.wraps(view)
+        def wrapper(*args, **kwargs):
+            active = mode or QUERY_BUDGET_MODE
+            if active == "off":
+                return view(*args, **kwargs)
+            with QueryCounter() as counter:
+                response = view(*args, **kwargs)
+            if counter.count > budget:
+                message = counter.report(budget, view.__name__)
+                if active == "raise":
+                    raise QueryBudgetExceeded(message)
+                logger.warning(message)
+            return response
+        return wrapper
+    return decorator
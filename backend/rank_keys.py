@@ -0,0 +1,79 @@
+"""Lexicographic rank keys for drag-and-drop ordering.
+
+A key is a string of base-36 digits read as a fraction (``"i"`` is 0.5),
+so sorting keys as plain strings sorts the items. There is always a key
+strictly between two others, so moving an item only rewrites that item's
+key and nothing is ever renumbered. Keys never end in ``"0"``, which keeps
+that true.
+
+The digits are ``0-9`` then ``a-z`` only: with no upper case, the database
+sorts keys the same way Python does under binary and case-insensitive
+collations alike.
+"""
+DIGITS = "0123456789abcdefghijklmnopqrstuvwxyz"
+BASE = len(DIGITS)
+_VALUE = {digit: i for i, digit in enumerate(DIGITS)}
+
+
+def _midpoint(a, b):
+    """A key between ``a`` ("" for the start) and ``b`` (None for the end)."""
+    if b is not None:
+        # Shared leading digits (a is padded with zeros) stay as they are
+        n = 0
+        while n < len(b) and (a[n] if n < len(a) else "0") == b[n]:
+            n += 1
+        if n:
+            return b[:n] + _midpoint(a[n:], b[n:])
+
+    low = _VALUE[a[0]] if a else 0
+    high = _VALUE[b[0]] if b is not None else BASE
+    if high - low > 1:
+        return DIGITS[(low + high) // 2]
+    # Adjacent first digits: b's first digit alone is between, if b is longer
+    if b is not None and len(b) > 1:
+        return b[0]
+    return DIGITS[low] + _midpoint(a[1:], None)
+
+
+def key_between(before=None, after=None):
+    """A key sorting after ``before`` and before ``after`` (None: no bound).
+
+    Appending and prepending step one digit instead of halving, so a list
+    built by adding to either end grows its keys by one character per
+    ~18 items. Raises ValueError unless ``before < after``.
+    """
+    for key in (before, after):
+        if key is not None and (not key or key[-1] == "0" or any(d not in _VALUE for d in key)):
+            raise ValueError(f"invalid rank key {key!r}")
+    if before is not None and after is not None and before >= after:
+        raise ValueError(f"rank keys out of order: {before!r} >= {after!r}")
+
+    if before is None and after is None:
+        return DIGITS[BASE // 2]
+    if after is None:
+        if before[0] != DIGITS[-1]:
+            return DIGITS[_VALUE[before[0]] + 1]
+        return before[0] + key_between(before[1:] or None, None)
+    if before is None:
+        first = _VALUE[after[0]]
+        if first > 1:
+            return DIGITS[first - 1]
+        if first == 1:
+            return "0" + key_between(None, None)
+        return "0" + key_between(None, after[1:])
+    return _midpoint(before, after)
+
+
+def spread_keys(count):
+    """``count`` increasing keys of equal length, evenly spaced."""
+    width = 1
+    while BASE ** width <= count:
+        width += 1
+    keys = []
+    for i in range(1, count + 1):
+        value, digits = i * BASE ** width // (count + 1), []
+        for _ in range(width):
+            value, digit = divmod(value, BASE)
+            digits.append(DIGITS[digit])
+        keys.append("".join(reversed(digits)).rstrip("0"))
+    return keys
@@ -0,0 +1,111 @@
+"""Bounded per-user recent-search history.
+
+Recording a search writes one row on the unique (user, term) pair, so a
+term searched again only moves to the top. Histories are trimmed to
+``RECENT_SEARCH_LIMIT`` rows per user by ``compact`` rather than on every
+write; ``start_compaction`` runs it periodically in a daemon thread so the
+tables stay the same size however long the system runs.
+"""
+import logging
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+
+from db import db
+from models import UserRecentSearches
+from routes.maps import RecentSearch
+from config import RECENT_SEARCH_LIMIT
+
+logger = logging.getLogger(__name__)
+_compaction_lock = threading.Lock()
+
+# Dialects with INSERT ... ON CONFLICT ... RETURNING
+UPSERT_INSERTS = {"sqlite": sqlite.insert, "postgresql": postgresql.insert}
+
+# model -> (user column, term column, time column)
+HISTORIES = {
+    UserRecentSearches: ("user_id", "search_term", "timestamp"),
+    RecentSearch: ("user_id", "destination", "timestamp"),
+}
+
+
+def record_search(model, user_id, term, **values):
+    """Insert or refresh ``term`` in the user's history.
+
+    ``values`` are extra columns to set (on insert and on refresh). Returns
+    the row id.
+    """
+    user_col, term_col, time_col = HISTORIES[model]
+    table = model.__table__
+    values = {**values, time_col: datetime.utcnow()}
+    key = {user_col: user_id, term_col: term}
+
+    insert = UPSERT_INSERTS.get(db.session.get_bind().dialect.name)
+    if insert is not None:
+        stmt = insert(table).values(**key, **values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[user_col, term_col],
+            set_={column: stmt.excluded[column] for column in values},
+        )
+        return db.session.execute(stmt.returning(table.c.id)).scalar_one()
+
+    # Other databases: look the row up first
+    row = model.query.filter_by(**key).first()
+    if row is None:
+        row = model(**key)
+        db.session.add(row)
+    for column, value in values.items():
+        setattr(row, column, value)
+    db.session.flush()
+    return row.id
+
+
+def compact(limit=RECENT_SEARCH_LIMIT):
+    """Delete everything but each user's newest ``limit`` searches.
+
+    Returns the number of rows removed.
+    """
+    removed = 0
+    for model, (user_col, _, time_col) in HISTORIES.items():
+        table = model.__table__
+        ranked = select(
+            table.c.id,
+            func.row_number().over(
+                partition_by=table.c[user_col],
+                order_by=(table.c[time_col].desc(), table.c.id.desc())
+            ).label("position")
+        ).subquery()
+        stale = select(ranked.c.id).where(ranked.c.position > limit)
+        removed += db.session.execute(delete(table).where(table.c.id.in_(stale))).rowcount
+    db.session.commit()
+    return removed
+
+
+def start_compaction(app, interval):
+    """Run ``compact`` every ``interval`` seconds in a daemon thread.
+
+    Starts one thread per app however often it is called; returns it.
+    """
+    with _compaction_lock:
+        thread = app.extensions.get("recent_search_compaction")
+        if thread is not None:
+            return thread
+
+        def run():
+            while True:
+                time.sleep(interval)
+                try:
+                    with app.app_context():
+                        removed = compact()
+                    if removed:
+                        logger.info("Trimmed %d old recent searches", removed)
+                except Exception:
+                    logger.exception("Recent-search compaction failed")
+
+        thread = threading.Thread(target=run, name="recent-search-compaction", daemon=True)
+        thread.start()
+        app.extensions["recent_search_compaction"] = thread
+        return thread
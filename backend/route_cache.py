@@ -0,0 +1,96 @@
+"""Bounded LRU cache for computed route responses.
+
+Keys include the graph version, so editing a path or location makes every
+older entry unreachable; those entries then age out through normal LRU
+eviction. Size is tracked as the length of each value's JSON encoding,
+which is close to what the entry costs to hold and to send.
+
+Entries can carry tags (for example the edges a route uses); ``invalidate``
+drops every entry holding one of the given tags, so a closure only evicts
+the routes it actually affects.
+"""
+import json
+import threading
+from collections import OrderedDict
+
+
+class RouteCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()   # key -> (value, size, tags)
+        self._tagged = {}               # tag -> {keys}
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        """Return the cached value for ``key`` (marking it recent) or None."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, tags=()):
+        size = len(json.dumps(value, default=str))
+        if size > self.max_bytes:
+            return
+        tags = frozenset(tags)
+        with self._lock:
+            self._remove(key)
+            self._entries[key] = (value, size, tags)
+            self._bytes += size
+            for tag in tags:
+                self._tagged.setdefault(tag, set()).add(key)
+            while self._bytes > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def invalidate(self, tags):
+        """Drop every entry tagged with any of ``tags``; returns the count."""
+        with self._lock:
+            keys = set()
+            for tag in tags:
+                keys.update(self._tagged.get(tag, ()))
+            for key in keys:
+                self._remove(key)
+            self.invalidations += len(keys)
+            return len(keys)
+
+    def _remove(self, key):
+        entry = self._entries.pop(key, None)
+        if entry is None:
+            return
+        _, size, tags = entry
+        self._bytes -= size
+        for tag in tags:
+            keys = self._tagged[tag]
+            keys.discard(key)
+            if not keys:
+                del self._tagged[tag]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._tagged.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
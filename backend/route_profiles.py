@@ -0,0 +1,45 @@
+"""Edge weights for each UserPreferences.route_preference.
+
+Every profile turns a path's length and attributes into a routing cost in
+the same unit as ``Path.distance``, so costs stay comparable and the A*
+heuristic keeps working. ``INF`` removes a path from a profile entirely.
+"""
+from graph_engine import INF
+
+PROFILES = ("shortest", "fastest", "accessible")
+DEFAULT_PROFILE = "shortest"
+
+# Steepest grade (percent) an accessible route may use: 1:12 ramp
+MAX_ACCESSIBLE_SLOPE = 8.33
+
+# Extra distance-equivalent cost of waiting for an elevator
+ELEVATOR_WAIT = 30.0
+
+
+def shortest_weight(distance, stairs, elevator, indoor, slope):
+    return distance
+
+
+def fastest_weight(distance, stairs, elevator, indoor, slope):
+    weight = distance
+    if stairs:
+        weight *= 2.0           # climbing is roughly half walking speed
+    if elevator:
+        weight += ELEVATOR_WAIT
+    if indoor:
+        weight *= 1.1           # corridors, doors and crowds
+    return weight * (1 + abs(slope) / 20)
+
+
+def accessible_weight(distance, stairs, elevator, indoor, slope):
+    if stairs or abs(slope) > MAX_ACCESSIBLE_SLOPE:
+        return INF
+    weight = distance + (ELEVATOR_WAIT if elevator else 0.0)
+    return weight * (1 + abs(slope) / 10)
+
+
+PROFILE_WEIGHTS = {
+    "shortest": shortest_weight,
+    "fastest": fastest_weight,
+    "accessible": accessible_weight,
+}
@@ -1,6 +1,12 @@
 from flask import Blueprint, request, jsonify
 from db import db
 from models import Alert, AlertRecipient, StudentIncidentReport, User, SavedItem
+from query_budget import query_budget
+from closures import closures_near
+from spatial_index import to_xy
+from routes.directions import graph_cache
+from routes.closures import closure_expiry
+from config import CLOSURE_RADIUS
 
 alerts_bp = Blueprint("alerts", __name__, url_prefix="/api/alerts")
 
@@ -10,17 +16,12 @@ def _pick_recipients(audience_type, semester=None):
         if not semester:
             return []
 
-        fragment = f'"semester": "{semester}"'
-        users = (
-            db.session.query(User)
-            .join(SavedItem, SavedItem.user_id == User.id)
-            .filter(
-                SavedItem.item_type == "course",
-                SavedItem.item_metadata.contains(fragment),
-            )
-            .distinct()
-            .all()
+        # Answered from idx_type_semester alone, then users by primary key
+        enrolled = db.session.query(SavedItem.user_id).filter(
+            SavedItem.item_type == "course",
+            SavedItem.semester == semester,
         )
+        users = User.query.filter(User.id.in_(enrolled)).all()
         return [{"user_id": u.id, "user_email": u.email} for u in users]
     return [{"user_id": u.id, "user_email": u.email} for u in User.query.all()]
 
@@ -56,14 +57,43 @@ def create_alert_from_report(report_id):
         for r in recipients
     ])
 
+    # Optionally close the paths (or locations) around the incident
+    closure_count = 0
+    if data.get("close_route") and report.lat is not None and report.lng is not None:
+        try:
+            expires_at = closure_expiry(data)
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({"error": str(e)}), 400
+        try:
+            radius = float(data.get("radius") or CLOSURE_RADIUS)
+        except (TypeError, ValueError):
+            db.session.rollback()
+            return jsonify({"error": "invalid radius"}), 400
+        target = "locations" if data.get("target") == "locations" else "paths"
+        graph, _ = graph_cache.get()
+        x, y = to_xy(report.lat, report.lng)
+        closures = closures_near(
+            graph, x, y, radius, target,
+            reason=alert.title, created_by=alert.created_by, alert_id=alert.id,
+            lat=report.lat, lng=report.lng, expires_at=expires_at
+        )
+        db.session.add_all(closures)
+        closure_count = len(closures)
+
     # Remove the original incident from the queue
     db.session.delete(report)
     db.session.commit()
 
-    return jsonify({"alert_id": alert.id, "recipient_count": len(recipients)}), 201
+    return jsonify({
+        "alert_id": alert.id,
+        "recipient_count": len(recipients),
+        "closure_count": closure_count
+    }), 201
 
 # Return list of recipients for chosen alert 
 @alerts_bp.get("/<int:alert_id>/recipients")
+@query_budget(2)
 def list_alert_recipients(alert_id):
     recips = AlertRecipient.query.filter_by(alert_id=alert_id).all()
     return jsonify([{
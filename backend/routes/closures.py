@@ -0,0 +1,127 @@
+from flask import Blueprint, request, jsonify
+from datetime import datetime, timedelta, timezone
+from db import db
+from models import RouteClosure, StudentIncidentReport
+from query_budget import query_budget
+from closures import closures_near
+from spatial_index import read_point, to_xy
+from routes.directions import graph_cache
+from config import CLOSURE_RADIUS, CLOSURE_DEFAULT_MINUTES
+
+closures_bp = Blueprint("closures", __name__, url_prefix="/api/closures")
+
+
+def _closure_json(c):
+    return {
+        "id": c.id,
+        "start_id": c.start_id,
+        "end_id": c.end_id,
+        "location_id": c.location_id,
+        "reason": c.reason,
+        "created_by": c.created_by,
+        "alert_id": c.alert_id,
+        "lat": c.lat,
+        "lng": c.lng,
+        "created_at": c.created_at.isoformat() if c.created_at else None,
+        "expires_at": c.expires_at.isoformat()
+    }
+
+
+def closure_expiry(data):
+    """``expires_at`` (ISO) or ``minutes`` from now, else the default duration.
+
+    Returns naive UTC, like the stored timestamps. Raises ValueError with a
+    message for the client if the value is unreadable or not in the future.
+    """
+    try:
+        if data.get("expires_at"):
+            expires_at = datetime.fromisoformat(str(data["expires_at"]).replace("Z", "+00:00"))
+            if expires_at.tzinfo is not None:
+                expires_at = expires_at.astimezone(timezone.utc).replace(tzinfo=None)
+        else:
+            minutes = float(data.get("minutes") or CLOSURE_DEFAULT_MINUTES)
+            expires_at = datetime.utcnow() + timedelta(minutes=minutes)
+    except (TypeError, ValueError, OverflowError):
+        raise ValueError("invalid expires_at or minutes")
+    if expires_at <= datetime.utcnow():
+        raise ValueError("expires_at must be in the future")
+    return expires_at
+
+
+# Close paths/locations, listed explicitly or found around an incident position
+@closures_bp.post("/")
+def create_closures():
+    data = request.get_json(silent=True) or {}
+
+    try:
+        expires_at = closure_expiry(data)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    try:
+        radius = float(data.get("radius") or CLOSURE_RADIUS)
+        edges = [(int(a), int(b)) for a, b in data.get("edges") or []]
+        location_ids = [int(i) for i in data.get("locations") or []]
+        point = read_point(data)
+        position = None
+        if data.get("lat") is not None and data.get("lng") is not None:
+            position = {"lat": float(data["lat"]), "lng": float(data["lng"])}
+    except (TypeError, ValueError):
+        return jsonify({"error": "invalid radius, edges, locations or coordinates"}), 400
+
+    fields = {
+        "reason": data.get("reason"),
+        "created_by": data.get("created_by"),
+        "alert_id": data.get("alert_id"),
+        "expires_at": expires_at
+    }
+
+    # An incident report supplies the position (and reason) when given
+    if data.get("report_id"):
+        report = StudentIncidentReport.query.get_or_404(data["report_id"])
+        if report.lat is None or report.lng is None:
+            return jsonify({"error": "report has no position"}), 400
+        point = to_xy(report.lat, report.lng)
+        fields.update(lat=report.lat, lng=report.lng, reason=fields["reason"] or report.title)
+    elif position is not None:
+        fields.update(position)
+
+    closures = [RouteClosure(start_id=a, end_id=b, **fields) for a, b in edges]
+    closures += [RouteClosure(location_id=i, **fields) for i in location_ids]
+    if point is not None:
+        target = data.get("target") or "paths"
+        if target not in ("paths", "locations"):
+            return jsonify({"error": "target must be paths or locations"}), 400
+        graph, _ = graph_cache.get()
+        closures += closures_near(graph, point[0], point[1], radius, target, **fields)
+
+    if not closures:
+        return jsonify({"error": "nothing to close: give edges, locations, a position or report_id"}), 400
+
+    db.session.add_all(closures)
+    db.session.flush()
+    # Serialized before commit expires the rows (which would reload each one)
+    result = [_closure_json(c) for c in closures]
+    db.session.commit()
+
+    return jsonify({"closures": result, "count": len(result)}), 201
+
+
+# Active closures (all=1 includes expired ones), soonest to expire first
+@closures_bp.get("/")
+@query_budget(2)
+def list_closures():
+    query = RouteClosure.query
+    if request.args.get("all") != "1":
+        query = query.filter(RouteClosure.expires_at > datetime.utcnow())
+    closures = query.order_by(RouteClosure.expires_at.asc(), RouteClosure.id.asc()).all()
+    return jsonify([_closure_json(c) for c in closures])
+
+
+# Reopen a closed path or location
+@closures_bp.delete("/<int:closure_id>")
+def delete_closure(closure_id):
+    closure = RouteClosure.query.get_or_404(closure_id)
+    db.session.delete(closure)
+    db.session.commit()
+    return jsonify({"message": "Closure removed"})
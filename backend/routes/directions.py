@@ -1,151 +1,558 @@
 from flask import Blueprint, request, jsonify
-from models import Location, Path
-from sqlalchemy import and_
-import heapq
-from collections import defaultdict, deque
+from models import Path, UserPreferences, UserScheduleEntries
+from db import db
+from data_versions import GRAPH, VersionedCache
+from graph_engine import CSRGraph, k_shortest_paths, tree_path
+from contraction import HierarchyIndex
+from route_cache import RouteCache
+from closures import ClosureInvalidator, get_active_closures, route_tags
+from location_cache import get_locations, get_spatial_index
+from spatial_index import read_point
+from route_profiles import DEFAULT_PROFILE, PROFILES, PROFILE_WEIGHTS
+from config import ROUTE_INDEX_PATH, ROUTE_CACHE_MAX_BYTES, WALKING_SPEED_PER_MINUTE
+from datetime import datetime, timedelta
+import math
 
 directions_bp = Blueprint("directions", __name__)
 
+MAX_ROUTES = 20
+MAX_BATCH_PAIRS = 500
+ALGORITHMS = ("ch", "dijkstra", "astar")
+
 # ----------------------------------------------------------
 #  Graph Helpers
 # ----------------------------------------------------------
 
 def build_graph():
-    """Load all paths from DB and return adjacency list."""
-    graph = defaultdict(list)
-    paths = Path.query.all()
-
-    for p in paths:
-        graph[p.start_id].append((p.end_id, p.distance))
-        graph[p.end_id].append((p.start_id, p.distance))   # undirected
-    return graph
+    """Load all paths (and location coordinates) from DB into a CSR graph.
+
+    Edge weights for every routing profile are computed here, once per
+    graph version, and exposed as ``graph.profiles[name]``.
+    """
+    paths = db.session.query(
+        Path.start_id, Path.end_id, Path.distance,
+        Path.stairs, Path.elevator, Path.indoor, Path.slope
+    )
+    coords = {loc.id: (loc.x, loc.y) for loc in get_locations().values()}
+    return CSRGraph.from_edges(paths, coords, PROFILE_WEIGHTS)
+
+
+# Built once per process and rebuilt only when paths/locations change
+graph_cache = VersionedCache(GRAPH, build_graph)
+
+def get_graph(profile=DEFAULT_PROFILE):
+    """Return the cached graph (weighted for ``profile``) for the current version."""
+    graph, _ = graph_cache.get()
+    return graph.profiles[profile]
+
+def request_profile(values=None):
+    """Pick the routing profile: ``profile``, else the user's preference.
+
+    ``values`` defaults to the query string. Returns ``(profile, error)``.
+    """
+    values = request.args if values is None else values
+    profile = values.get("profile")
+    if profile is not None:
+        if profile not in PROFILES:
+            return None, f"profile must be one of {', '.join(PROFILES)}"
+        return profile, None
+
+    try:
+        user_id = int(values.get("user_id") or 0)
+    except (TypeError, ValueError):
+        user_id = 0
+    if user_id:
+        preference = db.session.query(UserPreferences.route_preference).filter_by(user_id=user_id).scalar()
+        if preference in PROFILES:
+            return preference, None
+    return DEFAULT_PROFILE, None
+
+# Contraction hierarchy for the cached graph, rebuilt in the background
+route_index = HierarchyIndex(ROUTE_INDEX_PATH)
+
+# Finished responses keyed by (start, end, k, algorithm, profile, graph version) and
+# tagged with the edges/nodes they use, so closures evict only what they hit
+route_cache = RouteCache(ROUTE_CACHE_MAX_BYTES)
+closure_invalidator = ClosureInvalidator(route_cache)
+
+def current_closures():
+    """Active closures, after dropping the cached routes their changes affect."""
+    closures = get_active_closures()
+    closure_invalidator.sync(closures)
+    return closures
+
+def cached_routes(key, closures, compute, paths):
+    """Return ``(value, cached)`` for ``key`` from the route cache.
+
+    ``compute()`` builds the value and ``paths(value)`` lists its location-id
+    paths. An entry is stored with the closures it was computed under and is
+    only served while it crosses none of ``closures`` and all of those are
+    still in force: a closure created while another request was computing
+    would otherwise be invalidated before that request's put.
+    """
+    entry = route_cache.get(key)
+    if entry is not None:
+        value, computed_under = entry
+        if set(computed_under) <= closures.tags.keys() and not any(closures.crosses(p) for p in paths(value)):
+            return value, True
+
+    value = compute()
+    tags = closures.cache_tags()
+    for path in paths(value):
+        tags |= route_tags(path)
+    route_cache.put(key, (value, sorted(closures.tags)), tags)
+    return value, False
+
+def _search_for(graph, algorithm):
+    # "ch" only answers the first path; Yen's spur searches need masks
+    return graph.astar_search if algorithm == "astar" else graph.search
 
 def dijkstra(graph, start, end):
-    """Return shortest path using Dijkstra."""
-    pq = [(0, start, [])]
-    visited = set()
+    """Return (cost, path of location ids) for the shortest route."""
+    return shortest_route(graph, start, end, "dijkstra")
 
-    while pq:
-        cost, node, path = heapq.heappop(pq)
+def astar(graph, start, end):
+    """Same as dijkstra, guided by straight-line distance to the end."""
+    return shortest_route(graph, start, end, "astar")
 
-        if node in visited:
-            continue
-        visited.add(node)
+def shortest_route(graph, start, end, algorithm="dijkstra"):
+    source = graph.index.get(start)
+    target = graph.index.get(end)
+    if source is None or target is None:
+        return float("inf"), []
 
-        new_path = path + [node]
+    path, costs = _search_for(graph, algorithm)(source, target)
+    if not path:
+        return float("inf"), []
+    return costs[-1], graph.to_ids(path)
 
-        if node == end:
-            return cost, new_path
 
-        for neighbor, w in graph[node]:
-            if neighbor not in visited:
-                heapq.heappush(pq, (cost + w, neighbor, new_path))
+def _crosses(graph, path, banned_edges, banned_nodes):
+    if any(node in banned_nodes for node in path):
+        return True
+    return any(set(graph.half_edges(a, b)) <= banned_edges for a, b in zip(path, path[1:]))
 
-    return float("inf"), []
 
+def yen_k_shortest_paths(graph, start, end, k=3, algorithm="dijkstra", hierarchy=None, closures=None):
+    """Return top-k shortest paths between start and end.
 
-def yen_k_shortest_paths(graph, start, end, k=3):
-    """Return top-k shortest paths between start and end."""
-    # First shortest path
-    cost, path = dijkstra(graph, start, end)
-    if not path:
+    With a contraction ``hierarchy`` the first path comes from its
+    bidirectional search and only the alternatives run a full search.
+    ``closures`` are applied as a mask; the hierarchy ignores them, so its
+    path is only used when it avoids every closure.
+    """
+    source = graph.index.get(start)
+    target = graph.index.get(end)
+    if source is None or target is None:
         return []
 
-    routes = [(cost, path)]
-    candidates = []
+    banned_edges, banned_nodes = closures.mask(graph) if closures else (set(), set())
+    first = hierarchy.search(source, target) if hierarchy is not None else None
+    if first is not None and _crosses(graph, first[0], banned_edges, banned_nodes):
+        first = None
+    routes = k_shortest_paths(graph, source, target, k, _search_for(graph, algorithm), first,
+                              banned_edges, banned_nodes)
+    return [(cost, graph.to_ids(path)) for cost, path in routes]
 
-    for i in range(1, k):
-        prev_cost, prev_path = routes[-1]
 
-        for j in range(len(prev_path) - 1):
-            spur_node = prev_path[j]
-            root_path = prev_path[: j + 1]
+def path_to_steps(node_list, locs=None):
+    """Convert list of location IDs into readable steps.
 
-            removed_edges = []
+    Names come from the cached location table (``locs``), not the DB.
+    """
+    if locs is None:
+        locs = get_locations()
+    steps = []
 
-            # Remove edges that conflict with the root path
-            for cost_r, path_r in routes:
-                if len(path_r) > j and root_path == path_r[: j + 1]:
-                    u = path_r[j]
-                    v = path_r[j + 1]
+    for i in range(len(node_list)):
+        loc = locs[node_list[i]]
+        if i == 0:
+            steps.append(f"Start at {loc.name}")
+        else:
+            steps.append(f"Walk to {loc.name}")
 
-                    # Remove edge u->v
-                    for idx, (nbr, w) in enumerate(graph[u]):
-                        if nbr == v:
-                            removed_edges.append((u, (nbr, w), idx))
-                            graph[u].pop(idx)
-                            break
+    return steps
 
-            # Spur path
-            spur_cost, spur_path = dijkstra(graph, spur_node, end)
 
-            if spur_path:
-                total_cost = spur_cost + sum(
-                    graph[root_path[n]][root_path[n + 1]][0]
-                    for n in range(len(root_path) - 1)
-                )
-                full_path = root_path[:-1] + spur_path
+def _turn_hint(heading, new_heading):
+    """Describe the change of direction between two headings (radians)."""
+    delta = math.degrees((new_heading - heading + math.pi) % (2 * math.pi) - math.pi)
+    if abs(delta) < 30:
+        return "straight"
+    if abs(delta) > 150:
+        return "turn around"
+    # Headings are measured with y pointing up, so positive is a left turn
+    return "turn left" if delta > 0 else "turn right"
+
+
+def path_to_legs(graph, path, locs=None):
+    """Per-leg details for a dense ``path`` on ``graph``.
+
+    Distances come from the in-memory graph and turn hints from the cached
+    location coordinates, so this costs no queries.
+    """
+    if locs is None:
+        locs = get_locations()
+    legs = []
+    heading = None
+
+    for a, b in zip(path, path[1:]):
+        start, end = locs.get(graph.node_ids[a]), locs.get(graph.node_ids[b])
+        leg = {
+            "from": graph.node_ids[a],
+            "to": graph.node_ids[b],
+            "name": end.name if end else None,
+            "distance": graph.path_distance([a, b]),
+            "turn": None
+        }
+        if start and end and None not in (start.x, start.y, end.x, end.y) and (start.x, start.y) != (end.x, end.y):
+            new_heading = math.atan2(end.y - start.y, end.x - start.x)
+            if heading is not None:
+                leg["turn"] = _turn_hint(heading, new_heading)
+            heading = new_heading
+        else:
+            heading = None
+        legs.append(leg)
 
-                candidates.append((total_cost, full_path))
+    return legs
 
-            # Restore edges
-            for u, edge, idx in removed_edges:
-                graph[u].insert(idx, edge)
 
-        if not candidates:
-            break
+# ----------------------------------------------------------
+#  ROUTE ENDPOINT — returns the top k (default 3) best routes
+# ----------------------------------------------------------
 
-        # Pick shortest candidate
-        candidates.sort(key=lambda x: x[0])
-        routes.append(candidates.pop(0))
+def build_route_payload(graph, graph_version, start_id, end_id, k, algorithm, profile=DEFAULT_PROFILE,
+                        closures=None):
+    """Compute the top-k routes and the JSON body returned for them."""
+    # The hierarchy is built on plain distances, so it only serves "shortest";
+    # fall back to Dijkstra for other profiles or while it is (re)building
+    hierarchy = None
+    if algorithm == "ch":
+        if profile == DEFAULT_PROFILE:
+            hierarchy = route_index.get(graph, graph_version)
+        if hierarchy is None:
+            algorithm = "dijkstra"
+
+    weighted = graph.profiles[profile]
+    results = yen_k_shortest_paths(weighted, start_id, end_id, k=k, algorithm=algorithm,
+                                   hierarchy=hierarchy, closures=closures)
+
+    # All k routes share one in-memory location table: no per-route queries
+    locs = get_locations()
+    output = []
+    for cost, path in results:
+        dense = [graph.index[node] for node in path]
+        output.append({
+            "distance": weighted.path_distance(dense),
+            "cost": cost,
+            "path": path,
+            "steps": path_to_steps(path, locs),
+            "legs": path_to_legs(weighted, dense, locs)
+        })
 
-    return routes[:k]
+    return {
+        "routes": output,
+        "count": len(output),
+        "algorithm": algorithm,
+        "profile": profile,
+        "closures": len(closures) if closures else 0
+    }
 
 
-def path_to_steps(node_list):
-    """Convert list of location IDs into readable steps."""
-    locs = {loc.id: loc for loc in Location.query.filter(Location.id.in_(node_list))}
-    steps = []
+def snap_to_graph(graph, x, y):
+    """Id of the location nearest to (x, y) that has at least one path."""
+    def on_graph(loc_id):
+        i = graph.index.get(loc_id)
+        return i is not None and graph.offsets[i + 1] > graph.offsets[i]
 
-    for i in range(len(node_list)):
-        loc = locs[node_list[i]]
-        if i == 0:
-            steps.append(f"Start at {loc.name}")
-        else:
-            steps.append(f"Walk to {loc.name}")
+    hits = get_spatial_index().nearest(x, y, 1, on_graph)
+    return hits[0][1] if hits else None
 
-    return steps
 
+def request_endpoint(graph, name):
+    """Location id for ``name`` (start/end), snapping raw coordinates if given.
+
+    Returns ``(location id or None, snapped)``; raises ValueError for
+    coordinates that are not numbers.
+    """
+    loc_id = request.args.get(name, type=int)
+    if loc_id:
+        return loc_id, False
+    point = read_point(request.args, f"{name}_")
+    if point is None:
+        return None, False
+    return snap_to_graph(graph, *point), True
 
-# ----------------------------------------------------------
-#  ROUTE ENDPOINT — returns top 3 best routes
-# ----------------------------------------------------------
 
 @directions_bp.route("/", methods=["GET"])
 def compute_route():
 
-    start_id = request.args.get("start", type=int)
-    end_id = request.args.get("end", type=int)
+    k = min(max(request.args.get("k", 3, type=int), 1), MAX_ROUTES)
+    algorithm = request.args.get("algorithm", "ch")
+
+    graph, graph_version = graph_cache.get()
+    try:
+        start_id, start_snapped = request_endpoint(graph, "start")
+        end_id, end_snapped = request_endpoint(graph, "end")
+    except ValueError:
+        return jsonify({"error": "coordinates must be numbers"}), 400
 
     if not start_id or not end_id:
-        return jsonify({"error": "start and end are required"}), 400
+        return jsonify({"error": "start and end (ids or coordinates) are required"}), 400
 
     if start_id == end_id:
         return jsonify({"error": "start and end cannot be the same"}), 400
 
-    graph = build_graph()
-    results = yen_k_shortest_paths(graph, start_id, end_id, k=3)
+    if algorithm not in ALGORITHMS:
+        return jsonify({"error": f"algorithm must be one of {', '.join(ALGORITHMS)}"}), 400
+
+    profile, error = request_profile()
+    if error:
+        return jsonify({"error": error}), 400
+
+    closures = current_closures()
+    # The payload reports the algorithm that built it, so it is part of the key
+    key = (start_id, end_id, k, algorithm, profile, graph_version)
+    payload, cached = cached_routes(
+        key, closures,
+        lambda: build_route_payload(graph, graph_version, start_id, end_id, k, algorithm, profile, closures),
+        lambda payload: [route["path"] for route in payload["routes"]],
+    )
+
+    extra = {"cached": cached}
+    if start_snapped or end_snapped:
+        extra["snapped"] = {"start": start_id, "end": end_id}
+    return jsonify({**payload, **extra})
+
+
+@directions_bp.route("/cache-stats", methods=["GET"])
+def route_cache_stats():
+    return jsonify(route_cache.stats())
+
+
+# ----------------------------------------------------------
+#  REACHABLE ENDPOINT — every location within a distance budget
+# ----------------------------------------------------------
+
+@directions_bp.route("/reachable", methods=["GET"])
+def reachable_locations():
+    start_id = request.args.get("start", type=int)
+    budget = request.args.get("budget", type=float)
+
+    if not start_id or budget is None or budget < 0:
+        return jsonify({"error": "start and a non-negative budget are required"}), 400
+
+    profile, error = request_profile()
+    if error:
+        return jsonify({"error": error}), 400
+
+    graph = get_graph(profile)
+    source = graph.index.get(start_id)
+    if source is None:
+        return jsonify({"error": "start is not on the campus graph"}), 404
+
+    # One bounded search replaces a route call per candidate destination
+    banned_edges, banned_nodes = current_closures().mask(graph)
+    dist, _ = graph.shortest_path_tree(source, budget=budget,
+                                       banned_edges=banned_edges, banned_nodes=banned_nodes)
+    reached = {graph.node_ids[i]: d for i, d in enumerate(dist) if d <= budget}
+    locs = get_locations()
+
+    output = sorted(
+        ({"id": loc.id, "name": loc.name, "x": loc.x, "y": loc.y, "distance": reached[loc.id]}
+         for loc in (locs.get(loc_id) for loc_id in reached) if loc is not None),
+        key=lambda r: (r["distance"], r["id"])
+    )
+    return jsonify({
+        "start": start_id,
+        "budget": budget,
+        "profile": profile,
+        "locations": output,
+        "count": len(output)
+    })
+
+# ----------------------------------------------------------
+#  BATCH ENDPOINT — one shortest-path tree per distinct origin
+# ----------------------------------------------------------
+
+def routes_from_origins(graph, by_origin, closures=None):
+    """Shortest routes for ``{start id: {end ids}}``, one search per origin.
+
+    Returns ``{(start, end): (cost, distance, path of ids)}`` for every
+    pair that is connected once ``closures`` are masked out.
+    """
+    banned_edges, banned_nodes = closures.mask(graph) if closures else ((), ())
+    found = {}
+    for start_id, end_ids in by_origin.items():
+        source = graph.index.get(start_id)
+        targets = {graph.index[e] for e in end_ids if e in graph.index}
+        if source is None or not targets:
+            continue
+        dist, pred = graph.shortest_path_tree(source, targets, banned_edges=banned_edges, banned_nodes=banned_nodes)
+        for end_id in end_ids:
+            if end_id in graph.index:
+                path, costs = tree_path(dist, pred, graph.index[end_id])
+                if path:
+                    found[(start_id, end_id)] = (costs[-1], graph.path_distance(path), graph.to_ids(path))
+    return found
+
+
+def _batch_pairs(data):
+    """Return [(start, end)] from {"pairs": [...]} or {"start", "ends"}."""
+    if "pairs" in data:
+        return [(int(p["start"]), int(p["end"])) for p in data["pairs"]]
+    return [(int(data["start"]), int(end)) for end in data["ends"]]
+
+
+@directions_bp.route("/batch", methods=["POST"])
+def compute_batch_routes():
+    data = request.get_json(silent=True) or {}
+
+    try:
+        pairs = _batch_pairs(data)
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "send pairs: [{start, end}, ...] or start with ends: [...]"}), 400
+
+    if not pairs:
+        return jsonify({"error": "at least one pair is required"}), 400
+    if len(pairs) > MAX_BATCH_PAIRS:
+        return jsonify({"error": f"at most {MAX_BATCH_PAIRS} pairs per request"}), 400
+
+    profile, error = request_profile(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    graph = get_graph(profile)
+
+    # Group destinations by origin so each origin is searched once
+    by_origin = {}
+    for start_id, end_id in pairs:
+        by_origin.setdefault(start_id, set()).add(end_id)
+
+    found = routes_from_origins(graph, by_origin, current_closures())
+    locs = get_locations()
 
     output = []
-    for cost, path in results:
-        steps = path_to_steps(path)
-        output.append({
-            "distance": cost,
-            "path": path,
-            "steps": steps
-        })
+    for start_id, end_id in pairs:
+        route = {"start": start_id, "end": end_id}
+        if (start_id, end_id) in found:
+            cost, distance, path = found[(start_id, end_id)]
+            route.update(distance=distance, cost=cost, path=path, steps=path_to_steps(path, locs))
+        else:
+            route.update(distance=None, cost=None, path=[], steps=[])
+        output.append(route)
 
     return jsonify({
         "routes": output,
-        "count": len(output)
+        "count": len(output),
+        "profile": profile
+    })
+
+
+
+# ----------------------------------------------------------
+#  ITINERARY ENDPOINT — walking plan between a day's classes
+# ----------------------------------------------------------
+
+def distance_matrix(graph, graph_version, profile, location_ids):
+    """All-pairs routes between ``location_ids``, cached per graph version.
+
+    Returns ``{(start, end): (cost, distance, path)}``. A day's buildings
+    are searched once each, however many legs use them.
+    """
+    ids = frozenset(location_ids)
+    closures = current_closures()
+    key = ("matrix", ids, profile, graph_version)
+
+    def compute():
+        found = routes_from_origins(graph, {start: set(ids) for start in ids}, closures)
+        return [[a, b, cost, distance, path] for (a, b), (cost, distance, path) in found.items()]
+
+    rows, _ = cached_routes(key, closures, compute, lambda rows: [row[4] for row in rows])
+    return {(a, b): (cost, distance, path) for a, b, cost, distance, path in rows}
+
+
+def _minutes(delta):
+    return delta.total_seconds() / 60
+
+
+@directions_bp.route("/itinerary", methods=["GET"])
+def day_itinerary():
+    user_id = request.args.get("user_id", type=int)
+    day = request.args.get("date")
+
+    if not user_id:
+        return jsonify({"error": "user_id required"}), 400
+
+    try:
+        day_start = datetime.fromisoformat(day) if day else datetime.utcnow()
+    except ValueError:
+        return jsonify({"error": "date must be YYYY-MM-DD"}), 400
+    day_start = day_start.replace(hour=0, minute=0, second=0, microsecond=0)
+
+    profile, error = request_profile()
+    if error:
+        return jsonify({"error": error}), 400
+
+    entries = UserScheduleEntries.query.filter(
+        UserScheduleEntries.user_id == user_id,
+        UserScheduleEntries.event_start_time >= day_start,
+        UserScheduleEntries.event_start_time < day_start + timedelta(days=1)
+    ).order_by(UserScheduleEntries.event_start_time.asc()).all()
+
+    locs = get_locations()
+    places = [locs.find(entry.building_name) for entry in entries]
+
+    graph, graph_version = graph_cache.get()
+    weighted = graph.profiles[profile]
+    matrix = distance_matrix(weighted, graph_version, profile, {p.id for p in places if p})
+
+    legs = []
+    for (entry, place), (next_entry, next_place) in zip(zip(entries, places), zip(entries[1:], places[1:])):
+        gap = _minutes(next_entry.event_start_time - entry.event_end_time)
+        leg = {
+            "from_entry_id": entry.id,
+            "to_entry_id": next_entry.id,
+            "from_building": entry.building_name,
+            "to_building": next_entry.building_name,
+            "gap_minutes": gap,
+            "distance": None,
+            "walk_minutes": None,
+            "path": [],
+            "steps": [],
+            "feasible": False
+        }
+
+        if place is None or next_place is None:
+            leg["reason"] = "building not found on the campus map"
+        elif place.id == next_place.id:
+            leg.update(distance=0.0, walk_minutes=0.0, path=[place.id],
+                       steps=path_to_steps([place.id], locs), feasible=gap >= 0)
+        elif (place.id, next_place.id) in matrix:
+            _, distance, path = matrix[(place.id, next_place.id)]
+            walk = distance / WALKING_SPEED_PER_MINUTE
+            leg.update(distance=distance, walk_minutes=walk, path=path,
+                       steps=path_to_steps(path, locs), feasible=walk <= gap)
+        else:
+            leg["reason"] = "no walking route between these buildings"
+
+        if not leg["feasible"] and "reason" not in leg:
+            leg["reason"] = "not enough time to walk between classes"
+        legs.append(leg)
+
+    return jsonify({
+        "user_id": user_id,
+        "date": day_start.date().isoformat(),
+        "profile": profile,
+        "entries": [{
+            "id": entry.id,
+            "course_name": entry.course_name,
+            "building_name": entry.building_name,
+            "room_number": entry.room_number,
+            "location_id": place.id if place else None,
+            "event_start_time": entry.event_start_time.isoformat(),
+            "event_end_time": entry.event_end_time.isoformat()
+        } for entry, place in zip(entries, places)],
+        "legs": legs,
+        "infeasible_count": sum(1 for leg in legs if not leg["feasible"])
     })
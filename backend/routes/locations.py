@@ -1,12 +1,100 @@
-from flask import Blueprint, jsonify
-from models import Location
+from flask import Blueprint, Response, jsonify, request
+from location_cache import get_listing, get_locations, get_spatial_index
+from spatial_index import read_point
+from cursors import decode_cursor, encode_cursor
+from bisect import bisect_right
+import hashlib
+import json
 
 locations_bp = Blueprint("locations", __name__)
 
+MAX_NEAREST = 50
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 1000
+
+
+def _send_json(body, etag, gzipped=None):
+    """Send a pre-serialized body, or 304 if the client already has it."""
+    if request.if_none_match.contains_weak(etag):
+        response = Response(status=304)
+    elif gzipped is not None and request.accept_encodings["gzip"]:
+        response = Response(gzipped, mimetype="application/json")
+        response.headers["Content-Encoding"] = "gzip"
+    else:
+        response = Response(body, mimetype="application/json")
+    # Weak: the gzipped and plain bodies are the same representation
+    response.set_etag(etag, weak=True)
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+def _bbox(value):
+    """``min_x,min_y,max_x,max_y`` -> tuple of floats; raises ValueError."""
+    parts = [float(v) for v in value.split(",")]
+    if len(parts) != 4 or parts[0] > parts[2] or parts[1] > parts[3]:
+        raise ValueError("bbox must be min_x,min_y,max_x,max_y")
+    return tuple(parts)
+
+
+# All locations, served from a cached blob; optional bbox filter and
+# cursor pagination (limit/cursor) for large maps
 @locations_bp.route("/", methods=["GET"])
 def list_locations():
-    locations = Location.query.all()
-    return jsonify([
-        {"id": loc.id, "name": loc.name, "x": loc.x, "y": loc.y}
-        for loc in locations
-    ])
+    listing = get_listing()
+    bbox = request.args.get("bbox")
+    limit = request.args.get("limit", type=int)
+    cursor = request.args.get("cursor")
+
+    if bbox is None and limit is None and cursor is None:
+        return _send_json(listing.body, listing.etag, listing.gzipped)
+
+    try:
+        box = _bbox(bbox) if bbox is not None else None
+        after = int(decode_cursor(cursor)["after"]) if cursor else None
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "invalid bbox or cursor"}), 400
+
+    # The page is fully determined by the table and the query string
+    etag = hashlib.sha256(f"{listing.etag}?{request.query_string.decode()}".encode()).hexdigest()[:32]
+    if request.if_none_match.contains_weak(etag):
+        return _send_json(b"", etag)
+
+    locs = get_locations()
+    ids = sorted(get_spatial_index().in_box(*box) if box else locs)
+    if after is not None:
+        ids = ids[bisect_right(ids, after):]
+    limit = min(max(limit or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE)
+    page = ids[:limit]
+
+    body = json.dumps({
+        "locations": [locs[i]._asdict() for i in page],
+        "next_cursor": encode_cursor({"after": page[-1]}) if len(ids) > limit else None
+    }, separators=(",", ":")).encode()
+    return _send_json(body, etag)
+
+# Nearest locations to a point given as x/y or lat/lng
+@locations_bp.route("/nearest", methods=["GET"])
+def nearest_locations():
+    try:
+        point = read_point(request.args)
+    except ValueError:
+        return jsonify({"error": "coordinates must be numbers"}), 400
+    if point is None:
+        return jsonify({"error": "x and y (or lat and lng) are required"}), 400
+
+    k = min(max(request.args.get("k", 5, type=int), 1), MAX_NEAREST)
+    locs = get_locations()
+    hits = get_spatial_index().nearest(point[0], point[1], k)
+
+    return jsonify({
+        "x": point[0],
+        "y": point[1],
+        "locations": [{
+            "id": loc_id,
+            "name": locs[loc_id].name,
+            "x": locs[loc_id].x,
+            "y": locs[loc_id].y,
+            "distance": distance
+        } for distance, loc_id in hits]
+    })
@@ -1,5 +1,8 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, redirect, request, send_file, url_for
 from db import db
+from blob_store import BlobStore
+from query_budget import query_budget
+from config import FLOOR_PLAN_DIR, FLOOR_PLAN_MAX_BYTES
 
 maps_bp = Blueprint("maps_bp", __name__)
 
@@ -8,7 +11,10 @@ class Building(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     map_url = db.Column(db.String(255))
-    floor_plan = db.Column(db.Text)
+    floor_plan = db.Column(db.Text)  # Legacy inline floor plan, moved to the blob store on first request
+    floor_plan_hash = db.Column(db.String(64), index=True)  # sha256 of the blob in FLOOR_PLAN_DIR
+    floor_plan_type = db.Column(db.String(100))
+    floor_plan_size = db.Column(db.Integer)
 
 class RecentSearch(db.Model):
     __tablename__ = "recent_searches"
@@ -17,13 +23,121 @@ class RecentSearch(db.Model):
     destination = db.Column(db.String(100))
     timestamp = db.Column(db.DateTime, server_default=db.func.now())
 
+    __table_args__ = (
+        db.UniqueConstraint("user_id", "destination", name="uq_recent_user_destination"),
+        db.Index("idx_recent_user_time", "user_id", "timestamp"),
+    )
+
+floor_plans = BlobStore(FLOOR_PLAN_DIR)
+
+# Blobs never change under a digest, so clients may keep them for a year
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+
+def _floor_plan_url(building_id, digest):
+    if digest:
+        return url_for("maps_bp.get_floor_plan_blob", digest=digest)
+    return url_for("maps_bp.get_building_floor_plan", building_id=building_id)
+
+
+def _legacy_type(text):
+    head = text.lstrip()[:100].lower()
+    if head.startswith(("{", "[")):
+        return "application/json"
+    if head.startswith("<svg") or (head.startswith("<?xml") and "<svg" in text[:1000].lower()):
+        return "image/svg+xml"
+    return "text/plain; charset=utf-8"
+
+
+def store_floor_plan(building, data, content_type):
+    """Put ``data`` in the blob store and point ``building`` at it (not committed)."""
+    building.floor_plan_hash = floor_plans.put(data)
+    building.floor_plan_type = content_type
+    building.floor_plan_size = len(data)
+    building.floor_plan = None
+
+
+# Lightweight building index: floor plans are only linked, never inlined
 @maps_bp.route("/buildings", methods=["GET"])
+@query_budget(2)
 def get_buildings():
-    buildings = Building.query.all()
-    result = [{"id": b.id, "name": b.name, "map_url": b.map_url, "floor_plan": b.floor_plan} for b in buildings]
+    rows = db.session.query(
+        Building.id, Building.name, Building.map_url, Building.floor_plan_hash,
+        Building.floor_plan_size, Building.floor_plan.isnot(None).label("has_legacy_plan")
+    ).order_by(Building.id)
+    result = [{
+        "id": b.id,
+        "name": b.name,
+        "map_url": b.map_url,
+        "has_floor_plan": bool(b.floor_plan_hash or b.has_legacy_plan),
+        "floor_plan_url": _floor_plan_url(b.id, b.floor_plan_hash) if (b.floor_plan_hash or b.has_legacy_plan) else None,
+        "floor_plan_size": b.floor_plan_size
+    } for b in rows]
     return jsonify(result)
 
+
+# Redirect to the content-addressed floor plan of a building
+@maps_bp.route("/buildings/<int:building_id>/floor-plan", methods=["GET"])
+def get_building_floor_plan(building_id):
+    building = Building.query.get_or_404(building_id)
+    if not building.floor_plan_hash and building.floor_plan:
+        store_floor_plan(building, building.floor_plan.encode("utf-8"), _legacy_type(building.floor_plan))
+        db.session.commit()
+    if not building.floor_plan_hash:
+        return jsonify({"error": "building has no floor plan"}), 404
+
+    response = redirect(_floor_plan_url(building.id, building.floor_plan_hash))
+    response.headers["Cache-Control"] = "no-cache"
+    return response
+
+
+# Upload a floor plan (raw request body, any content type)
+@maps_bp.route("/buildings/<int:building_id>/floor-plan", methods=["PUT"])
+def put_building_floor_plan(building_id):
+    building = Building.query.get_or_404(building_id)
+    if request.content_length and request.content_length > FLOOR_PLAN_MAX_BYTES:
+        return jsonify({"error": "floor plan too large"}), 413
+    data = request.get_data()
+    if not data:
+        return jsonify({"error": "request body is empty"}), 400
+    if len(data) > FLOOR_PLAN_MAX_BYTES:
+        return jsonify({"error": "floor plan too large"}), 413
+
+    store_floor_plan(building, data, request.content_type or "application/octet-stream")
+    db.session.commit()
+    return jsonify({
+        "hash": building.floor_plan_hash,
+        "size": building.floor_plan_size,
+        "floor_plan_url": _floor_plan_url(building.id, building.floor_plan_hash)
+    })
+
+
+# Floor-plan blob by digest: gzipped when accepted, ranges served from the raw file
+@maps_bp.route("/floor-plans/<digest>", methods=["GET"])
+def get_floor_plan_blob(digest):
+    if not floor_plans.exists(digest):
+        return jsonify({"error": "floor plan not found"}), 404
+    content_type = db.session.query(Building.floor_plan_type).filter(
+        Building.floor_plan_hash == digest
+    ).limit(1).scalar() or "application/octet-stream"
+
+    # Byte ranges refer to the raw file, so never gzip a range request
+    gzipped = "Range" not in request.headers and bool(request.accept_encodings["gzip"])
+    response = send_file(
+        floor_plans.path(digest, gzipped),
+        mimetype=content_type,
+        etag=f"{digest}-gz" if gzipped else digest,
+        conditional=True,
+        max_age=31536000
+    )
+    if gzipped:
+        response.headers["Content-Encoding"] = "gzip"
+    response.headers["Vary"] = "Accept-Encoding"
+    response.headers["Cache-Control"] = IMMUTABLE
+    return response
+
 @maps_bp.route("/recent-searches/<int:user_id>", methods=["GET"])
+@query_budget(2)
 def get_recent_searches(user_id):
     searches = RecentSearch.query.filter_by(user_id=user_id).order_by(RecentSearch.timestamp.desc()).limit(10).all()
     result = [{"destination": s.destination, "timestamp": s.timestamp} for s in searches]
@@ -32,7 +146,8 @@ def get_recent_searches(user_id):
 @maps_bp.route("/recent-searches", methods=["POST"])
 def add_recent_search():
     data = request.json
-    new_search = RecentSearch(user_id=data["user_id"], destination=data["destination"])
-    db.session.add(new_search)
+    # Imported here: recent_history needs the models defined above
+    from recent_history import record_search
+    record_search(RecentSearch, data["user_id"], data["destination"])
     db.session.commit()
     return jsonify({"message": "Recent search added!"}), 201
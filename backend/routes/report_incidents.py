@@ -2,6 +2,7 @@ from flask import Blueprint, request, jsonify
 from datetime import datetime
 from db import db
 from models import StudentIncidentReport
+from query_budget import query_budget
 
 report_incidents_bp = Blueprint("report_incidents", __name__, url_prefix="/api/report-incidents")
 
@@ -46,6 +47,7 @@ def create_report_student():
 
 #Return a list of all incident reports by newest to oldest 
 @report_incidents_bp.get("/")
+@query_budget(2)
 def list_reports():
     reports = StudentIncidentReport.query.order_by(StudentIncidentReport.created_at.desc()).all()
     return jsonify([{
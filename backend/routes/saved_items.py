@@ -1,43 +1,156 @@
 from flask import Blueprint, request, jsonify
-from models import SavedItem, User, Location
+from models import SavedItem, SavedItemTag, User, Location, METADATA_COLUMNS, normalize_tags
 from db import db
-from sqlalchemy import or_, and_, func
+from sqlalchemy import or_, and_, case, func, tuple_, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import joinedload, lazyload
+from query_budget import query_budget
+from cursors import decode_cursor, encode_cursor
+from rank_keys import key_between
+from datetime import datetime
 import json
 
 saved_items_bp = Blueprint("saved_items", __name__)
 
-# Get all saved items with sorting options
+# sort_by -> column. Each has a (user_id, column) index, and SQLite stores the
+# rowid (id) in every index entry, so seeking on (column, id) stays indexed
+SORT_COLUMNS = {
+    "name": SavedItem.name,
+    "professor": SavedItem.professor_name,
+    "course_code": SavedItem.course_code,
+    "created_at": SavedItem.created_at,
+    "custom": SavedItem.custom_order,
+    "rank": SavedItem.custom_rank,
+}
+DEFAULT_PAGE_SIZE = 50
+# Tries at committing a rank key before giving up on a concurrent writer
+RANK_ATTEMPTS = 3
+MAX_PAGE_SIZE = 200
+
+def _sort_value(item, sort_by):
+    value = getattr(item, SORT_COLUMNS[sort_by].key)
+    return value.isoformat() if sort_by == "created_at" and value is not None else value
+
+def _segments_after(column, value, item_id, descending):
+    """Filters for the rows after (value, id), in page order; NULLs sort lowest.
+
+    Each filter is a plain range on (column, id), so every query seeks the
+    index; NULLs are fetched as a separate segment instead of an OR.
+    """
+    if descending:
+        if value is None:
+            return [and_(column.is_(None), SavedItem.id < item_id)]
+        return [tuple_(column, SavedItem.id) < tuple_(value, item_id), column.is_(None)]
+    if value is None:
+        return [and_(column.is_(None), SavedItem.id > item_id), column.isnot(None)]
+    return [tuple_(column, SavedItem.id) > tuple_(value, item_id)]
+
+def _commit_ranked(items):
+    """Commit new ``items``, giving them fresh rank keys if another request
+    committed the same ones first (idx_user_rank is unique)."""
+    for attempt in range(RANK_ATTEMPTS):
+        try:
+            db.session.commit()
+            return
+        except IntegrityError:
+            db.session.rollback()
+            if attempt == RANK_ATTEMPTS - 1:
+                raise
+            # The rollback expunged them; _rank_new_items ranks them again
+            for item in items:
+                item.custom_rank = None
+                db.session.add(item)
+
+def _tagged_item_ids(user_id, tags, mode):
+    """Ids of the user's items with any (or all) of ``tags``, from idx_user_tag alone."""
+    ids = db.session.query(SavedItemTag.item_id).filter(
+        SavedItemTag.user_id == user_id,
+        SavedItemTag.tag.in_(tags)
+    )
+    if mode == "all":
+        ids = ids.group_by(SavedItemTag.item_id).having(func.count() == len(tags))
+    return ids
+
+# Get all saved items with sorting options; limit/cursor return one page.
+# tags=a,b keeps items with any of the tags (tag_mode=all: every one of them);
+# promoted metadata keys filter too, e.g. semester=Fall 2024&credits=3
 @saved_items_bp.route("/", methods=["GET"])
+@query_budget(4)
 def get_saved_items():
     user_id = request.args.get("user_id", type=int)
-    sort_by = request.args.get("sort_by", "name")  # name, professor, course_code, created_at, custom
+    sort_by = request.args.get("sort_by", "name")  # name, professor, course_code, created_at, custom, rank
     order = request.args.get("order", "asc")  # asc or desc
     item_type = request.args.get("type")  # Optional filter by type
+    limit = request.args.get("limit", type=int)
+    cursor = request.args.get("cursor")
+    tag_mode = request.args.get("tag_mode", "any")
     
     if not user_id:
         return jsonify({"error": "user_id required"}), 400
     
-    query = SavedItem.query.filter_by(user_id=user_id)
+    try:
+        tags = normalize_tags(request.args.get("tags"))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    
+    if tag_mode not in ("any", "all"):
+        return jsonify({"error": "tag_mode must be any or all"}), 400
+    
+    if sort_by not in SORT_COLUMNS:
+        sort_by, order = "name", "asc"
+    descending = order == "desc"
+    column = SORT_COLUMNS[sort_by]
+    
+    # Locations are joined in, not lazy-loaded once per item
+    query = SavedItem.query.options(joinedload(SavedItem.location)).filter_by(user_id=user_id)
     
     # Filter by type if provided
     if item_type:
         query = query.filter_by(item_type=item_type)
     
-    # Sorting logic
-    if sort_by == "name":
-        query = query.order_by(SavedItem.name.asc() if order == "asc" else SavedItem.name.desc())
-    elif sort_by == "professor":
-        query = query.order_by(SavedItem.professor_name.asc() if order == "asc" else SavedItem.professor_name.desc())
-    elif sort_by == "course_code":
-        query = query.order_by(SavedItem.course_code.asc() if order == "asc" else SavedItem.course_code.desc())
-    elif sort_by == "created_at":
-        query = query.order_by(SavedItem.created_at.desc() if order == "desc" else SavedItem.created_at.asc())
-    elif sort_by == "custom":
-        query = query.order_by(SavedItem.custom_order.asc() if order == "asc" else SavedItem.custom_order.desc())
+    if tags:
+        query = query.filter(SavedItem.id.in_(_tagged_item_ids(user_id, tags, tag_mode)))
+    
+    for name, (attribute, convert) in METADATA_COLUMNS.items():
+        if name in request.args:
+            try:
+                value = convert(request.args[name])
+            except ValueError:
+                return jsonify({"error": f"invalid {name}"}), 400
+            query = query.filter(getattr(SavedItem, attribute) == value)
+    
+    # Sorting logic, with id breaking ties so pages never overlap
+    if descending:
+        query = query.order_by(column.desc().nulls_last(), SavedItem.id.desc())
     else:
-        query = query.order_by(SavedItem.name.asc())
+        query = query.order_by(column.asc().nulls_first(), SavedItem.id.asc())
+    
+    paginated = limit is not None or cursor is not None
+    segments = [None]
+    if cursor:
+        try:
+            position = decode_cursor(cursor)
+            if position["sort_by"] != sort_by or position["order"] != order:
+                raise ValueError("cursor is for another sort order")
+            value = position["value"]
+            if sort_by == "created_at" and value is not None:
+                value = datetime.fromisoformat(value)
+            segments = _segments_after(column, value, int(position["id"]), descending)
+        except (KeyError, TypeError, ValueError):
+            return jsonify({"error": "invalid cursor for this sort_by/order"}), 400
     
-    items = query.all()
+    if paginated:
+        limit = min(max(limit or DEFAULT_PAGE_SIZE, 1), MAX_PAGE_SIZE)
+        items = []
+        for segment in segments:
+            part = query if segment is None else query.filter(segment)
+            items += part.limit(limit + 1 - len(items)).all()
+            if len(items) > limit:
+                break
+        has_more = len(items) > limit
+        items = items[:limit]
+    else:
+        items = query.all()
     
     result = []
     for item in items:
@@ -50,7 +163,7 @@ def get_saved_items():
             "room_number": item.room_number,
             "location_id": item.location_id,
             "created_at": item.created_at.isoformat() if item.created_at else None,
-            "tags": item.tags.split(",") if item.tags else []
+            "tags": item.tags
         }
         if item.location:
             item_data["location"] = {
@@ -60,12 +173,19 @@ def get_saved_items():
                 "y": item.location.y
             }
         if item.item_metadata:
-            try:
-                item_data["metadata"] = json.loads(item.item_metadata)
-            except:
-                item_data["metadata"] = {}
+            item_data["metadata"] = item.parsed_metadata
         result.append(item_data)
     
+    if paginated:
+        last = items[-1] if items else None
+        next_cursor = encode_cursor({
+            "sort_by": sort_by,
+            "order": order,
+            "value": _sort_value(last, sort_by),
+            "id": last.id
+        }) if has_more else None
+        return jsonify({"items": result, "next_cursor": next_cursor})
+    
     return jsonify(result)
 
 # Save a new item
@@ -77,20 +197,23 @@ def save_item():
     if not user_id:
         return jsonify({"error": "user_id required"}), 400
     
-    new_item = SavedItem(
-        user_id=user_id,
-        item_type=data.get("item_type", "location"),
-        name=data.get("name"),
-        professor_name=data.get("professor_name"),
-        course_code=data.get("course_code"),
-        location_id=data.get("location_id"),
-        room_number=data.get("room_number"),
-        tags=",".join(data.get("tags", [])) if isinstance(data.get("tags"), list) else data.get("tags", ""),
-        item_metadata=json.dumps(data.get("metadata", {}))
-    )
+    try:
+        new_item = SavedItem(
+            user_id=user_id,
+            item_type=data.get("item_type", "location"),
+            name=data.get("name"),
+            professor_name=data.get("professor_name"),
+            course_code=data.get("course_code"),
+            location_id=data.get("location_id"),
+            room_number=data.get("room_number"),
+            tags=data.get("tags", []),
+            item_metadata=json.dumps(data.get("metadata", {}))
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
     
     db.session.add(new_item)
-    db.session.commit()
+    _commit_ranked([new_item])
     
     return jsonify({"message": "Item saved", "id": new_item.id}), 201
 
@@ -109,7 +232,11 @@ def update_item(item_id):
     if "custom_order" in data:
         item.custom_order = data["custom_order"]
     if "tags" in data:
-        item.tags = ",".join(data["tags"]) if isinstance(data["tags"], list) else data["tags"]
+        try:
+            item.tags = data["tags"]
+        except ValueError as e:
+            db.session.rollback()
+            return jsonify({"error": str(e)}), 400
     if "location_id" in data:
         item.location_id = data["location_id"]
     if "room_number" in data:
@@ -138,13 +265,90 @@ def reorder_items():
     if not user_id or not item_orders:
         return jsonify({"error": "user_id and orders required"}), 400
     
-    for item_order in item_orders:
-        item = SavedItem.query.filter_by(id=item_order["id"], user_id=user_id).first()
-        if item:
-            item.custom_order = item_order["order"]
+    try:
+        orders = {int(o["id"]): int(o["order"]) for o in item_orders}
+    except (KeyError, TypeError, ValueError):
+        return jsonify({"error": "orders must be a list of {id, order} integers"}), 400
     
+    # One UPDATE ... SET custom_order = CASE id ... for the whole list
+    result = db.session.execute(
+        update(SavedItem)
+        .where(SavedItem.user_id == user_id, SavedItem.id.in_(orders))
+        .values(custom_order=case(orders, value=SavedItem.id))
+        .execution_options(synchronize_session=False)
+    )
     db.session.commit()
-    return jsonify({"message": "Items reordered"})
+    return jsonify({"message": "Items reordered", "updated": result.rowcount})
+
+# Move one item between two neighbours (sort_by=rank); only that row is written.
+# Give after_id and/or before_id: the items it should follow and precede
+@saved_items_bp.route("/<int:item_id>/move", methods=["PUT"])
+def move_item(item_id):
+    data = request.get_json(silent=True) or {}
+    after_id, before_id = data.get("after_id"), data.get("before_id")
+    
+    if after_id is None and before_id is None:
+        return jsonify({"error": "after_id or before_id required"}), 400
+    
+    # A concurrent move can commit the same key first; idx_user_rank is unique,
+    # so this commit then fails and the neighbours are read again
+    for _ in range(RANK_ATTEMPTS):
+        item = SavedItem.query.options(lazyload(SavedItem.tag_rows)).get_or_404(item_id)
+        
+        # Ranks only: loading whole items would also load their tags
+        others = SavedItem.query.with_entities(SavedItem.custom_rank).filter(
+            SavedItem.user_id == item.user_id, SavedItem.id != item.id
+        )
+        neighbours = {}
+        for key, neighbour_id in (("after", after_id), ("before", before_id)):
+            if neighbour_id is None:
+                continue
+            rank = others.filter(SavedItem.id == neighbour_id).first()
+            if rank is None:
+                return jsonify({"error": f"{key}_id must be another of the user's items"}), 400
+            neighbours[key] = rank.custom_rank
+        
+        # Only one side given: the other is its current neighbour, looked up by index
+        if "before" not in neighbours:
+            neighbours["before"] = others.filter(SavedItem.custom_rank > neighbours["after"]) \
+                .order_by(SavedItem.custom_rank.asc()).limit(1).scalar()
+        elif "after" not in neighbours:
+            neighbours["after"] = others.filter(SavedItem.custom_rank < neighbours["before"]) \
+                .order_by(SavedItem.custom_rank.desc()).limit(1).scalar()
+        
+        try:
+            rank = key_between(neighbours["after"], neighbours["before"])
+        except ValueError:
+            return jsonify({"error": "after_id must come before before_id"}), 409
+        # Another item already moved to this spot: go just ahead of it instead
+        while others.filter(SavedItem.custom_rank == rank).first() is not None:
+            rank = key_between(neighbours["after"], rank)
+        
+        item.custom_rank = rank
+        try:
+            db.session.commit()
+        except IntegrityError:
+            db.session.rollback()
+            continue
+        return jsonify({"message": "Item moved", "custom_rank": rank})
+    
+    return jsonify({"error": "item was moved concurrently, try again"}), 409
+
+# How many of the user's items carry each tag, most used first
+@saved_items_bp.route("/tags", methods=["GET"])
+@query_budget(1)
+def get_tag_counts():
+    user_id = request.args.get("user_id", type=int)
+    
+    if not user_id:
+        return jsonify({"error": "user_id required"}), 400
+    
+    count = func.count().label("count")
+    rows = db.session.query(SavedItemTag.tag, count).filter(
+        SavedItemTag.user_id == user_id
+    ).group_by(SavedItemTag.tag).order_by(count.desc(), SavedItemTag.tag.asc()).all()
+    
+    return jsonify([{"tag": tag, "count": n} for tag, n in rows])
 
 # Get sorting options available
 @saved_items_bp.route("/sort-options", methods=["GET"])
@@ -155,6 +359,7 @@ def get_sort_options():
             {"value": "professor", "label": "Professor Name"},
             {"value": "course_code", "label": "Course Code"},
             {"value": "created_at", "label": "Date Created"},
-            {"value": "custom", "label": "Custom Order"}
+            {"value": "custom", "label": "Custom Order"},
+            {"value": "rank", "label": "Drag-and-Drop Order"}
         ]
     })
@@ -0,0 +1,137 @@
+from flask import Blueprint, request, jsonify
+from models import SavedRoute
+from db import db
+from routes.directions import graph_cache, build_route_payload, current_closures, request_profile, MAX_ROUTES
+from query_budget import query_budget
+from route_profiles import DEFAULT_PROFILE
+from usage_counter import UsageCounter
+from config import USAGE_FLUSH_BATCH, USAGE_FLUSH_SECONDS
+from datetime import datetime
+import json
+
+saved_routes_bp = Blueprint("saved_routes", __name__)
+
+# use_count/last_used are accumulated here and written in batches
+route_usage = UsageCounter(SavedRoute, USAGE_FLUSH_BATCH, USAGE_FLUSH_SECONDS)
+
+
+def _route_json(route):
+    opens, last_opened = route_usage.pending(route.id)
+    last_used = last_opened or route.last_used
+    return {
+        "id": route.id,
+        "name": route.name,
+        "start_location_id": route.start_location_id,
+        "end_location_id": route.end_location_id,
+        "profile": route.profile or DEFAULT_PROFILE,
+        "k": route.k,
+        "created_at": route.created_at.isoformat() if route.created_at else None,
+        "last_used": last_used.isoformat() if last_used else None,
+        "use_count": (route.use_count or 0) + opens
+    }
+
+
+def _compute(route, graph, graph_version, closures=None):
+    return build_route_payload(
+        graph, graph_version, route.start_location_id, route.end_location_id,
+        route.k or 1, "ch", route.profile or DEFAULT_PROFILE, closures
+    )
+
+
+# Get all saved routes for a user, most recently used first
+@saved_routes_bp.route("/", methods=["GET"])
+@query_budget(2)
+def get_saved_routes():
+    user_id = request.args.get("user_id", type=int)
+    if not user_id:
+        return jsonify({"error": "user_id required"}), 400
+
+    routes = SavedRoute.query.filter_by(user_id=user_id).all()
+    result = sorted((_route_json(r) for r in routes), key=lambda r: (r["last_used"] or "", r["id"]), reverse=True)
+    return jsonify(result)
+
+
+# Save a route; it is computed once here and stored with the graph version
+@saved_routes_bp.route("/", methods=["POST"])
+def save_route():
+    data = request.get_json(silent=True) or {}
+    user_id = data.get("user_id")
+
+    try:
+        start_id = int(data.get("start") or 0)
+        end_id = int(data.get("end") or 0)
+        k = min(max(int(data.get("k") or 1), 1), MAX_ROUTES)
+    except (TypeError, ValueError):
+        return jsonify({"error": "start, end and k must be integers"}), 400
+
+    if not user_id or not start_id or not end_id:
+        return jsonify({"error": "user_id, start and end required"}), 400
+
+    if start_id == end_id:
+        return jsonify({"error": "start and end cannot be the same"}), 400
+
+    profile, error = request_profile(data)
+    if error:
+        return jsonify({"error": error}), 400
+
+    route = SavedRoute(
+        user_id=user_id,
+        name=data.get("name"),
+        start_location_id=start_id,
+        end_location_id=end_id,
+        profile=profile,
+        k=k
+    )
+    graph, graph_version = graph_cache.get()
+    payload = _compute(route, graph, graph_version)
+    route.route_data = json.dumps(payload)
+    route.graph_version = graph_version
+
+    db.session.add(route)
+    db.session.commit()
+
+    return jsonify({"message": "Route saved", "id": route.id, "route": payload}), 201
+
+
+# Open a saved route: stored route_data while the graph is unchanged
+@saved_routes_bp.route("/<int:route_id>", methods=["GET"])
+def open_saved_route(route_id):
+    route = SavedRoute.query.get_or_404(route_id)
+    graph, graph_version = graph_cache.get()
+
+    payload = None
+    if route.route_data and route.graph_version == graph_version:
+        try:
+            payload = json.loads(route.route_data)
+        except ValueError:
+            payload = None
+
+    recomputed = payload is None
+    if recomputed:
+        payload = _compute(route, graph, graph_version)
+        route.route_data = json.dumps(payload)
+        route.graph_version = graph_version
+        db.session.commit()
+
+    # Detour around active closures without overwriting the stored route
+    closures = current_closures()
+    if closures and any(closures.crosses(r["path"]) for r in payload["routes"]):
+        payload = _compute(route, graph, graph_version, closures)
+        recomputed = True
+
+    # Read before record(): a flush it runs would move the pending opens
+    # into the database after this row was loaded
+    body = _route_json(route)
+    now = datetime.utcnow()
+    route_usage.record(route.id, now)
+    body.update(use_count=body["use_count"] + 1, last_used=now.isoformat())
+    return jsonify({**body, "route": payload, "recomputed": recomputed})
+
+
+# Delete a saved route
+@saved_routes_bp.route("/<int:route_id>", methods=["DELETE"])
+def delete_saved_route(route_id):
+    route = SavedRoute.query.get_or_404(route_id)
+    db.session.delete(route)
+    db.session.commit()
+    return jsonify({"message": "Route deleted"})
@@ -0,0 +1,17 @@
+from flask import Blueprint, request, jsonify
+from search_index import MAX_RESULTS, TYPE_RANK, get_search_index
+
+search_bp = Blueprint("search", __name__)
+
+# Suggestions for what has been typed so far (locations, buildings, rooms, courses)
+@search_bp.route("/autocomplete", methods=["GET"])
+def autocomplete():
+    query = request.args.get("q", "")
+    limit = min(max(request.args.get("limit", 10, type=int), 1), MAX_RESULTS)
+    types = {t for t in request.args.get("types", "").split(",") if t}
+
+    if types - set(TYPE_RANK):
+        return jsonify({"error": f"types must be among {', '.join(TYPE_RANK)}"}), 400
+
+    results = get_search_index().search(query, limit, types or None)
+    return jsonify({"query": query, "results": results, "count": len(results)})
@@ -1,9 +1,14 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, Response, request, jsonify, stream_with_context
 from models import (
     User, UserSavedLocations, UserRecentSearches,
     UserScheduleEntries, UserPreferences, Location
 )
 from db import db
+from sqlalchemy.orm import joinedload
+from query_budget import query_budget
+from recent_history import record_search
+from user_transfer import KINDS, export_lines, import_lines
+from config import RECENT_SEARCH_LIMIT
 from datetime import datetime
 import json
 
@@ -12,6 +17,7 @@ user_db_bp = Blueprint("user_db", __name__)
 # ============ User Saved Locations ============
 
 @user_db_bp.route("/saved-locations", methods=["GET"])
+@query_budget(2)
 def get_saved_locations():
     """Get all saved locations for a user"""
     user_id = request.args.get("user_id", type=int)
@@ -91,15 +97,17 @@ def delete_saved_location(location_id):
 # ============ User Recent Searches ============
 
 @user_db_bp.route("/recent-searches", methods=["GET"])
+@query_budget(2)
 def get_recent_searches():
     """Get recent searches for a user (limited to last 10)"""
     user_id = request.args.get("user_id", type=int)
-    limit = request.args.get("limit", 10, type=int)
+    limit = min(request.args.get("limit", 10, type=int), RECENT_SEARCH_LIMIT)
     
     if not user_id:
         return jsonify({"error": "user_id required"}), 400
     
-    searches = UserRecentSearches.query.filter_by(user_id=user_id)\
+    searches = UserRecentSearches.query.options(joinedload(UserRecentSearches.location))\
+        .filter_by(user_id=user_id)\
         .order_by(UserRecentSearches.timestamp.desc())\
         .limit(limit).all()
     
@@ -123,40 +131,25 @@ def get_recent_searches():
 
 @user_db_bp.route("/recent-searches", methods=["POST"])
 def add_recent_search():
-    """Add a new recent search"""
+    """Add a recent search, or move an existing one to the top"""
     data = request.json
     user_id = data.get("user_id")
+    search_term = data.get("search_term")
     
-    if not user_id:
-        return jsonify({"error": "user_id required"}), 400
-    
-    # Check if search already exists for this user
-    existing = UserRecentSearches.query.filter_by(
-        user_id=user_id,
-        search_term=data.get("search_term")
-    ).first()
-    
-    if existing:
-        # Update timestamp
-        existing.timestamp = datetime.utcnow()
-        if "resolved_location_id" in data:
-            existing.resolved_location_id = data["resolved_location_id"]
-        db.session.commit()
-        return jsonify({"message": "Recent search updated", "id": existing.id})
-    
-    new_search = UserRecentSearches(
-        user_id=user_id,
-        search_term=data.get("search_term"),
-        resolved_location_id=data.get("resolved_location_id")
-    )
+    if not user_id or not search_term:
+        return jsonify({"error": "user_id and search_term required"}), 400
     
-    db.session.add(new_search)
+    # Single upsert on (user_id, search_term); history is trimmed in the background
+    values = {}
+    if "resolved_location_id" in data:
+        values["resolved_location_id"] = data["resolved_location_id"]
+    search_id = record_search(UserRecentSearches, user_id, search_term, **values)
     db.session.commit()
     
     return jsonify({
-        "message": "Recent search added",
-        "id": new_search.id
-    }), 201
+        "message": "Recent search saved",
+        "id": search_id
+    })
 
 @user_db_bp.route("/recent-searches/<int:search_id>", methods=["DELETE"])
 def delete_recent_search(search_id):
@@ -169,6 +162,7 @@ def delete_recent_search(search_id):
 # ============ User Schedule Entries ============
 
 @user_db_bp.route("/schedule", methods=["GET"])
+@query_budget(2)
 def get_schedule():
     """Get schedule entries for a user"""
     user_id = request.args.get("user_id", type=int)
@@ -344,3 +338,35 @@ def update_preferences():
     
     return jsonify({"message": "Preferences updated"})
 
+# ============ Export / Import ============
+
+@user_db_bp.route("/export", methods=["GET"])
+def export_user_data():
+    """Stream a user's saved items, locations and schedule as NDJSON"""
+    user_id = request.args.get("user_id", type=int)
+    kinds = request.args.get("kinds", ",".join(KINDS)).split(",")
+    
+    if not user_id:
+        return jsonify({"error": "user_id required"}), 400
+    
+    unknown = [kind for kind in kinds if kind not in KINDS]
+    if unknown:
+        return jsonify({"error": f"unknown kinds: {', '.join(unknown)}", "kinds": list(KINDS)}), 400
+    
+    User.query.get_or_404(user_id)
+    response = Response(stream_with_context(export_lines(user_id, kinds)), mimetype="application/x-ndjson")
+    response.headers["Content-Disposition"] = f"attachment; filename=user-{user_id}.ndjson"
+    return response
+
+@user_db_bp.route("/import", methods=["POST"])
+def import_user_data():
+    """Import an NDJSON upload (as from /export) into a user's data, line by line"""
+    user_id = request.args.get("user_id", type=int)
+    
+    if not user_id:
+        return jsonify({"error": "user_id required"}), 400
+    
+    User.query.get_or_404(user_id)
+    # Read straight from the request body, never buffered whole
+    report = import_lines(request.stream, user_id)
+    return jsonify(report.to_json())
@@ -0,0 +1,325 @@
+"""In-memory autocomplete index over locations, buildings, rooms and courses.
+
+Every entry is split into lower-case word tokens (plus one compact token
+with separators removed, so "LIB-301" also matches "lib301"). A sorted
+token list answers prefix lookups with a bisect, and a trigram index finds
+tokens within a small edit distance of a misspelt word.
+
+Rooms and course codes come from ``SavedItem`` rows; the same code saved by
+many users is a single entry with a reference count.
+
+Writes update the index incrementally: a session hook collects the entries
+added and removed by each flush and applies them after commit. The hook
+also bumps the "search" version; a worker whose index is not exactly one
+version behind (another worker wrote in between) rebuilds from the
+database on its next query instead.
+"""
+import heapq
+import re
+import threading
+from bisect import bisect_left, insort
+from collections import defaultdict
+
+from sqlalchemy import event, func, inspect
+from sqlalchemy.orm import Session
+
+from db import db
+from data_versions import SEARCH, bump_version, get_version
+from models import Location, SavedItem
+from routes.maps import Building
+
+# Result order for otherwise equal matches
+TYPE_RANK = {"building": 0, "location": 1, "room": 2, "course": 3}
+MAX_RESULTS = 25
+
+# A short prefix like "a" could expand to thousands of tokens; the shortest
+# ones are the likeliest completions, so only the first few are used
+MAX_PREFIX_TOKENS = 200
+
+# Typo matching only checks the tokens sharing the most trigrams with a word
+MAX_TYPO_CANDIDATES = 50
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text):
+    words = _WORD.findall((text or "").lower())
+    tokens = set(words)
+    if len(words) > 1:
+        tokens.add("".join(words))
+    return tokens
+
+
+def trigrams(token):
+    padded = f"  {token} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def edit_distance(a, b, limit):
+    """Damerau-Levenshtein distance, or ``limit + 1`` once it exceeds ``limit``."""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    prev2, prev = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        row = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = 0 if a[i - 1] == b[j - 1] else 1
+            row[j] = min(prev[j] + 1, row[j - 1] + 1, prev[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                row[j] = min(row[j], prev2[j - 2] + 1)
+        # A transposition can reach back two rows, so both must be over
+        if min(row) > limit and min(prev) > limit:
+            return limit + 1
+        prev2, prev = prev, row
+    return prev[-1]
+
+
+def typo_limit(word):
+    return 0 if len(word) < 4 else 1 if len(word) < 8 else 2
+
+
+class AutocompleteIndex:
+    def __init__(self):
+        self.entries = {}                   # key -> entry dict
+        self.refs = defaultdict(int)        # key -> number of rows behind it
+        self.postings = defaultdict(set)    # token -> keys
+        self.grams = defaultdict(set)       # trigram -> tokens
+        self.tokens = []                    # sorted, for prefix lookups
+
+    def add(self, key, entry, count=1):
+        self.refs[key] += count
+        if key in self.entries:
+            return
+        self.entries[key] = entry
+        for token in tokenize(entry["label"]):
+            if token not in self.postings:
+                insort(self.tokens, token)
+                for gram in trigrams(token):
+                    self.grams[gram].add(token)
+            self.postings[token].add(key)
+
+    def remove(self, key, count=1):
+        if key not in self.entries:
+            return
+        self.refs[key] -= count
+        if self.refs[key] > 0:
+            return
+        del self.refs[key]
+        entry = self.entries.pop(key)
+        for token in tokenize(entry["label"]):
+            keys = self.postings[token]
+            keys.discard(key)
+            if not keys:
+                del self.postings[token]
+                del self.tokens[bisect_left(self.tokens, token)]
+                for gram in trigrams(token):
+                    self.grams[gram].discard(token)
+
+    def _word_scores(self, word, prefix):
+        """``{key: score}`` for entries matching one query word."""
+        scores = {}
+
+        def hit(token, score):
+            for key in self.postings[token]:
+                if score > scores.get(key, 0.0):
+                    scores[key] = score
+
+        if word in self.postings:
+            hit(word, 3.0)
+        if prefix:
+            completions = []
+            i = bisect_left(self.tokens, word)
+            while i < len(self.tokens) and self.tokens[i].startswith(word):
+                if self.tokens[i] != word:
+                    completions.append(self.tokens[i])
+                i += 1
+            for token in heapq.nsmallest(MAX_PREFIX_TOKENS, completions, key=len):
+                hit(token, 2.0 + len(word) / len(token))
+
+        # Typo tolerance only kicks in when nothing matches as typed
+        limit = typo_limit(word)
+        if limit and not scores:
+            # Tokens sharing enough trigrams with the word, then check distance
+            shared = defaultdict(int)
+            for gram in trigrams(word):
+                for token in self.grams.get(gram, ()):
+                    shared[token] += 1
+            candidates = heapq.nlargest(MAX_TYPO_CANDIDATES, shared, key=shared.get)
+            for token in candidates:
+                distance = edit_distance(word, token, limit)
+                if prefix and distance > limit and len(token) > len(word):
+                    distance = edit_distance(word, token[:len(word)], limit)
+                if distance <= limit:
+                    hit(token, 1.5 - 0.5 * distance)
+        return scores
+
+    def search(self, query, limit=10, types=None):
+        """Best entries for ``query``; the last word may be incomplete."""
+        words = _WORD.findall((query or "").lower())
+        if not words:
+            return []
+
+        totals = None
+        for i, word in enumerate(words):
+            scores = self._word_scores(word, prefix=i == len(words) - 1)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {key: totals[key] + s for key, s in scores.items() if key in totals}
+            if not totals:
+                # Typed as one word? "lib 301" also tries "lib301"
+                if len(words) > 1:
+                    return self.search("".join(words), limit, types)
+                return []
+
+        def rank(key):
+            entry = self.entries[key]
+            return -totals[key], TYPE_RANK.get(entry["type"], 9), len(entry["label"]), entry["label"]
+
+        keys = totals if not types else (key for key in totals if self.entries[key]["type"] in types)
+        return [{**self.entries[key], "score": totals[key]} for key in heapq.nsmallest(limit, keys, key=rank)]
+
+
+# ----------------------------------------------------------
+#  What each row contributes to the index
+# ----------------------------------------------------------
+
+def _room_key(room):
+    return ("room", "".join(_WORD.findall(room.lower())))
+
+
+def _course_key(code):
+    return ("course", code.strip().upper())
+
+
+def _entries_for(model, values):
+    """``[(key, entry)]`` contributed by a row with the given column values."""
+    if model is Location:
+        if not values["name"]:
+            return []
+        return [(("location", values["id"]), {
+            "type": "location", "id": values["id"], "label": values["name"],
+            "x": values["x"], "y": values["y"]
+        })]
+    if model is Building:
+        if not values["name"]:
+            return []
+        return [(("building", values["id"]), {"type": "building", "id": values["id"], "label": values["name"]})]
+
+    found = []
+    room, code = (values["room_number"] or "").strip(), (values["course_code"] or "").strip()
+    if room and _room_key(room)[1]:
+        found.append((_room_key(room), {"type": "room", "label": room, "location_id": values["location_id"]}))
+    if code:
+        found.append((_course_key(code), {"type": "course", "label": code.upper(), "name": values["name"]}))
+    return found
+
+
+INDEXED_COLUMNS = {
+    Location: ("id", "name", "x", "y"),
+    Building: ("id", "name"),
+    SavedItem: ("room_number", "course_code", "name", "location_id"),
+}
+
+
+def build_index():
+    index = AutocompleteIndex()
+    for row in db.session.query(Location.id, Location.name, Location.x, Location.y):
+        for key, entry in _entries_for(Location, row._asdict()):
+            index.add(key, entry)
+    for row in db.session.query(Building.id, Building.name):
+        for key, entry in _entries_for(Building, row._asdict()):
+            index.add(key, entry)
+
+    # One row per distinct room/course value, with how many items use it
+    grouped = db.session.query(
+        SavedItem.room_number, SavedItem.course_code,
+        func.min(SavedItem.name).label("name"), func.min(SavedItem.location_id).label("location_id"),
+        func.count().label("count")
+    ).group_by(SavedItem.room_number, SavedItem.course_code)
+    for row in grouped:
+        values = row._asdict()
+        for key, entry in _entries_for(SavedItem, values):
+            index.add(key, entry, values["count"])
+    return index
+
+
+class LiveIndex:
+    """The process-wide index and the "search" version it reflects."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.index = None
+        self.version = None
+
+    def get(self):
+        version = get_version(SEARCH)
+        with self._lock:
+            if self.version != version:
+                self.index = build_index()
+                self.version = version
+            return self.index
+
+    def apply(self, changes):
+        """Apply ``[(version, removed, added)]`` committed by this process."""
+        with self._lock:
+            for version, removed, added in changes:
+                if self.index is None or self.version != version - 1:
+                    return      # another worker wrote in between: rebuild on next get()
+                for key, _ in removed:
+                    self.index.remove(key)
+                for key, entry in added:
+                    self.index.add(key, entry)
+                self.version = version
+
+
+live_index = LiveIndex()
+
+
+def get_search_index():
+    """Return the ``AutocompleteIndex`` for the current version."""
+    return live_index.get()
+
+
+def _old_values(obj, columns):
+    state = inspect(obj)
+    values = {}
+    for column in columns:
+        history = state.attrs[column].history
+        values[column] = history.deleted[0] if history.deleted else getattr(obj, column)
+    return values
+
+
+@event.listens_for(Session, "after_flush")
+def _collect_changes(session, flush_context):
+    removed, added = [], []
+    for obj in session.new:
+        columns = INDEXED_COLUMNS.get(type(obj))
+        if columns:
+            added += _entries_for(type(obj), {c: getattr(obj, c) for c in columns})
+    for obj in session.deleted:
+        columns = INDEXED_COLUMNS.get(type(obj))
+        if columns:
+            removed += _entries_for(type(obj), _old_values(obj, columns))
+    for obj in session.dirty:
+        columns = INDEXED_COLUMNS.get(type(obj))
+        if not columns or not any(inspect(obj).attrs[c].history.has_changes() for c in columns):
+            continue
+        removed += _entries_for(type(obj), _old_values(obj, columns))
+        added += _entries_for(type(obj), {c: getattr(obj, c) for c in columns})
+
+    if removed or added:
+        version = bump_version(SEARCH, session.connection())
+        session.info.setdefault("search_changes", []).append((version, removed, added))
+
+
+@event.listens_for(Session, "after_commit")
+def _apply_changes(session):
+    changes = session.info.pop("search_changes", None)
+    if changes:
+        live_index.apply(changes)
+
+
+@event.listens_for(Session, "after_rollback")
+def _drop_changes(session):
+    session.info.pop("search_changes", None)
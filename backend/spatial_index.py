@@ -0,0 +1,133 @@
+"""Nearest-location lookups over ``Location.x/y``.
+
+``KDTree`` is a static 2-d tree stored implicitly in flat arrays: for the
+range ``[lo, hi)`` the median point sits at ``(lo + hi) // 2`` and splits the
+range on x or y depending on depth. A k-nearest query visits O(log n) nodes
+on typical campus layouts.
+
+GPS positions (incident reports, alerts, the device) are converted to the
+campus x/y plane with ``to_xy``, a local equirectangular projection around
+``CAMPUS_ORIGIN`` scaled by ``CAMPUS_XY_PER_METRE``.
+"""
+import heapq
+import math
+from array import array
+
+from config import CAMPUS_ORIGIN, CAMPUS_XY_PER_METRE
+
+EARTH_RADIUS_M = 6371000.0
+
+
+def to_xy(lat, lng):
+    """Project a latitude/longitude onto the campus x/y plane."""
+    origin_lat, origin_lng = CAMPUS_ORIGIN
+    north = math.radians(lat - origin_lat) * EARTH_RADIUS_M
+    east = math.radians(lng - origin_lng) * EARTH_RADIUS_M * math.cos(math.radians(origin_lat))
+    return east * CAMPUS_XY_PER_METRE, north * CAMPUS_XY_PER_METRE
+
+
+def read_point(values, prefix=""):
+    """Return ``(x, y)`` from ``{prefix}x/{prefix}y`` or ``{prefix}lat/{prefix}lng``.
+
+    Returns None when neither pair is present; raises ValueError when a
+    value is not a number.
+    """
+    if values.get(f"{prefix}x") is not None and values.get(f"{prefix}y") is not None:
+        return float(values[f"{prefix}x"]), float(values[f"{prefix}y"])
+    if values.get(f"{prefix}lat") is not None and values.get(f"{prefix}lng") is not None:
+        return to_xy(float(values[f"{prefix}lat"]), float(values[f"{prefix}lng"]))
+    return None
+
+
+class KDTree:
+    def __init__(self, points):
+        """Build from ``(x, y, id)`` tuples; points without coordinates are skipped."""
+        points = [p for p in points if p[0] is not None and p[1] is not None]
+        self._arrange(points, 0, len(points), 0)
+        self.xs = array("d", (p[0] for p in points))
+        self.ys = array("d", (p[1] for p in points))
+        self.ids = array("q", (p[2] for p in points))
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def _arrange(cls, points, lo, hi, axis):
+        if hi - lo <= 1:
+            return
+        points[lo:hi] = sorted(points[lo:hi], key=lambda p: p[axis])
+        mid = (lo + hi) // 2
+        cls._arrange(points, lo, mid, 1 - axis)
+        cls._arrange(points, mid + 1, hi, 1 - axis)
+
+    def nearest(self, x, y, k=1, accept=None):
+        """Return up to ``k`` ``(distance, id)`` pairs closest to (x, y).
+
+        ``accept(id)`` optionally filters which points may be returned.
+        """
+        best = []      # max-heap of (-squared distance, id)
+        xs, ys, ids = self.xs, self.ys, self.ids
+
+        def visit(lo, hi, axis):
+            if lo >= hi:
+                return
+            mid = (lo + hi) // 2
+            dx, dy = x - xs[mid], y - ys[mid]
+            d2 = dx * dx + dy * dy
+            if accept is None or accept(ids[mid]):
+                if len(best) < k:
+                    heapq.heappush(best, (-d2, ids[mid]))
+                elif d2 < -best[0][0]:
+                    heapq.heapreplace(best, (-d2, ids[mid]))
+
+            diff = dx if axis == 0 else dy
+            near, far = ((lo, mid), (mid + 1, hi)) if diff < 0 else ((mid + 1, hi), (lo, mid))
+            visit(near[0], near[1], 1 - axis)
+            if len(best) < k or diff * diff < -best[0][0]:
+                visit(far[0], far[1], 1 - axis)
+
+        visit(0, len(ids), 0)
+        return sorted((math.sqrt(-d2), point_id) for d2, point_id in best)
+
+    def within(self, x, y, radius):
+        """Return ``(distance, id)`` pairs no further than ``radius``, nearest first."""
+        found = []
+        xs, ys, ids = self.xs, self.ys, self.ids
+        r2 = radius * radius
+
+        def visit(lo, hi, axis):
+            if lo >= hi:
+                return
+            mid = (lo + hi) // 2
+            dx, dy = x - xs[mid], y - ys[mid]
+            if dx * dx + dy * dy <= r2:
+                found.append((math.hypot(dx, dy), ids[mid]))
+            diff = dx if axis == 0 else dy
+            if diff < 0 or diff * diff <= r2:
+                visit(lo, mid, 1 - axis)
+            if diff >= 0 or diff * diff <= r2:
+                visit(mid + 1, hi, 1 - axis)
+
+        visit(0, len(ids), 0)
+        return sorted(found)
+
+    def in_box(self, min_x, min_y, max_x, max_y):
+        """Return the ids of every point inside the box (edges included)."""
+        found = []
+        xs, ys, ids = self.xs, self.ys, self.ids
+        low, high = (min_x, min_y), (max_x, max_y)
+
+        def visit(lo, hi, axis):
+            if lo >= hi:
+                return
+            mid = (lo + hi) // 2
+            if min_x <= xs[mid] <= max_x and min_y <= ys[mid] <= max_y:
+                found.append(ids[mid])
+            split = xs[mid] if axis == 0 else ys[mid]
+            if low[axis] <= split:
+                visit(lo, mid, 1 - axis)
+            if high[axis] >= split:
+                visit(mid + 1, hi, 1 - axis)
+
+        visit(0, len(ids), 0)
+        return found
@@ -0,0 +1,105 @@
+"""Shared fixtures: one temporary SQLite database, recreated for every test.
+
+The app keeps per-process caches keyed by the counters in ``data_versions``.
+Recreating the database starts those counters over, so every cache is reset
+along with it.
+"""
+import glob
+import importlib.util
+import os
+import tempfile
+
+import pytest
+
+_tmp = tempfile.mkdtemp(prefix="campus-tests-")
+os.environ["DATABASE_URL"] = "sqlite:///" + os.path.join(_tmp, "test.db")
+os.environ.setdefault("QUERY_BUDGET_MODE", "raise")
+
+from app import app as flask_app  # noqa: E402  (needs the environment above)
+from db import db  # noqa: E402
+from models import Location, Path, User  # noqa: E402
+
+
+def _reset_caches():
+    from closures import closure_cache
+    from location_cache import listing_cache, location_cache, spatial_cache
+    from search_index import live_index
+    from routes import directions, maps
+    from contraction import HierarchyIndex
+    from closures import ClosureInvalidator
+
+    for cache in (directions.graph_cache, location_cache, spatial_cache, listing_cache, closure_cache):
+        cache.clear()
+    directions.route_cache.clear()
+    directions.route_index = HierarchyIndex(os.path.join(_tmp, "route_index.pickle"))
+    directions.closure_invalidator = ClosureInvalidator(directions.route_cache)
+    live_index.index = live_index.version = None
+    maps.floor_plans.root = os.path.join(_tmp, "floor_plans")
+
+
+@pytest.fixture
+def app():
+    # No background compaction: tests call recent_history.compact() directly
+    flask_app.config.update(TESTING=True, RECENT_SEARCH_COMPACT_SECONDS=0)
+    with flask_app.app_context():
+        db.drop_all()
+        db.create_all()
+        _reset_caches()
+        yield flask_app
+        from routes.saved_routes import route_usage
+        route_usage.flush()
+        db.session.remove()
+
+
+@pytest.fixture
+def client(app):
+    return app.test_client()
+
+
+@pytest.fixture
+def tmp_dir():
+    return _tmp
+
+
+@pytest.fixture
+def user(app):
+    u = User(email="test@example.com", name="Test")
+    db.session.add(u)
+    db.session.commit()
+    return u
+
+
+def add_graph(edges, coords=None):
+    """Create locations and paths; ``edges`` are ``(a, b, distance)`` names.
+
+    ``coords`` maps a name to ``(x, y)``. Returns ``{name: location id}``.
+    """
+    coords = coords or {}
+    names = sorted({n for a, b, _ in edges for n in (a, b)} | set(coords))
+    locations = {name: Location(name=name, x=coords.get(name, (None, None))[0],
+                                y=coords.get(name, (None, None))[1]) for name in names}
+    db.session.add_all(locations.values())
+    db.session.flush()
+    db.session.add_all(Path(start_id=locations[a].id, end_id=locations[b].id, distance=d) for a, b, d in edges)
+    db.session.commit()
+    return {name: loc.id for name, loc in locations.items()}
+
+
+def load_migration(revision):
+    """The Alembic revision module ``revision``, for testing its helpers."""
+    versions = os.path.join(os.path.dirname(__file__), "..", "migrations", "versions")
+    path, = glob.glob(os.path.join(versions, f"{revision}_*.py"))
+    spec = importlib.util.spec_from_file_location(f"migration_{revision}", path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+# A small grid-like campus: A-B-C-D along the top, with a long detour A-E-D
+CAMPUS_EDGES = [("A", "B", 10), ("B", "C", 10), ("C", "D", 10), ("A", "E", 40), ("E", "D", 40), ("B", "E", 35)]
+CAMPUS_COORDS = {"A": (0, 0), "B": (10, 0), "C": (20, 0), "D": (30, 0), "E": (15, 30)}
+
+
+@pytest.fixture
+def campus(app):
+    return add_graph(CAMPUS_EDGES, CAMPUS_COORDS)
@@ -0,0 +1,51 @@
+import math
+import random
+
+import pytest
+
+from graph_engine import CSRGraph
+
+
+def _grid(size, seed):
+    """A jittered grid whose path lengths are in different units from x/y."""
+    rng = random.Random(seed)
+    coords = {r * size + c + 1: (c * 10 + rng.uniform(-2, 2), r * 10 + rng.uniform(-2, 2))
+              for r in range(size) for c in range(size)}
+    edges = []
+    for node, (x, y) in coords.items():
+        for other in (node + 1, node + size):
+            if other in coords and (other != node + 1 or node % size):
+                ox, oy = coords[other]
+                edges.append((node, other, 0.3 * math.hypot(x - ox, y - oy) * rng.uniform(1, 1.5)))
+    return CSRGraph.from_edges(edges, coords)
+
+
+def test_astar_costs_match_dijkstra():
+    graph = _grid(8, seed=4)
+    assert graph.heuristic_scale > 0
+    for source, target in ((0, 63), (7, 56), (12, 50), (30, 31)):
+        expected = graph.search(source, target)[1][-1]
+        path, costs = graph.astar_search(source, target)
+        assert path[0] == source and path[-1] == target
+        assert costs[-1] == pytest.approx(expected)
+
+
+def test_missing_coordinates_drop_the_heuristic():
+    # S=1, X=2, N=3, T=4: N has no x/y but lies on the only short path
+    graph = CSRGraph.from_edges([(1, 2, 1), (2, 3, 1), (3, 4, 1), (1, 4, 100)],
+                                {1: (0, 0), 2: (0, 1), 3: (None, None), 4: (100, 0)})
+    assert graph.heuristic_scale == 0
+    assert graph.astar_search(0, 3) == graph.search(0, 3) == ([0, 1, 2, 3], [0, 1, 2, 3])
+
+
+def test_no_coordinates_falls_back_to_dijkstra():
+    graph = CSRGraph.from_edges([(1, 2, 1), (2, 3, 1), (1, 3, 5)])
+    assert graph.heuristic_scale == 0
+    assert graph.astar_search(0, 2) == graph.search(0, 2)
+
+
+def test_route_endpoint_accepts_astar(client, campus):
+    body = client.get(f"/api/route/?start={campus['A']}&end={campus['D']}&k=2&algorithm=astar").get_json()
+    assert body["algorithm"] == "astar"
+    assert [route["cost"] for route in body["routes"]] == [30, 80]
+    assert client.get(f"/api/route/?start={campus['A']}&end={campus['D']}&algorithm=bfs").status_code == 400
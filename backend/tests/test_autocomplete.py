@@ -0,0 +1,73 @@
+from db import db
+from models import Location, SavedItem
+from routes.maps import Building
+from search_index import AutocompleteIndex, edit_distance, live_index
+
+
+def _labels(client, query, extra=""):
+    body = client.get(f"/api/search/autocomplete?q={query}{extra}").get_json()
+    return [result["label"] for result in body["results"]]
+
+
+def _index(*labels):
+    index = AutocompleteIndex()
+    for i, label in enumerate(labels):
+        index.add(("location", i), {"type": "location", "id": i, "label": label})
+    return index
+
+
+def test_prefix_typo_and_compact_matches():
+    index = _index("Student Learning Centre", "Library", "LIB-301 Lab")
+
+    def labels(query):
+        return [entry["label"] for entry in index.search(query)]
+
+    assert labels("libr") == ["Library"]
+    assert labels("student lea") == ["Student Learning Centre"]
+    assert labels("lbrary") == ["Library"]
+    assert labels("lib301") == ["LIB-301 Lab"]
+    assert labels("lib 301") == ["LIB-301 Lab"]
+    assert labels("") == [] and labels("zzzz") == []
+
+
+def test_edit_distance_counts_transpositions():
+    assert edit_distance("libary", "library", 2) == 1
+    assert edit_distance("lirbary", "library", 2) == 1
+    assert edit_distance("abc", "xyz", 1) == 2
+
+
+def test_removal_keeps_shared_entries_until_the_last_reference():
+    index = AutocompleteIndex()
+    entry = {"type": "course", "label": "CPS845"}
+    index.add(("course", "CPS845"), entry, count=2)
+    index.remove(("course", "CPS845"))
+    assert index.search("cps")
+    index.remove(("course", "CPS845"))
+    assert index.search("cps") == [] and index.tokens == []
+
+
+def test_endpoint_covers_every_source(client, campus, user):
+    db.session.add(Building(name="Kerr Hall"))
+    db.session.add(SavedItem(user_id=user.id, item_type="course", name="Networks",
+                             course_code="cps845", room_number="KHE-120"))
+    db.session.commit()
+
+    assert _labels(client, "kerr") == ["Kerr Hall"]
+    assert _labels(client, "cps8") == ["CPS845"]
+    assert _labels(client, "khe120") == ["KHE-120"]
+    assert _labels(client, "a", "&types=location") == ["A"]
+    assert client.get("/api/search/autocomplete?q=a&types=planet").status_code == 400
+
+
+def test_writes_update_the_index_without_a_rebuild(client, campus):
+    _labels(client, "a")
+    index = live_index.index
+    location = db.session.get(Location, campus["B"])
+    location.name = "Bookstore"
+    db.session.commit()
+
+    assert _labels(client, "book") == ["Bookstore"]
+    assert live_index.index is index
+    db.session.delete(location)
+    db.session.commit()
+    assert _labels(client, "book") == []
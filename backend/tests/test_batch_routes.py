@@ -0,0 +1,49 @@
+from routes import directions
+
+
+def _single(client, start, end):
+    body = client.get(f"/api/route/?start={start}&end={end}&k=1&algorithm=dijkstra").get_json()
+    return body["routes"][0]
+
+
+def test_batch_matches_single_routes_in_request_order(client, campus):
+    pairs = [(campus["A"], campus["D"]), (campus["E"], campus["C"]), (campus["A"], campus["E"])]
+    body = client.post("/api/route/batch", json={
+        "pairs": [{"start": start, "end": end} for start, end in pairs]
+    }).get_json()
+
+    assert body["count"] == 3
+    for (start, end), route in zip(pairs, body["routes"]):
+        single = _single(client, start, end)
+        assert (route["start"], route["end"]) == (start, end)
+        assert route["cost"] == single["cost"] and route["path"] == single["path"]
+
+
+def test_one_search_per_origin(client, campus, monkeypatch):
+    calls = []
+    original = directions.routes_from_origins
+
+    def spy(graph, by_origin, closures=None):
+        calls.append({start: set(ends) for start, ends in by_origin.items()})
+        return original(graph, by_origin, closures)
+
+    monkeypatch.setattr(directions, "routes_from_origins", spy)
+    body = client.post("/api/route/batch", json={
+        "start": campus["A"], "ends": [campus["B"], campus["C"], campus["D"]]
+    }).get_json()
+
+    assert [route["cost"] for route in body["routes"]] == [10, 20, 30]
+    assert calls == [{campus["A"]: {campus["B"], campus["C"], campus["D"]}}]
+
+
+def test_unreachable_pairs_have_no_path(client, campus):
+    body = client.post("/api/route/batch", json={"start": campus["A"], "ends": [999]}).get_json()
+    assert body["routes"] == [{"start": campus["A"], "end": 999, "distance": None, "cost": None,
+                               "path": [], "steps": []}]
+
+
+def test_invalid_batches_are_rejected(client, campus):
+    assert client.post("/api/route/batch", json={"pairs": [{"start": 1}]}).status_code == 400
+    assert client.post("/api/route/batch", json={"pairs": []}).status_code == 400
+    too_many = [{"start": campus["A"], "end": campus["B"]}] * (directions.MAX_BATCH_PAIRS + 1)
+    assert client.post("/api/route/batch", json={"pairs": too_many}).status_code == 400
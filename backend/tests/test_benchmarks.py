@@ -0,0 +1,44 @@
+import argparse
+import json
+import random
+
+import pytest
+
+from benchmarks import bench_routing
+from benchmarks.synthetic_graphs import TOPOLOGIES, generate
+
+
+@pytest.mark.parametrize("topology", TOPOLOGIES)
+def test_generators_make_connected_rows_with_coordinates(topology):
+    edges, coords = generate(topology, 300, seed=1)
+    assert edges and all(len(row) == 7 for row in edges)
+    assert all(u in coords and v in coords for u, v, *_ in edges)
+    assert generate(topology, 300, seed=1) == (edges, coords)
+
+
+def test_parse_size():
+    assert [bench_routing.parse_size(s) for s in ("500", "1k", "1.5k", "1m")] == [500, 1000, 1500, 1_000_000]
+
+
+def test_bench_graph_reports_every_query_kind(app):
+    args = argparse.Namespace(seed=3, queries=10, ch_max_edges=1000)
+    result = bench_routing.bench_graph("grid", 200, args, random.Random(3))
+
+    assert result["edges"] == 200 and result["graph_load_s"] > 0
+    assert {"dijkstra", "astar", "ch", "yen_k3", "yen_k10", "batch_1x20"} <= set(result["queries"])
+    assert result["queries"]["dijkstra"]["count"] == 10
+
+
+def test_compare_flags_slowdowns_beyond_tolerance(tmp_path, capsys):
+    def report(p50):
+        stats = {"p50_ms": p50, "p99_ms": p50}
+        return {"results": [{"topology": "grid", "edges": 100, "graph_load_s": 1.0, "queries": {"dijkstra": stats}}]}
+
+    old, new = tmp_path / "old.json", tmp_path / "new.json"
+    old.write_text(json.dumps(report(1.0)))
+    new.write_text(json.dumps(report(1.1)))
+    assert bench_routing.compare(argparse.Namespace(old=old, new=new, tolerance=0.2)) == 0
+
+    new.write_text(json.dumps(report(2.0)))
+    assert bench_routing.compare(argparse.Namespace(old=old, new=new, tolerance=0.2)) == 1
+    assert "REGRESSION" in capsys.readouterr().out
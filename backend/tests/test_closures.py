@@ -0,0 +1,124 @@
+from datetime import datetime, timedelta, timezone
+
+from db import db
+from models import Alert, RouteClosure, StudentIncidentReport
+from config import CAMPUS_ORIGIN
+from routes import directions
+
+
+def _route(client, campus, algorithm="dijkstra"):
+    body = client.get(f"/api/route/?start={campus['A']}&end={campus['D']}&k=1&algorithm={algorithm}").get_json()
+    return body["routes"][0]
+
+
+def _report():
+    report = StudentIncidentReport(
+        reporter_name="R", reporter_email="r@example.com", category="hazard",
+        title="Spill", description="Wet floor", lat=CAMPUS_ORIGIN[0], lng=CAMPUS_ORIGIN[1]
+    )
+    db.session.add(report)
+    db.session.commit()
+    return report.id
+
+
+def test_closed_edge_is_routed_around_and_reopened(client, campus):
+    assert _route(client, campus)["path"] == [campus["A"], campus["B"], campus["C"], campus["D"]]
+
+    created = client.post("/api/closures/", json={"edges": [[campus["B"], campus["C"]]], "minutes": 30})
+    assert created.status_code == 201
+    detour = _route(client, campus)
+    assert detour["path"] == [campus["A"], campus["E"], campus["D"]] and detour["cost"] == 80
+
+    closure_id = created.get_json()["closures"][0]["id"]
+    assert client.delete(f"/api/closures/{closure_id}").status_code == 200
+    assert _route(client, campus)["cost"] == 30
+
+
+def test_closed_location_is_avoided(client, campus):
+    client.post("/api/closures/", json={"locations": [campus["C"]]})
+    assert campus["C"] not in _route(client, campus)["path"]
+
+
+def test_expired_closures_no_longer_apply(client, campus):
+    db.session.add(RouteClosure(start_id=campus["B"], end_id=campus["C"],
+                                expires_at=datetime.utcnow() - timedelta(minutes=1)))
+    db.session.commit()
+    assert _route(client, campus)["cost"] == 30
+    assert client.get("/api/closures/").get_json() == []
+    assert len(client.get("/api/closures/?all=1").get_json()) == 1
+
+
+def test_closure_created_while_a_route_is_computed_is_not_served_from_cache(client, campus, monkeypatch):
+    build = directions.build_route_payload
+
+    def build_then_close(*args):
+        payload = build(*args)
+        # Another request closes B-C and syncs the cache before this put
+        db.session.add(RouteClosure(start_id=campus["B"], end_id=campus["C"],
+                                    expires_at=datetime.utcnow() + timedelta(minutes=30)))
+        db.session.commit()
+        directions.current_closures()
+        return payload
+
+    monkeypatch.setattr(directions, "build_route_payload", build_then_close)
+    assert _route(client, campus)["cost"] == 30
+    monkeypatch.setattr(directions, "build_route_payload", build)
+
+    body = client.get(f"/api/route/?start={campus['A']}&end={campus['D']}&k=1&algorithm=dijkstra").get_json()
+    assert body["cached"] is False and body["routes"][0]["cost"] == 80
+
+
+def test_closure_evicts_only_routes_it_crosses(client, campus):
+    client.get(f"/api/route/?start={campus['A']}&end={campus['B']}&k=1&algorithm=dijkstra")
+    client.get(f"/api/route/?start={campus['C']}&end={campus['D']}&k=1&algorithm=dijkstra")
+    client.post("/api/closures/", json={"edges": [[campus["C"], campus["D"]]]})
+
+    ab = client.get(f"/api/route/?start={campus['A']}&end={campus['B']}&k=1&algorithm=dijkstra").get_json()
+    cd = client.get(f"/api/route/?start={campus['C']}&end={campus['D']}&k=1&algorithm=dijkstra").get_json()
+    assert ab["cached"] is True
+    assert cd["cached"] is False and cd["routes"][0]["path"] != [campus["C"], campus["D"]]
+
+
+def test_aware_expires_at_is_stored_as_naive_utc(client, campus):
+    expires = datetime.now(timezone.utc) + timedelta(hours=2)
+    for value in (expires.isoformat(), expires.strftime("%Y-%m-%dT%H:%M:%SZ"),
+                  expires.astimezone(timezone(timedelta(hours=-5))).isoformat()):
+        response = client.post("/api/closures/", json={"edges": [[campus["A"], campus["B"]]], "expires_at": value})
+        assert response.status_code == 201, value
+        stored = datetime.fromisoformat(response.get_json()["closures"][0]["expires_at"])
+        assert stored.tzinfo is None
+        assert abs(stored - expires.replace(tzinfo=None)) < timedelta(seconds=1)
+
+
+def test_past_or_invalid_expiry_is_rejected(client, campus):
+    edges = [[campus["A"], campus["B"]]]
+    past = (datetime.now(timezone.utc) - timedelta(minutes=5)).isoformat()
+    for body in ({"expires_at": past}, {"minutes": -5}, {"expires_at": "tomorrow"}, {"minutes": "soon"}):
+        response = client.post("/api/closures/", json={"edges": edges, **body})
+        assert response.status_code == 400, body
+    assert RouteClosure.query.count() == 0
+
+
+def test_invalid_lat_with_coordinates_is_rejected(client, campus):
+    response = client.post("/api/closures/", json={"x": 10, "y": 0, "lat": "north", "lng": -79.0})
+    assert response.status_code == 400
+    assert RouteClosure.query.count() == 0
+
+
+def test_alert_close_route_rejects_past_expiry(client, campus):
+    report_id = _report()
+    past = (datetime.utcnow() - timedelta(hours=1)).isoformat()
+    response = client.post(f"/api/alerts/from-report/{report_id}", json={
+        "audience_type": "all", "close_route": True, "expires_at": past
+    })
+    assert response.status_code == 400
+    assert RouteClosure.query.count() == 0 and Alert.query.count() == 0
+
+
+def test_alert_close_route_closes_paths_near_the_report(client, campus):
+    report_id = _report()
+    response = client.post(f"/api/alerts/from-report/{report_id}", json={
+        "audience_type": "all", "close_route": True, "minutes": 10, "radius": 5
+    })
+    assert response.status_code == 201
+    assert response.get_json()["closure_count"] == RouteClosure.query.count() > 0
@@ -0,0 +1,99 @@
+import os
+import pickle
+import random
+import time
+
+import pytest
+
+from db import db
+from contraction import ContractionHierarchy
+from data_versions import GRAPH, get_version
+from graph_engine import CSRGraph
+from routes import directions
+from conftest import _reset_caches, add_graph
+
+# Same locations and number of writes as CAMPUS_EDGES (so the same graph
+# version), but A-B is now long and the detour through E is the shortest
+RESEEDED_EDGES = [("A", "B", 500), ("B", "C", 10), ("C", "D", 10), ("A", "E", 25), ("E", "D", 25), ("B", "E", 35)]
+
+
+def _random_graph(n, m, seed):
+    rng = random.Random(seed)
+    edges = [(i, i + 1, rng.uniform(1, 20)) for i in range(1, n)]
+    edges += [(rng.randint(1, n), rng.randint(1, n), rng.uniform(1, 50)) for _ in range(m)]
+    return CSRGraph.from_edges(edges)
+
+
+def _wait_for_hierarchy(graph, version, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        hierarchy = directions.route_index.get(graph, version)
+        if hierarchy is not None:
+            return hierarchy
+        time.sleep(0.02)
+    raise AssertionError("hierarchy was not rebuilt")
+
+
+def test_hierarchy_matches_dijkstra():
+    graph = _random_graph(80, 160, seed=5)
+    hierarchy = ContractionHierarchy.build(graph, 1)
+    for source in range(0, 80, 7):
+        for target in range(3, 80, 11):
+            expected, _ = graph.shortest_path(source, target)
+            path, costs = hierarchy.search(source, target)
+            assert path[0] == source and path[-1] == target
+            assert costs[-1] == pytest.approx(expected)
+            assert graph.path_distance(path) == pytest.approx(expected)
+
+
+def test_saved_index_for_same_graph_is_loaded(campus):
+    graph, version = directions.graph_cache.get()
+    ContractionHierarchy.build(graph, version).save(directions.route_index.path)
+
+    loaded = directions.route_index.get(graph, version)
+    assert loaded is not None and loaded.fingerprint == graph.fingerprint()
+
+
+def test_save_leaves_no_temp_files_and_bad_files_load_as_missing(tmp_path):
+    graph = _random_graph(30, 40, seed=2)
+    path = str(tmp_path / "index.pkl")
+    ContractionHierarchy.build(graph, 1).save(path)
+    ContractionHierarchy.build(graph, 2).save(path)
+    assert os.listdir(tmp_path) == ["index.pkl"]
+    assert ContractionHierarchy.load(path).graph_version == 2
+
+    with open(path, "rb") as f:
+        data = f.read()
+    for garbage in (data[:len(data) // 2], b"not a pickle", pickle.dumps(["a", "list"])):
+        with open(path, "wb") as f:
+            f.write(garbage)
+        assert ContractionHierarchy.load(path) is None
+    assert ContractionHierarchy.load(str(tmp_path / "missing.pkl")) is None
+
+
+def test_saved_index_for_other_graph_at_same_version_is_rejected(app, client, campus):
+    graph, version = directions.graph_cache.get()
+    ContractionHierarchy.build(graph, version).save(directions.route_index.path)
+    path = directions.route_index.path
+
+    # Reset the database (as seed_db.py does) and load a different graph that
+    # ends up at the same version number; the old index file stays on disk
+    db.drop_all()
+    db.create_all()
+    _reset_caches()
+    directions.route_index.path = path
+    ids = add_graph(RESEEDED_EDGES, {name: (0, 0) for name in "ABCDE"})
+    assert get_version(GRAPH) == version
+
+    new_graph, _ = directions.graph_cache.get()
+    assert new_graph.fingerprint() != graph.fingerprint()
+    assert directions.route_index.get(new_graph, version) is None
+
+    body = client.get(f"/api/route/?start={ids['A']}&end={ids['D']}&k=1").get_json()
+    assert body["routes"][0]["path"] == [ids["A"], ids["E"], ids["D"]]
+    assert body["routes"][0]["cost"] == 50
+
+    rebuilt = _wait_for_hierarchy(new_graph, version)
+    assert rebuilt.fingerprint == new_graph.fingerprint()
+    dense, costs = rebuilt.search(new_graph.index[ids["A"]], new_graph.index[ids["D"]])
+    assert costs[-1] == 50
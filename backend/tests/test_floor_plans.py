@@ -0,0 +1,67 @@
+import gzip
+import hashlib
+
+from db import db
+from routes import maps
+from routes.maps import Building
+
+SVG = b"<svg xmlns='http://www.w3.org/2000/svg'><rect width='10' height='10'/></svg>" * 20
+
+
+def _building(**fields):
+    building = Building(name="Library", **fields)
+    db.session.add(building)
+    db.session.commit()
+    return building.id
+
+
+def test_upload_then_fetch_by_digest(client):
+    building_id = _building()
+    body = client.put(f"/api/maps/buildings/{building_id}/floor-plan", data=SVG,
+                      content_type="image/svg+xml").get_json()
+    digest = hashlib.sha256(SVG).hexdigest()
+    assert body["hash"] == digest and body["size"] == len(SVG)
+
+    redirect = client.get(f"/api/maps/buildings/{building_id}/floor-plan")
+    assert redirect.status_code == 302 and redirect.headers["Location"].endswith(f"/floor-plans/{digest}")
+
+    blob = client.get(f"/api/maps/floor-plans/{digest}")
+    assert blob.get_data() == SVG and blob.mimetype == "image/svg+xml"
+    assert "immutable" in blob.headers["Cache-Control"]
+    assert client.get(f"/api/maps/floor-plans/{digest}", headers={"If-None-Match": blob.headers["ETag"]}).status_code == 304
+
+
+def test_gzip_and_ranges(client):
+    building_id = _building()
+    digest = client.put(f"/api/maps/buildings/{building_id}/floor-plan", data=SVG,
+                        content_type="image/svg+xml").get_json()["hash"]
+
+    zipped = client.get(f"/api/maps/floor-plans/{digest}", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip" and gzip.decompress(zipped.get_data()) == SVG
+
+    part = client.get(f"/api/maps/floor-plans/{digest}", headers={"Range": "bytes=0-9", "Accept-Encoding": "gzip"})
+    assert part.status_code == 206 and part.get_data() == SVG[:10]
+    assert "Content-Encoding" not in part.headers
+
+
+def test_legacy_inline_plan_moves_to_the_store_on_first_request(client):
+    building_id = _building(floor_plan='{"rooms": []}')
+    listed = client.get("/api/maps/buildings").get_json()[0]
+    assert listed["has_floor_plan"] and listed["floor_plan_url"].endswith(f"/buildings/{building_id}/floor-plan")
+
+    location = client.get(f"/api/maps/buildings/{building_id}/floor-plan").headers["Location"]
+    building = db.session.get(Building, building_id)
+    assert building.floor_plan is None and building.floor_plan_type == "application/json"
+    assert client.get(location).get_data() == b'{"rooms": []}'
+    assert client.get("/api/maps/buildings").get_json()[0]["floor_plan_url"].endswith(building.floor_plan_hash)
+
+
+def test_missing_empty_and_oversized_plans(client, monkeypatch):
+    building_id = _building()
+    assert client.get(f"/api/maps/buildings/{building_id}/floor-plan").status_code == 404
+    assert client.get("/api/maps/floor-plans/" + "0" * 64).status_code == 404
+    assert client.get("/api/maps/floor-plans/not-a-digest").status_code == 404
+    assert client.put(f"/api/maps/buildings/{building_id}/floor-plan", data=b"").status_code == 400
+
+    monkeypatch.setattr(maps, "FLOOR_PLAN_MAX_BYTES", 100)
+    assert client.put(f"/api/maps/buildings/{building_id}/floor-plan", data=SVG).status_code == 413
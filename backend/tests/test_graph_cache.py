@@ -0,0 +1,33 @@
+from db import db
+from models import Path
+from data_versions import GRAPH, get_version
+from routes.directions import graph_cache
+
+
+def test_graph_is_reused_until_the_version_moves(campus):
+    graph, version = graph_cache.get()
+    again, same_version = graph_cache.get()
+    assert again is graph and same_version == version
+
+
+def test_path_write_bumps_version_and_rebuilds(campus):
+    graph, version = graph_cache.get()
+    db.session.add(Path(start_id=campus["A"], end_id=campus["D"], distance=5))
+    db.session.commit()
+
+    assert get_version(GRAPH) == version + 1
+    rebuilt, new_version = graph_cache.get()
+    assert rebuilt is not graph and new_version == version + 1
+    assert rebuilt.num_edges == graph.num_edges + 1
+
+
+def test_route_uses_new_path_after_write(client, campus):
+    before = client.get(f"/api/route/?start={campus['A']}&end={campus['D']}&k=1").get_json()
+    assert before["routes"][0]["cost"] == 30
+
+    db.session.add(Path(start_id=campus["A"], end_id=campus["D"], distance=5))
+    db.session.commit()
+
+    after = client.get(f"/api/route/?start={campus['A']}&end={campus['D']}&k=1").get_json()
+    assert after["routes"][0]["path"] == [campus["A"], campus["D"]]
+    assert after["routes"][0]["cost"] == 5
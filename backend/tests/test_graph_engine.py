@@ -0,0 +1,72 @@
+import random
+
+import pytest
+
+from graph_engine import INF, CSRGraph, tree_path
+
+
+def _random_edges(n, m, seed):
+    rng = random.Random(seed)
+    edges = [(i, i + 1, rng.uniform(1, 20)) for i in range(1, n)]
+    edges += [(rng.randint(1, n), rng.randint(1, n), rng.uniform(1, 50)) for _ in range(m)]
+    return edges
+
+
+def _bellman_ford(edges, source):
+    dist = {source: 0.0}
+    for _ in range(len(edges)):
+        for u, v, w in edges:
+            for a, b in ((u, v), (v, u)):
+                if a in dist and dist[a] + w < dist.get(b, INF):
+                    dist[b] = dist[a] + w
+    return dist
+
+
+def test_csr_layout_stores_each_path_as_two_half_edges():
+    graph = CSRGraph.from_edges([(10, 20, 5), (20, 30, 7)], coords={40: (1, 1)})
+    assert list(graph.node_ids) == [10, 20, 30, 40]
+    assert list(graph.offsets) == [0, 1, 3, 4, 4]
+    assert graph.num_edges == 2 and graph.num_nodes == 4
+
+    b = graph.index[20]
+    heads = {graph.node_ids[graph.neighbors[e]]: graph.weights[e] for e in range(graph.offsets[b], graph.offsets[b + 1])}
+    assert heads == {10: 5.0, 30: 7.0}
+
+
+def test_search_matches_reference_distances():
+    edges = _random_edges(60, 120, seed=2)
+    graph = CSRGraph.from_edges(edges)
+    source = graph.index[1]
+    expected = _bellman_ford(edges, 1)
+
+    for node_id, distance in expected.items():
+        path, costs = graph.search(source, graph.index[node_id])
+        assert path[0] == source and path[-1] == graph.index[node_id]
+        assert costs[-1] == pytest.approx(distance)
+        assert graph.path_distance(path) == pytest.approx(distance)
+        assert costs == sorted(costs)
+
+
+def test_shortest_path_tree_agrees_with_point_searches():
+    graph = CSRGraph.from_edges(_random_edges(40, 80, seed=8))
+    dist, pred = graph.shortest_path_tree(0)
+    for target in range(graph.num_nodes):
+        path, costs = tree_path(dist, pred, target)
+        assert costs[-1] == pytest.approx(graph.search(0, target)[1][-1])
+
+
+def test_masks_hide_edges_without_changing_the_graph():
+    graph = CSRGraph.from_edges([(1, 2, 1), (2, 3, 1), (1, 3, 5)])
+    a, b, c = (graph.index[i] for i in (1, 2, 3))
+    weights = list(graph.weights)
+
+    assert graph.shortest_path(a, c) == (2.0, [a, b, c])
+    assert graph.shortest_path(a, c, banned_nodes={b}) == (5.0, [a, c])
+    assert graph.shortest_path(a, c, banned_edges=set(graph.half_edges(a, b))) == (5.0, [a, c])
+    assert graph.shortest_path(a, c, banned_nodes={c}) == (INF, [])
+    assert list(graph.weights) == weights
+
+
+def test_unreachable_target_has_no_path():
+    graph = CSRGraph.from_edges([(1, 2, 1)], coords={3: (0, 0)})
+    assert graph.search(graph.index[1], graph.index[3]) == ([], [])
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+
+from db import db
+from models import UserScheduleEntries
+from routes import directions
+
+DAY = datetime(2026, 3, 2)
+
+
+def _classes(user, *rows):
+    """``rows`` are ``(building, start hour, start minute, minutes long)``."""
+    for building, hour, minute, length in rows:
+        start = DAY.replace(hour=hour, minute=minute)
+        db.session.add(UserScheduleEntries(user_id=user.id, course_name=f"In {building}", building_name=building,
+                                           event_start_time=start, event_end_time=start + timedelta(minutes=length)))
+    db.session.commit()
+
+
+def _itinerary(client, user):
+    response = client.get(f"/api/route/itinerary?user_id={user.id}&date={DAY.date().isoformat()}")
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def test_legs_between_consecutive_classes(client, user, campus):
+    _classes(user, ("A", 9, 0, 50), ("d", 10, 0, 50), ("D", 10, 50, 30), ("A", 11, 20, 30))
+    body = _itinerary(client, user)
+
+    assert [entry["location_id"] for entry in body["entries"]] == [campus["A"], campus["D"], campus["D"], campus["A"]]
+    first, same, tight = body["legs"]
+    assert first["path"] == [campus["A"], campus["B"], campus["C"], campus["D"]]
+    assert first["distance"] == 30 and first["walk_minutes"] == 30 / 80 and first["feasible"]
+    assert same["distance"] == 0 and same["feasible"]
+    assert not tight["feasible"] and tight["reason"] == "not enough time to walk between classes"
+    assert body["infeasible_count"] == 1
+
+
+def test_unknown_building_is_reported(client, user, campus):
+    _classes(user, ("A", 9, 0, 50), ("Nowhere", 10, 0, 50))
+    leg = _itinerary(client, user)["legs"][0]
+    assert not leg["feasible"] and leg["reason"] == "building not found on the campus map"
+
+
+def test_other_days_are_left_out_and_matrix_is_cached(client, user, campus, monkeypatch):
+    _classes(user, ("A", 9, 0, 50), ("C", 10, 0, 50))
+    db.session.add(UserScheduleEntries(user_id=user.id, building_name="E", event_start_time=DAY - timedelta(hours=2),
+                                       event_end_time=DAY - timedelta(hours=1)))
+    db.session.commit()
+
+    searches = []
+    original = directions.routes_from_origins
+    monkeypatch.setattr(directions, "routes_from_origins",
+                        lambda *args, **kwargs: searches.append(1) or original(*args, **kwargs))
+
+    assert len(_itinerary(client, user)["entries"]) == 2
+    assert _itinerary(client, user)["legs"][0]["distance"] == 20
+    assert len(searches) == 1
+
+
+def test_invalid_requests(client, user):
+    assert client.get("/api/route/itinerary").status_code == 400
+    assert client.get(f"/api/route/itinerary?user_id={user.id}&date=March").status_code == 400
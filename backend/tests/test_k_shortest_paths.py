@@ -0,0 +1,60 @@
+import random
+
+import pytest
+
+from graph_engine import CSRGraph, k_shortest_paths
+
+
+def _simple_path_costs(graph, source, target):
+    """Every loopless path's cost, by brute force."""
+    costs = []
+
+    def walk(node, seen, cost):
+        if node == target:
+            costs.append(cost)
+            return
+        for e in range(graph.offsets[node], graph.offsets[node + 1]):
+            nbr = graph.neighbors[e]
+            if nbr not in seen:
+                walk(nbr, seen | {nbr}, cost + graph.weights[e])
+
+    walk(source, {source}, 0.0)
+    return sorted(costs)
+
+
+def test_paths_are_the_k_cheapest_loopless_ones():
+    rng = random.Random(11)
+    edges = [(i, i + 1, rng.randint(1, 9)) for i in range(1, 9)]
+    edges += [(rng.randint(1, 9), rng.randint(1, 9), rng.randint(1, 9)) for _ in range(8)]
+    graph = CSRGraph.from_edges([e for e in edges if e[0] != e[1]])
+    source, target = graph.index[1], graph.index[9]
+
+    routes = k_shortest_paths(graph, source, target, 6)
+    expected = _simple_path_costs(graph, source, target)[:6]
+    assert [cost for cost, _ in routes] == pytest.approx(expected)
+
+    paths = [tuple(path) for _, path in routes]
+    assert len(set(paths)) == len(paths)
+    for cost, path in routes:
+        assert len(set(path)) == len(path) and path[0] == source and path[-1] == target
+        assert graph.path_distance(path) == pytest.approx(cost)
+
+
+def test_fewer_paths_than_k_returns_them_all():
+    graph = CSRGraph.from_edges([(1, 2, 1), (2, 3, 1), (1, 3, 5)])
+    routes = k_shortest_paths(graph, graph.index[1], graph.index[3], 10)
+    assert [cost for cost, _ in routes] == [2.0, 5.0]
+
+
+def test_banned_edges_are_hidden_from_every_path():
+    graph = CSRGraph.from_edges([(1, 2, 1), (2, 3, 1), (1, 3, 5), (1, 4, 2), (4, 3, 2)])
+    a, b = graph.index[1], graph.index[2]
+    closed = set(graph.half_edges(a, b)) | set(graph.half_edges(b, a))
+    routes = k_shortest_paths(graph, a, graph.index[3], 3, banned_edges=closed)
+    assert [graph.to_ids(path) for _, path in routes] == [[1, 4, 3], [1, 3]]
+
+
+def test_route_endpoint_returns_alternatives_in_cost_order(client, campus):
+    body = client.get(f"/api/route/?start={campus['A']}&end={campus['D']}&k=3&algorithm=dijkstra").get_json()
+    assert [route["cost"] for route in body["routes"]] == [30, 80, 85]
+    assert body["count"] == 3
@@ -0,0 +1,61 @@
+import gzip
+import json
+
+from db import db
+from models import Location
+from query_budget import QueryCounter
+
+
+def test_listing_is_served_from_cache_with_an_etag(client, campus):
+    first = client.get("/api/locations/")
+    assert first.status_code == 200 and first.headers["Cache-Control"] == "no-cache"
+    assert [loc["name"] for loc in first.get_json()] == list("ABCDE")
+
+    with QueryCounter() as counter:
+        again = client.get("/api/locations/")
+    assert again.get_data() == first.get_data() and again.headers["ETag"] == first.headers["ETag"]
+    assert not any("FROM locations" in statement for statement in counter.statements)
+
+
+def test_matching_etag_gets_304_and_a_write_changes_it(client, campus):
+    etag = client.get("/api/locations/").headers["ETag"]
+    not_modified = client.get("/api/locations/", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304 and not_modified.get_data() == b""
+
+    db.session.add(Location(name="F", x=1, y=1))
+    db.session.commit()
+    changed = client.get("/api/locations/", headers={"If-None-Match": etag})
+    assert changed.status_code == 200 and changed.headers["ETag"] != etag
+    assert len(changed.get_json()) == 6
+
+
+def test_gzip_is_sent_when_accepted(client, campus):
+    plain = client.get("/api/locations/")
+    zipped = client.get("/api/locations/", headers={"Accept-Encoding": "gzip"})
+    assert zipped.headers["Content-Encoding"] == "gzip"
+    assert gzip.decompress(zipped.get_data()) == plain.get_data()
+    assert zipped.headers["ETag"] == plain.headers["ETag"]
+
+
+def test_bbox_filter_and_cursor_pages(client, campus):
+    body = client.get("/api/locations/?bbox=5,-1,25,1").get_json()
+    assert [loc["name"] for loc in body["locations"]] == ["B", "C"]
+
+    names, cursor = [], ""
+    while True:
+        page = client.get(f"/api/locations/?limit=2{cursor}").get_json()
+        names += [loc["name"] for loc in page["locations"]]
+        if not page["next_cursor"]:
+            break
+        cursor = f"&cursor={page['next_cursor']}"
+    assert names == list("ABCDE")
+
+    assert client.get("/api/locations/?bbox=1,2,3").status_code == 400
+    assert client.get("/api/locations/?limit=2&cursor=junk").status_code == 400
+
+
+def test_page_etags_revalidate(client, campus):
+    first = client.get("/api/locations/?limit=2")
+    repeat = client.get("/api/locations/?limit=2", headers={"If-None-Match": first.headers["ETag"]})
+    assert repeat.status_code == 304
+    assert json.loads(first.get_data())["next_cursor"]
@@ -0,0 +1,58 @@
+import logging
+
+import pytest
+
+from db import db
+from models import Location, SavedItem, UserRecentSearches
+from query_budget import QueryBudgetExceeded, QueryCounter, assert_max_queries, query_budget
+
+
+def _two_queries():
+    db.session.query(Location).count()
+    db.session.query(SavedItem).count()
+    return "done"
+
+
+def test_decorator_raises_logs_or_stays_off(app, caplog):
+    with pytest.raises(QueryBudgetExceeded, match="ran 2 queries"):
+        query_budget(1, mode="raise")(_two_queries)()
+
+    with caplog.at_level(logging.WARNING, logger="query_budget"):
+        assert query_budget(1, mode="log")(_two_queries)() == "done"
+    assert "budget 1" in caplog.text
+
+    assert query_budget(1, mode="off")(_two_queries)() == "done"
+    assert query_budget(2, mode="raise")(_two_queries)() == "done"
+
+
+def test_counters_nest(app):
+    with QueryCounter() as outer:
+        with assert_max_queries(2) as inner:
+            _two_queries()
+        db.session.query(Location).count()
+    assert (outer.count, inner.count) == (3, 2)
+
+
+def test_saved_items_list_does_not_grow_with_items(client, user, campus):
+    for i in range(30):
+        db.session.add(SavedItem(user_id=user.id, item_type="location", name=f"Item {i}",
+                                 location_id=campus["ABCDE"[i % 5]], tags=[f"t{i % 4}", "all"],
+                                 item_metadata='{"semester": "Fall 2024"}'))
+    db.session.commit()
+
+    with QueryCounter() as counter:
+        items = client.get(f"/api/saved-items/?user_id={user.id}").get_json()
+    assert len(items) == 30 and all(item["location"]["name"] for item in items)
+    assert counter.count <= 4
+
+
+def test_recent_searches_join_their_locations(client, user, campus):
+    for i in range(10):
+        db.session.add(UserRecentSearches(user_id=user.id, search_term=f"term {i}",
+                                          resolved_location_id=campus["ABCDE"[i % 5]]))
+    db.session.commit()
+
+    with QueryCounter() as counter:
+        searches = client.get(f"/api/user/recent-searches?user_id={user.id}").get_json()
+    assert len(searches) == 10 and all("location" in search for search in searches)
+    assert counter.count <= 2
@@ -0,0 +1,27 @@
+def _reachable(client, start, budget, extra=""):
+    return client.get(f"/api/route/reachable?start={start}&budget={budget}{extra}")
+
+
+def test_locations_within_budget_with_distances(client, campus):
+    body = _reachable(client, campus["A"], 25).get_json()
+    assert [(loc["name"], loc["distance"]) for loc in body["locations"]] == [("A", 0), ("B", 10), ("C", 20)]
+    assert body["count"] == 3
+
+
+def test_budget_is_inclusive_and_uses_shortest_distances(client, campus):
+    body = _reachable(client, campus["A"], 40).get_json()
+    distances = {loc["name"]: loc["distance"] for loc in body["locations"]}
+    assert distances == {"A": 0, "B": 10, "C": 20, "D": 30, "E": 40}
+
+
+def test_closures_shrink_the_reachable_set(client, campus):
+    client.post("/api/closures/", json={"edges": [[campus["B"], campus["C"]]]})
+    names = [loc["name"] for loc in _reachable(client, campus["A"], 30).get_json()["locations"]]
+    assert names == ["A", "B"]
+
+
+def test_invalid_requests(client, campus):
+    assert _reachable(client, campus["A"], -1).status_code == 400
+    assert client.get(f"/api/route/reachable?start={campus['A']}").status_code == 400
+    assert _reachable(client, 999, 10).status_code == 404
+    assert _reachable(client, campus["A"], 10, "&profile=flying").status_code == 400
@@ -0,0 +1,77 @@
+from datetime import datetime, timedelta
+
+from flask import Flask
+
+import recent_history
+from db import db
+from models import UserRecentSearches
+from query_budget import QueryCounter
+from routes.maps import RecentSearch
+
+
+def _add(client, user, term):
+    return client.post("/api/user/recent-searches", json={"user_id": user.id, "search_term": term})
+
+
+def test_repeat_is_refreshed_by_one_statement(client, user, campus):
+    first = _add(client, user, "Library")
+    assert first.status_code == 200 and first.get_json()["message"] == "Recent search saved"
+
+    user_id, location_id = user.id, campus["B"]
+    with QueryCounter() as counter:
+        recent_history.record_search(UserRecentSearches, user_id, "Library", resolved_location_id=location_id)
+    assert counter.count == 1
+    db.session.commit()
+
+    again = _add(client, user, "Library")
+    assert again.get_json()["id"] == first.get_json()["id"]
+    row = UserRecentSearches.query.one()
+    assert row.resolved_location_id == location_id
+
+
+def test_repeated_term_moves_to_the_top(client, user):
+    for term in ("Library", "Gym", "Cafe"):
+        _add(client, user, term)
+    old = datetime.utcnow() - timedelta(hours=1)
+    UserRecentSearches.query.update({"timestamp": old})
+    db.session.commit()
+    _add(client, user, "Library")
+
+    searches = client.get(f"/api/user/recent-searches?user_id={user.id}").get_json()
+    assert searches[0]["search_term"] == "Library" and len(searches) == 3
+
+
+def test_compact_keeps_each_users_newest(app, user):
+    now = datetime.utcnow()
+    for user_id in (user.id, user.id + 1):
+        for i in range(5):
+            db.session.add(UserRecentSearches(user_id=user_id, search_term=f"term {i}",
+                                              timestamp=now - timedelta(minutes=i)))
+            db.session.add(RecentSearch(user_id=user_id, destination=f"place {i}",
+                                        timestamp=now - timedelta(minutes=i)))
+    db.session.commit()
+
+    assert recent_history.compact(limit=2) == 12
+    kept = UserRecentSearches.query.filter_by(user_id=user.id).all()
+    assert sorted(search.search_term for search in kept) == ["term 0", "term 1"]
+    assert RecentSearch.query.count() == 4
+
+
+def test_first_request_starts_compaction_when_configured(app, monkeypatch):
+    import app as app_module
+    started = []
+    monkeypatch.setattr(app_module, "start_compaction", lambda app, interval: started.append(interval))
+
+    app.test_client().get("/")
+    assert started == []
+
+    app.config["RECENT_SEARCH_COMPACT_SECONDS"] = 60
+    app.test_client().get("/")
+    assert started == [60]
+
+
+def test_compaction_thread_starts_once_per_app():
+    other = Flask(__name__)
+    first = recent_history.start_compaction(other, 3600)
+    assert recent_history.start_compaction(other, 3600) is first
+    assert first.daemon and first.is_alive()
@@ -0,0 +1,58 @@
+from db import db
+from models import Path
+from route_cache import RouteCache
+
+
+def test_lru_evicts_least_recently_used_within_byte_budget():
+    cache = RouteCache(max_bytes=30)
+    cache.put("a", "x" * 8)     # 10 bytes of JSON each
+    cache.put("b", "y" * 8)
+    cache.put("c", "z" * 8)
+    assert cache.get("a") == "x" * 8     # a is now the most recent
+    cache.put("d", "w" * 8)
+
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("d") is not None
+    assert cache.stats()["bytes"] <= 30 and cache.stats()["evictions"] == 1
+
+
+def test_oversized_values_are_not_cached():
+    cache = RouteCache(max_bytes=5)
+    cache.put("a", "too long for the budget")
+    assert cache.get("a") is None
+
+
+def test_invalidate_drops_only_tagged_entries():
+    cache = RouteCache(max_bytes=1000)
+    cache.put("ab", 1, tags={("edge", 1, 2)})
+    cache.put("cd", 2, tags={("edge", 3, 4)})
+    assert cache.invalidate([("edge", 1, 2)]) == 1
+    assert cache.get("ab") is None and cache.get("cd") == 2
+
+
+def test_repeat_request_is_served_from_cache(client, campus):
+    url = f"/api/route/?start={campus['A']}&end={campus['D']}&k=2&algorithm=dijkstra"
+    first = client.get(url).get_json()
+    second = client.get(url).get_json()
+    assert first["cached"] is False and second["cached"] is True
+    assert second["routes"] == first["routes"]
+
+
+def test_cache_key_includes_algorithm(client, campus):
+    base = f"/api/route/?start={campus['A']}&end={campus['D']}&k=1"
+    dijkstra = client.get(base + "&algorithm=dijkstra").get_json()
+    astar = client.get(base + "&algorithm=astar").get_json()
+
+    assert dijkstra["algorithm"] == "dijkstra"
+    assert astar["algorithm"] == "astar" and astar["cached"] is False
+    assert astar["routes"][0]["path"] == dijkstra["routes"][0]["path"]
+
+
+def test_graph_change_makes_old_entries_unreachable(client, campus):
+    url = f"/api/route/?start={campus['A']}&end={campus['D']}&k=1&algorithm=dijkstra"
+    client.get(url)
+    db.session.add(Path(start_id=campus["A"], end_id=campus["D"], distance=1))
+    db.session.commit()
+
+    body = client.get(url).get_json()
+    assert body["cached"] is False and body["routes"][0]["cost"] == 1
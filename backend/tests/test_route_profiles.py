@@ -0,0 +1,46 @@
+from db import db
+from models import Path, UserPreferences
+
+
+def _stairs_between(campus, a, b):
+    path = Path.query.filter_by(start_id=campus[a], end_id=campus[b]).one()
+    path.stairs = True
+    db.session.commit()
+
+
+def _routes(client, campus, extra=""):
+    url = f"/api/route/?start={campus['A']}&end={campus['D']}&k=3{extra}"
+    return client.get(url).get_json()
+
+
+def test_accessible_profile_never_uses_stairs(client, campus):
+    _stairs_between(campus, "B", "C")
+    body = _routes(client, campus, "&profile=accessible&algorithm=dijkstra")
+    assert body["profile"] == "accessible"
+    for route in body["routes"]:
+        assert [campus["B"], campus["C"]] != route["path"][1:3]
+    assert body["routes"][0]["path"] == [campus["A"], campus["E"], campus["D"]]
+    assert all(route["cost"] != float("inf") for route in body["routes"])
+
+
+def test_fastest_profile_weighs_stairs_but_reports_real_distance(client, campus):
+    _stairs_between(campus, "B", "C")
+    route = _routes(client, campus, "&profile=fastest&algorithm=dijkstra")["routes"][0]
+    assert route["path"] == [campus["A"], campus["B"], campus["C"], campus["D"]]
+    assert route["cost"] == 40 and route["distance"] == 30
+
+
+def test_user_preference_is_the_default_profile(client, user, campus):
+    _stairs_between(campus, "B", "C")
+    db.session.add(UserPreferences(user_id=user.id, route_preference="accessible"))
+    db.session.commit()
+
+    body = _routes(client, campus, f"&user_id={user.id}")
+    assert body["profile"] == "accessible" and body["algorithm"] == "dijkstra"
+    assert body["routes"][0]["cost"] == 80
+    assert _routes(client, campus, f"&user_id={user.id}&profile=shortest")["routes"][0]["cost"] == 30
+
+
+def test_unknown_profile_is_rejected(client, campus):
+    url = f"/api/route/?start={campus['A']}&end={campus['D']}&profile=flying"
+    assert client.get(url).status_code == 400
@@ -0,0 +1,39 @@
+from db import db
+from models import Location
+from query_budget import QueryCounter
+
+
+def _route(client, campus, k=1):
+    url = f"/api/route/?start={campus['A']}&end={campus['D']}&k={k}&algorithm=dijkstra"
+    return client.get(url).get_json()["routes"]
+
+
+def test_steps_and_legs_describe_the_path(client, campus):
+    route = _route(client, campus)[0]
+    assert route["steps"] == ["Start at A", "Walk to B", "Walk to C", "Walk to D"]
+    assert [(leg["name"], leg["distance"], leg["turn"]) for leg in route["legs"]] == [
+        ("B", 10, None), ("C", 10, "straight"), ("D", 10, "straight")
+    ]
+
+
+def test_turn_hints_follow_the_coordinates(client, campus):
+    url = f"/api/route/?start={campus['C']}&end={campus['A']}&k=3&algorithm=dijkstra"
+    detour = next(r for r in client.get(url).get_json()["routes"]
+                  if r["path"] == [campus["C"], campus["B"], campus["E"], campus["A"]])
+    # Heading west along the top, then up-right to E and back down-left to A
+    assert [leg["turn"] for leg in detour["legs"]] == [None, "turn right", "turn around"]
+
+
+def test_route_names_come_from_the_location_table(client, campus):
+    _route(client, campus)     # loads the graph and the location table
+    with QueryCounter() as counter:
+        routes = _route(client, campus, k=3)
+    assert len(routes) == 3
+    assert not any("FROM locations" in statement for statement in counter.statements)
+
+
+def test_renamed_location_shows_up_in_steps(client, campus):
+    _route(client, campus)
+    db.session.get(Location, campus["B"]).name = "Library"
+    db.session.commit()
+    assert _route(client, campus)[0]["steps"][1] == "Walk to Library"
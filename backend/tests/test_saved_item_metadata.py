@@ -0,0 +1,52 @@
+from db import db
+from conftest import load_migration
+from models import SavedItem
+
+
+def _save(client, user, name, metadata):
+    response = client.post("/api/saved-items/", json={"user_id": user.id, "name": name, "metadata": metadata})
+    assert response.status_code == 201
+    return response.get_json()["id"]
+
+
+def _names(client, user, query):
+    response = client.get(f"/api/saved-items/?user_id={user.id}{query}")
+    assert response.status_code == 200
+    return sorted(item["name"] for item in response.get_json())
+
+
+def test_promoted_keys_are_copied_to_columns(client, user):
+    item_id = _save(client, user, "Networks", {"semester": "Fall 2024", "credits": "3", "room": "KHE-120"})
+    item = db.session.get(SavedItem, item_id)
+    assert (item.semester, item.credits) == ("Fall 2024", 3.0)
+
+    client.put(f"/api/saved-items/{item_id}", json={"metadata": {"credits": [1]}})
+    db.session.expire_all()
+    item = db.session.get(SavedItem, item_id)
+    assert (item.semester, item.credits) == (None, None)
+    assert item.parsed_metadata == {"credits": [1]}
+
+
+def test_filters_use_the_promoted_columns(client, user):
+    _save(client, user, "One", {"semester": "Fall 2024", "credits": 3})
+    _save(client, user, "Two", {"semester": "Fall 2024", "credits": 0.5})
+    _save(client, user, "Three", {"semester": "Winter 2025", "credits": 3})
+    _save(client, user, "Four", {})
+
+    assert _names(client, user, "&semester=Fall 2024") == ["One", "Two"]
+    assert _names(client, user, "&credits=3") == ["One", "Three"]
+    assert _names(client, user, "&semester=Fall 2024&credits=3.0") == ["One"]
+    assert client.get(f"/api/saved-items/?user_id={user.id}&credits=three").status_code == 400
+
+
+def test_metadata_is_returned_as_stored(client, user):
+    _save(client, user, "One", {"semester": "Fall 2024", "notes": {"exam": "Dec 10"}})
+    item = client.get(f"/api/saved-items/?user_id={user.id}").get_json()[0]
+    assert item["metadata"] == {"semester": "Fall 2024", "notes": {"exam": "Dec 10"}}
+
+
+def test_migration_backfill_converts_like_the_model():
+    migration = load_migration("f18b3c6d2e47")
+    assert migration._value(float, "3") == 3.0
+    assert migration._value(float, "three") is None
+    assert migration._value(str, {"term": 1}) is None
@@ -0,0 +1,109 @@
+import random
+
+import pytest
+from sqlalchemy import event, insert
+
+from db import db
+from models import SavedItem
+from rank_keys import DIGITS, key_between, spread_keys
+
+
+def _save(client, user, name):
+    response = client.post("/api/saved-items/", json={"user_id": user.id, "name": name})
+    assert response.status_code == 201
+    return response.get_json()["id"]
+
+
+def _ranked(client, user):
+    items = client.get(f"/api/saved-items/?user_id={user.id}&sort_by=rank").get_json()
+    return [item["name"] for item in items]
+
+
+def test_keys_sort_between_their_bounds():
+    rng = random.Random(3)
+    keys = [key_between()]
+    for _ in range(500):
+        i = rng.randint(0, len(keys))
+        before = keys[i - 1] if i else None
+        after = keys[i] if i < len(keys) else None
+        key = key_between(before, after)
+        assert (before is None or before < key) and (after is None or key < after)
+        keys.insert(i, key)
+    assert keys == sorted(keys) == sorted(keys, key=str.lower)
+    assert len(set(keys)) == len(keys)
+
+
+def test_keys_use_one_case_only():
+    assert DIGITS == "".join(sorted(DIGITS)) and DIGITS == DIGITS.lower()
+    keys = spread_keys(1000)
+    assert keys == sorted(keys) and len(set(keys)) == 1000
+
+
+def test_invalid_bounds_are_rejected():
+    for before, after in (("b", "a"), ("a", "a"), ("A", None), ("a0", None)):
+        with pytest.raises(ValueError):
+            key_between(before, after)
+
+
+def test_new_items_go_last_and_moves_write_one_row(client, user):
+    ids = {name: _save(client, user, name) for name in "ABCD"}
+    assert _ranked(client, user) == list("ABCD")
+
+    response = client.put(f"/api/saved-items/{ids['D']}/move", json={"after_id": ids["A"]})
+    assert response.status_code == 200
+    assert _ranked(client, user) == list("ADBC")
+
+    client.put(f"/api/saved-items/{ids['A']}/move", json={"before_id": ids["C"]})
+    assert _ranked(client, user) == list("DBAC")
+    assert client.put(f"/api/saved-items/{ids['A']}/move", json={}).status_code == 400
+    assert client.put(f"/api/saved-items/{ids['A']}/move",
+                      json={"after_id": ids["C"], "before_id": ids["D"]}).status_code == 409
+
+
+def test_two_moves_to_the_same_spot_get_distinct_keys(client, user):
+    ids = {name: _save(client, user, name) for name in "ABCD"}
+    between = {"after_id": ids["A"], "before_id": ids["B"]}
+    first = client.put(f"/api/saved-items/{ids['C']}/move", json=between).get_json()["custom_rank"]
+    second = client.put(f"/api/saved-items/{ids['D']}/move", json=between)
+
+    assert second.status_code == 200
+    assert second.get_json()["custom_rank"] != first
+    assert _ranked(client, user) == list("ADCB")
+
+
+def test_rank_collision_with_a_concurrent_insert_is_retried(client, user):
+    _save(client, user, "A")
+    stolen = []
+
+    # Commit the key this request just picked from another connection, as a
+    # concurrent request allocating from the same MAX would
+    def steal(session, flush_context, instances):
+        for obj in session.new:
+            if isinstance(obj, SavedItem) and obj.custom_rank and not stolen:
+                stolen.append(obj.custom_rank)
+                with db.engine.begin() as connection:
+                    connection.execute(insert(SavedItem.__table__).values(
+                        user_id=user.id, item_type="location", name="Other", custom_rank=obj.custom_rank
+                    ))
+
+    event.listen(db.session, "before_flush", steal)
+    try:
+        item_id = _save(client, user, "B")
+    finally:
+        event.remove(db.session, "before_flush", steal)
+
+    item = db.session.get(SavedItem, item_id)
+    assert stolen and item.custom_rank > stolen[0]
+    assert _ranked(client, user) == ["A", "Other", "B"]
+
+
+def test_reorder_sets_custom_order_for_the_users_items(client, user):
+    ids = [_save(client, user, name) for name in "ABC"]
+    orders = [{"id": ids[0], "order": 3}, {"id": ids[1], "order": 1}, {"id": ids[2], "order": 2}]
+    body = client.put("/api/saved-items/reorder", json={"user_id": user.id, "orders": orders}).get_json()
+    assert body["updated"] == 3
+
+    items = client.get(f"/api/saved-items/?user_id={user.id}&sort_by=custom").get_json()
+    assert [item["name"] for item in items] == ["B", "C", "A"]
+    bad = client.put("/api/saved-items/reorder", json={"user_id": user.id, "orders": [{"id": "x"}]})
+    assert bad.status_code == 400
@@ -0,0 +1,54 @@
+import pytest
+
+from db import db
+from models import SavedItem
+
+
+@pytest.fixture
+def items(app, user):
+    rows = [("Lab", "Smith", "CPS845"), ("Lab", None, "CPS510"), ("Cafe", "Jones", None),
+            ("Gym", None, None), ("Atrium", "Smith", "CPS845"), ("Lab", "Adams", "CPS109")]
+    for i, (name, professor, code) in enumerate(rows):
+        db.session.add(SavedItem(user_id=user.id, item_type="location", name=name,
+                                 professor_name=professor, course_code=code, custom_order=i % 3))
+    db.session.commit()
+    return user
+
+
+def _pages(client, user, sort_by, order, limit):
+    ids, cursor, pages = [], "", 0
+    while True:
+        body = client.get(f"/api/saved-items/?user_id={user.id}&sort_by={sort_by}&order={order}"
+                          f"&limit={limit}{cursor}").get_json()
+        ids += [item["id"] for item in body["items"]]
+        pages += 1
+        if not body["next_cursor"]:
+            return ids, pages
+        cursor = f"&cursor={body['next_cursor']}"
+
+
+@pytest.mark.parametrize("sort_by", ["name", "professor", "course_code", "created_at", "custom", "rank"])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_pages_walk_the_full_list_in_order(client, items, sort_by, order):
+    everything = client.get(f"/api/saved-items/?user_id={items.id}&sort_by={sort_by}&order={order}").get_json()
+    ids, pages = _pages(client, items, sort_by, order, limit=2)
+    assert ids == [item["id"] for item in everything]
+    assert pages == 3
+
+
+def test_rows_added_mid_walk_do_not_repeat_or_shift_pages(client, items):
+    first = client.get(f"/api/saved-items/?user_id={items.id}&sort_by=name&limit=3").get_json()
+    db.session.add(SavedItem(user_id=items.id, item_type="location", name="Aardvark"))
+    db.session.commit()
+
+    rest = client.get(f"/api/saved-items/?user_id={items.id}&sort_by=name&limit=10"
+                      f"&cursor={first['next_cursor']}").get_json()
+    seen = [item["id"] for item in first["items"] + rest["items"]]
+    assert len(seen) == len(set(seen)) == 6
+
+
+def test_bad_cursors_are_rejected(client, items):
+    first = client.get(f"/api/saved-items/?user_id={items.id}&sort_by=name&limit=2").get_json()
+    other_sort = client.get(f"/api/saved-items/?user_id={items.id}&sort_by=professor&cursor={first['next_cursor']}")
+    assert other_sort.status_code == 400
+    assert client.get(f"/api/saved-items/?user_id={items.id}&cursor=%%%").status_code == 400
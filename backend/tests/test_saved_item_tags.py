@@ -0,0 +1,68 @@
+from db import db
+from conftest import load_migration
+from models import SavedItem, SavedItemTag
+
+
+def _save(client, user, name, tags):
+    response = client.post("/api/saved-items/", json={"user_id": user.id, "name": name, "tags": tags})
+    assert response.status_code == 201
+    return response.get_json()["id"]
+
+
+def _names(client, user, query=""):
+    response = client.get(f"/api/saved-items/?user_id={user.id}{query}")
+    assert response.status_code == 200
+    return sorted(item["name"] for item in response.get_json())
+
+
+def test_tags_keep_their_case_and_drop_repeats(client, user):
+    item_id = _save(client, user, "Lab", "CPS845, Lab ,CPS845,,lab")
+    assert db.session.get(SavedItem, item_id).tags == ["CPS845", "Lab", "lab"]
+
+
+def test_over_long_tags_are_rejected(client, user):
+    long_tag = "x" * 51
+    response = client.post("/api/saved-items/", json={"user_id": user.id, "name": "A", "tags": [long_tag]})
+    assert response.status_code == 400
+    assert SavedItem.query.count() == 0
+
+    item_id = _save(client, user, "B", ["x" * 50])
+    assert client.put(f"/api/saved-items/{item_id}", json={"tags": ["ok", long_tag]}).status_code == 400
+    assert db.session.get(SavedItem, item_id).tags == ["x" * 50]
+    assert client.get(f"/api/saved-items/?user_id={user.id}&tags={long_tag}").status_code == 400
+
+
+def test_filter_by_any_or_all_tags(client, user):
+    _save(client, user, "One", ["exam", "Math"])
+    _save(client, user, "Two", ["exam"])
+    _save(client, user, "Three", ["Math"])
+
+    assert _names(client, user, "&tags=exam,Math") == ["One", "Three", "Two"]
+    assert _names(client, user, "&tags=exam,Math&tag_mode=all") == ["One"]
+    assert _names(client, user, "&tags=math") == []
+    assert client.get(f"/api/saved-items/?user_id={user.id}&tags=a&tag_mode=some").status_code == 400
+
+
+def test_updating_tags_keeps_unchanged_rows(client, user):
+    item_id = _save(client, user, "One", ["a", "b"])
+    kept = SavedItemTag.query.filter_by(item_id=item_id, tag="a").one().id
+
+    client.put(f"/api/saved-items/{item_id}", json={"tags": ["a", "c"]})
+    rows = {row.tag: row.id for row in SavedItemTag.query.filter_by(item_id=item_id)}
+    assert set(rows) == {"a", "c"} and rows["a"] == kept
+
+
+def test_tag_counts_are_per_user(client, user):
+    _save(client, user, "One", ["exam", "Math"])
+    _save(client, user, "Two", ["exam"])
+    other = client.post("/api/saved-items/", json={"user_id": user.id + 1, "name": "X", "tags": ["exam"]})
+    assert other.status_code == 201
+
+    counts = client.get(f"/api/saved-items/tags?user_id={user.id}").get_json()
+    assert counts == [{"tag": "exam", "count": 2}, {"tag": "Math", "count": 1}]
+
+
+def test_migration_keeps_existing_tags_as_stored():
+    migration = load_migration("c4d81e7a9f36")
+    long_tag = "Y" * 80
+    assert migration._split(f"Exam, exam,,{long_tag},Exam") == ["Exam", "exam", long_tag]
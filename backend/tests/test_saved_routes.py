@@ -0,0 +1,126 @@
+import json
+import time
+
+from sqlalchemy.engine import Connection
+
+from db import db
+from models import Path, SavedRoute
+from routes import saved_routes
+from routes.saved_routes import route_usage
+from usage_counter import UsageCounter
+
+
+def _save(client, user, campus):
+    response = client.post("/api/saved-routes/", json={
+        "user_id": user.id, "name": "To D", "start": campus["A"], "end": campus["D"]
+    })
+    assert response.status_code == 201
+    return response.get_json()["id"]
+
+
+def test_open_reuses_stored_route_and_counts_use(client, user, campus):
+    route_id = _save(client, user, campus)
+    stored = json.loads(db.session.get(SavedRoute, route_id).route_data)
+
+    body = client.get(f"/api/saved-routes/{route_id}").get_json()
+    assert body["recomputed"] is False and body["route"] == stored
+    assert body["use_count"] == 1 and body["last_used"] is not None
+
+    client.get(f"/api/saved-routes/{route_id}")
+    listed = client.get(f"/api/saved-routes/?user_id={user.id}").get_json()
+    assert listed[0]["use_count"] == 2
+
+    route_usage.flush()
+    db.session.expire_all()
+    assert db.session.get(SavedRoute, route_id).use_count == 2
+    assert route_usage.pending(route_id) == (0, None)
+
+
+def test_open_counts_uses_flushed_by_the_open_itself(client, user, campus, monkeypatch):
+    route_id = _save(client, user, campus)
+    monkeypatch.setattr(saved_routes, "route_usage", UsageCounter(SavedRoute, batch_size=1, interval=3600))
+
+    counts = [client.get(f"/api/saved-routes/{route_id}").get_json()["use_count"] for _ in range(3)]
+    db.session.expire_all()
+    assert counts == [1, 2, 3] and db.session.get(SavedRoute, route_id).use_count == 3
+
+
+def test_routes_saved_before_profiles_open_with_the_default(client, user, campus):
+    route = SavedRoute(user_id=user.id, start_location_id=campus["A"], end_location_id=campus["D"])
+    db.session.add(route)
+    db.session.commit()
+
+    body = client.get(f"/api/saved-routes/{route.id}").get_json()
+    assert body["profile"] == "shortest" and body["route"]["routes"][0]["cost"] == 30
+
+
+def test_graph_change_recomputes_the_stored_route(client, user, campus):
+    route_id = _save(client, user, campus)
+    db.session.add(Path(start_id=campus["A"], end_id=campus["D"], distance=5))
+    db.session.commit()
+
+    body = client.get(f"/api/saved-routes/{route_id}").get_json()
+    assert body["recomputed"] is True and body["route"]["routes"][0]["cost"] == 5
+    assert json.loads(db.session.get(SavedRoute, route_id).route_data)["routes"][0]["cost"] == 5
+
+
+def test_closure_detours_without_overwriting_the_stored_route(client, user, campus):
+    route_id = _save(client, user, campus)
+    client.post("/api/closures/", json={"edges": [[campus["B"], campus["C"]]]})
+
+    body = client.get(f"/api/saved-routes/{route_id}").get_json()
+    assert body["recomputed"] is True and body["route"]["routes"][0]["cost"] == 80
+    assert json.loads(db.session.get(SavedRoute, route_id).route_data)["routes"][0]["cost"] == 30
+
+
+def test_pending_uses_are_flushed_by_the_timer(app, user, campus):
+    route = SavedRoute(user_id=user.id, start_location_id=campus["A"], end_location_id=campus["D"])
+    db.session.add(route)
+    db.session.commit()
+
+    counter = UsageCounter(SavedRoute, batch_size=100, interval=0.05)
+    try:
+        counter.record(route.id)
+        counter.record(route.id)
+        deadline = time.monotonic() + 5
+        while counter.pending(route.id) != (0, None) and time.monotonic() < deadline:
+            time.sleep(0.01)
+    finally:
+        counter.close()
+
+    db.session.expire_all()
+    assert db.session.get(SavedRoute, route.id).use_count == 2
+
+
+def test_close_writes_pending_uses(app, user, campus):
+    route = SavedRoute(user_id=user.id, start_location_id=campus["A"], end_location_id=campus["D"])
+    db.session.add(route)
+    db.session.commit()
+
+    counter = UsageCounter(SavedRoute, batch_size=100, interval=3600)
+    counter.record(route.id)
+    counter.close()
+
+    db.session.expire_all()
+    assert db.session.get(SavedRoute, route.id).use_count == 1
+
+
+
+def test_uses_being_written_are_still_pending(app, user, campus, monkeypatch):
+    route = SavedRoute(user_id=user.id, start_location_id=campus["A"], end_location_id=campus["D"])
+    db.session.add(route)
+    db.session.commit()
+
+    counter = UsageCounter(SavedRoute, batch_size=100, interval=3600)
+    counter.record(route.id)
+    seen = []
+    execute = Connection.execute
+
+    def spy(connection, statement, *args, **kwargs):
+        if statement is counter._statement:
+            seen.append(counter.pending(route.id)[0])
+        return execute(connection, statement, *args, **kwargs)
+
+    monkeypatch.setattr(Connection, "execute", spy)
+    counter.flush()
+    assert seen == [1] and counter.pending(route.id) == (0, None)
@@ -0,0 +1,64 @@
+import math
+import random
+
+import pytest
+
+from config import CAMPUS_ORIGIN
+from db import db
+from models import Location
+from spatial_index import KDTree, to_xy
+
+
+def _points(n, seed):
+    rng = random.Random(seed)
+    return [(rng.uniform(0, 500), rng.uniform(0, 500), i) for i in range(1, n + 1)]
+
+
+def _by_distance(points, x, y):
+    return sorted((math.hypot(px - x, py - y), i) for px, py, i in points)
+
+
+def test_nearest_within_and_in_box_match_brute_force():
+    points = _points(400, seed=9)
+    tree = KDTree(points + [(None, 5.0, 999)])
+    assert len(tree) == 400
+
+    rng = random.Random(1)
+    for _ in range(25):
+        x, y = rng.uniform(-50, 550), rng.uniform(-50, 550)
+        ranked = _by_distance(points, x, y)
+        nearest = tree.nearest(x, y, 5)
+        assert [i for _, i in nearest] == [i for _, i in ranked[:5]]
+        assert [d for d, _ in nearest] == pytest.approx([d for d, _ in ranked[:5]])
+        assert [i for _, i in tree.within(x, y, 60)] == [i for d, i in ranked if d <= 60]
+        box = (x - 40, y - 30, x + 40, y + 30)
+        inside = {i for px, py, i in points if box[0] <= px <= box[2] and box[1] <= py <= box[3]}
+        assert set(tree.in_box(*box)) == inside
+
+
+def test_nearest_honours_the_accept_filter():
+    tree = KDTree([(0, 0, 1), (1, 0, 2), (5, 0, 3)])
+    assert tree.nearest(0, 0, 1, accept=lambda i: i != 1) == [(1.0, 2)]
+    assert KDTree([]).nearest(0, 0, 3) == []
+
+
+def test_to_xy_is_metres_from_the_campus_origin():
+    assert to_xy(*CAMPUS_ORIGIN) == (0.0, 0.0)
+    east, north = to_xy(CAMPUS_ORIGIN[0] + 0.001, CAMPUS_ORIGIN[1])
+    assert east == pytest.approx(0.0) and north == pytest.approx(111.19, rel=1e-3)
+
+
+def test_nearest_endpoint(client, campus):
+    body = client.get("/api/locations/nearest?x=9&y=1&k=2").get_json()
+    assert [loc["name"] for loc in body["locations"]] == ["B", "A"]
+    assert client.get("/api/locations/nearest?x=a&y=1").status_code == 400
+    assert client.get("/api/locations/nearest").status_code == 400
+
+
+def test_route_snaps_coordinates_to_locations_on_the_graph(client, campus):
+    # F sits right at the start point but has no paths, so B is chosen
+    db.session.add(Location(name="F", x=9, y=1))
+    db.session.commit()
+    body = client.get("/api/route/?start_x=9&start_y=1&end=%d&k=1&algorithm=dijkstra" % campus["D"]).get_json()
+    assert body["snapped"] == {"start": campus["B"], "end": campus["D"]}
+    assert body["routes"][0]["cost"] == 20
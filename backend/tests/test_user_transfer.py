@@ -0,0 +1,94 @@
+import json
+
+from sqlalchemy.exc import SQLAlchemyError
+
+import user_transfer
+from db import db
+from models import SavedItem, User, UserSavedLocations, UserScheduleEntries
+
+
+def _ndjson(*records):
+    return "".join(json.dumps(record) + "\n" for record in records)
+
+
+def _import(client, user, body):
+    response = client.post(f"/api/user/import?user_id={user.id}", data=body,
+                           content_type="application/x-ndjson")
+    assert response.status_code == 200
+    return response.get_json()
+
+
+def _items(user):
+    items = SavedItem.query.filter_by(user_id=user.id).order_by(SavedItem.custom_rank).all()
+    return [(item.name, item.tags, item.parsed_metadata) for item in items]
+
+
+def test_imported_tags_and_metadata_land_on_their_own_items(client, user, monkeypatch):
+    monkeypatch.setattr(user_transfer, "IMPORT_CHUNK", 2)
+    client.post("/api/saved-items/", json={"user_id": user.id, "name": "Existing", "tags": ["old"]})
+
+    records = [
+        {"kind": "saved_item", "name": f"Item {i}", "tags": [f"t{i}", "shared"] if i % 2 else [],
+         "metadata": {"semester": f"Fall {2020 + i}"}}
+        for i in range(5)
+    ]
+    report = _import(client, user, _ndjson(*records))
+    assert report["imported"]["saved_item"] == 5 and report["error_count"] == 0
+
+    assert _items(user) == [("Existing", ["old"], {})] + [
+        (f"Item {i}", [f"t{i}", "shared"] if i % 2 else [], {"semester": f"Fall {2020 + i}"})
+        for i in range(5)
+    ]
+    item = SavedItem.query.filter_by(name="Item 3").one()
+    assert item.semester == "Fall 2023"
+
+
+def test_row_by_row_retry_allocates_ranks(client, user, monkeypatch):
+    def refuse(rows, user_id):
+        raise SQLAlchemyError("chunk refused")
+
+    monkeypatch.setattr(user_transfer, "_bulk_insert", refuse)
+    client.post("/api/saved-items/", json={"user_id": user.id, "name": "Existing"})
+    report = _import(client, user, _ndjson(*({"kind": "saved_item", "name": f"Item {i}"} for i in range(3))))
+
+    assert report["imported"]["saved_item"] == 3 and report["error_count"] == 0
+    assert [name for name, _, _ in _items(user)] == ["Existing", "Item 0", "Item 1", "Item 2"]
+    assert SavedItem.query.filter(SavedItem.custom_rank.is_(None)).count() == 0
+
+
+def test_bad_lines_are_reported_and_the_rest_imported(client, user):
+    body = _ndjson(
+        {"kind": "saved_location", "location_name": "Library"},
+        {"kind": "saved_item"},
+        {"kind": "unknown"},
+        {"kind": "schedule_entry", "event_start_time": "2026-01-05T09:00:00", "event_end_time": "2026-01-05T10:00:00"},
+        {"kind": "saved_item", "name": "Long", "tags": ["x" * 51]},
+    ) + "not json\n\n"
+    report = _import(client, user, body)
+
+    assert report["imported"] == {"saved_item": 0, "saved_location": 1, "schedule_entry": 1}
+    assert [error["line"] for error in report["errors"]] == [2, 3, 5, 6]
+    assert report["errors"][0]["error"] == "name required"
+
+
+def test_export_round_trips_into_another_user(client, user):
+    client.post("/api/saved-items/", json={"user_id": user.id, "name": "B", "tags": ["x"], "metadata": {"credits": 3}})
+    client.post("/api/saved-items/", json={"user_id": user.id, "name": "A"})
+    db.session.add(UserSavedLocations(user_id=user.id, location_name="Library"))
+    db.session.commit()
+
+    response = client.get(f"/api/user/export?user_id={user.id}")
+    assert response.status_code == 200 and response.mimetype == "application/x-ndjson"
+    lines = [json.loads(line) for line in response.get_data(as_text=True).splitlines()]
+    assert [line["kind"] for line in lines] == ["saved_item", "saved_item", "saved_location"]
+    assert "id" not in lines[0] and "user_id" not in lines[0]
+
+    other = User(email="other@example.com", name="Other")
+    db.session.add(other)
+    db.session.commit()
+    _import(client, other, response.get_data())
+    assert _items(other) == [("B", ["x"], {"credits": 3}), ("A", [], {})]
+    assert UserSavedLocations.query.filter_by(user_id=other.id).count() == 1
+    assert UserScheduleEntries.query.count() == 0
+
+    assert client.get(f"/api/user/export?user_id={user.id}&kinds=nope").status_code == 400
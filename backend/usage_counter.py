@@ -0,0 +1,109 @@
+"""In-memory accumulator for ``use_count``/``last_used`` style counters.
+
+Opening a saved route should not cost a write transaction every time.
+``UsageCounter`` adds opens up in memory and writes them with a single
+executemany UPDATE once enough are pending, every ``interval`` seconds from
+a background timer (so a quiet period does not leave them unwritten), and
+once more when the process exits. Counts still pending when a worker is
+killed outright are lost; they are usage statistics, so that is accepted.
+"""
+import atexit
+import logging
+import threading
+import time
+from datetime import datetime
+
+from sqlalchemy import bindparam, func, update
+
+from db import db
+
+logger = logging.getLogger(__name__)
+
+
+class UsageCounter:
+    def __init__(self, model, batch_size, interval):
+        table = model.__table__
+        self._statement = (
+            update(table)
+            .where(table.c.id == bindparam("row_id"))
+            .values(
+                use_count=func.coalesce(table.c.use_count, 0) + bindparam("opens"),
+                last_used=bindparam("used_at"),
+            )
+        )
+        self.batch_size = batch_size
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._pending = {}      # row id -> (opens, last opened)
+        self._inflight = []     # batches taken by a flush and not committed yet
+        self._opens = 0
+        self._last_flush = time.monotonic()
+        self._engine = None
+        self._timer = None
+        self._closed = threading.Event()
+        atexit.register(self.close)
+
+    def record(self, row_id, when=None):
+        """Count one use of ``row_id``; flushes when a batch is due."""
+        when = when or datetime.utcnow()
+        with self._lock:
+            # Kept so the exit flush can run outside an app context
+            self._engine = self._engine or db.engine
+            if self._timer is None and self.interval:
+                self._timer = threading.Thread(target=self._run, name="usage-counter-flush", daemon=True)
+                self._timer.start()
+            opens, _ = self._pending.get(row_id, (0, None))
+            self._pending[row_id] = (opens + 1, when)
+            self._opens += 1
+            due = self._opens >= self.batch_size or time.monotonic() - self._last_flush >= self.interval
+        if due:
+            self.flush()
+
+    def _run(self):
+        # Started by the first record, once the engine is known
+        while not self._closed.wait(self.interval):
+            if time.monotonic() - self._last_flush >= self.interval:
+                self.flush()
+
+    def close(self):
+        """Stop the timer and write what is pending."""
+        self._closed.set()
+        self.flush()
+
+    def pending(self, row_id):
+        """Return ``(opens, last opened)`` not yet written for ``row_id``."""
+        with self._lock:
+            opens, last = self._pending.get(row_id, (0, None))
+            for batch in self._inflight:
+                if row_id in batch:
+                    flushing, when = batch[row_id]
+                    opens, last = opens + flushing, max(when, last or when)
+            return opens, last
+
+    def flush(self):
+        """Write every pending count in one transaction."""
+        with self._lock:
+            self._last_flush = time.monotonic()
+            engine = self._engine
+            if not self._pending or engine is None:
+                return
+            # Still reported by pending() until the write commits
+            batch, self._pending = self._pending, {}
+            self._inflight.append(batch)
+            self._opens = 0
+
+        rows = [{"row_id": row_id, "opens": opens, "used_at": when} for row_id, (opens, when) in batch.items()]
+        try:
+            with engine.begin() as connection:
+                connection.execute(self._statement, rows)
+        except Exception:
+            logger.exception("Flushing usage counters failed; keeping them for the next flush")
+            with self._lock:
+                self._inflight.remove(batch)
+                for row_id, (opens, when) in batch.items():
+                    pending, last = self._pending.get(row_id, (0, when))
+                    self._pending[row_id] = (pending + opens, max(when, last))
+                    self._opens += opens
+        else:
+            with self._lock:
+                self._inflight.remove(batch)
@@ -0,0 +1,273 @@
+"""Streaming NDJSON export and import of a user's saved data.
+
+One JSON object per line, with a "kind" naming the table it belongs to:
+saved items, saved locations and schedule entries. Exports read through a
+server-side cursor a batch at a time, so a user with thousands of rows
+never has them all in memory. Imports parse the upload line by line and
+insert ``IMPORT_CHUNK`` rows per transaction as one executemany INSERT per
+table; a bad line is reported with its number and skipped, the rest still
+go in.
+
+Ids and user ids are not exported: imported rows always belong to the
+importing user and get new ids. Saved items are exported in drag-and-drop
+order and appended in file order, so that order survives the move.
+"""
+import json
+from datetime import datetime
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+
+from db import db
+from data_versions import SEARCH, bump_version
+from models import SavedItem, SavedItemTag, UserSavedLocations, UserScheduleEntries, parse_metadata
+from rank_keys import key_between
+
+EXPORT_BATCH = 500          # rows fetched (and tagged) at a time
+IMPORT_CHUNK = 500          # rows per import transaction
+MAX_REPORTED_ERRORS = 100   # further errors are only counted
+
+# kind -> (model, exported columns, export order)
+KINDS = {
+    "saved_item": (SavedItem, (
+        "item_type", "name", "professor_name", "course_code", "location_id",
+        "room_number", "custom_order", "created_at"
+    ), SavedItem.custom_rank),
+    "saved_location": (UserSavedLocations, (
+        "location_name", "building_name", "room_number", "floor_number", "qr_code_id", "created_at"
+    ), UserSavedLocations.created_at),
+    "schedule_entry": (UserScheduleEntries, (
+        "course_name", "professor_name", "building_name", "room_number",
+        "event_start_time", "event_end_time", "created_at"
+    ), UserScheduleEntries.event_start_time),
+}
+
+REQUIRED = {
+    "saved_item": ("name",),
+    "saved_location": ("location_name",),
+    "schedule_entry": ("event_start_time", "event_end_time"),
+}
+DATETIME_COLUMNS = {"created_at", "event_start_time", "event_end_time"}
+INTEGER_COLUMNS = {"location_id", "floor_number", "custom_order"}
+
+
+# ----------------------------------------------------------
+#  Export
+# ----------------------------------------------------------
+
+def _tags_for(item_ids):
+    tags = {}
+    rows = db.session.query(SavedItemTag.item_id, SavedItemTag.tag) \
+        .filter(SavedItemTag.item_id.in_(item_ids)).order_by(SavedItemTag.id)
+    for item_id, tag in rows:
+        tags.setdefault(item_id, []).append(tag)
+    return tags
+
+
+def export_lines(user_id, kinds=KINDS):
+    """Yield the user's rows of the given kinds as NDJSON lines."""
+    for kind in kinds:
+        model, columns, order = KINDS[kind]
+        selected = [model.id] + [getattr(model, c) for c in columns]
+        if model is SavedItem:
+            selected.append(SavedItem.item_metadata)
+        result = db.session.execute(
+            select(*selected)
+            .where(model.user_id == user_id)
+            .order_by(order, model.id)
+            .execution_options(stream_results=True, yield_per=EXPORT_BATCH)
+        )
+        for rows in result.partitions():
+            tags = _tags_for([row.id for row in rows]) if model is SavedItem else {}
+            for row in rows:
+                record = {"kind": kind}
+                for column in columns:
+                    value = getattr(row, column)
+                    record[column] = value.isoformat() if isinstance(value, datetime) else value
+                if model is SavedItem:
+                    record["tags"] = tags.get(row.id, [])
+                    record["metadata"] = parse_metadata(row.item_metadata)
+                yield json.dumps(record, separators=(",", ":")) + "\n"
+
+
+# ----------------------------------------------------------
+#  Import
+# ----------------------------------------------------------
+
+def _build(record, user_id):
+    """A new row for one parsed line; raises ValueError saying what is wrong."""
+    if not isinstance(record, dict):
+        raise ValueError("line is not a JSON object")
+    kind = record.get("kind")
+    if kind not in KINDS:
+        raise ValueError(f"unknown kind {kind!r}")
+    model, columns, _ = KINDS[kind]
+
+    for column in REQUIRED[kind]:
+        if record.get(column) in (None, ""):
+            raise ValueError(f"{column} required")
+
+    fields = {}
+    for column in columns:
+        value = record.get(column)
+        if value is None:
+            continue
+        try:
+            if column in DATETIME_COLUMNS:
+                value = datetime.fromisoformat(str(value).replace('Z', '+00:00'))
+            elif column in INTEGER_COLUMNS:
+                value = int(value)
+                if not -2 ** 63 <= value < 2 ** 63:
+                    raise ValueError
+        except (TypeError, ValueError):
+            raise ValueError(f"invalid {column}")
+        fields[column] = value
+
+    if model is SavedItem:
+        metadata = record.get("metadata") or {}
+        if not isinstance(metadata, dict):
+            raise ValueError("metadata must be an object")
+        tags = record.get("tags") or []
+        if not isinstance(tags, (list, str)):
+            raise ValueError("tags must be a list or a comma-separated string")
+        fields.setdefault("item_type", "location")  # as POST /api/saved-items/ does
+        fields.update(item_metadata=json.dumps(metadata), tags=tags)
+    return kind, model(user_id=user_id, **fields)
+
+
+class ImportReport:
+    def __init__(self):
+        self.imported = {kind: 0 for kind in KINDS}
+        self.errors = []
+        self.error_count = 0
+
+    def error(self, line_no, message):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_no, "error": message})
+
+    def to_json(self):
+        return {
+            "imported": self.imported,
+            "imported_total": sum(self.imported.values()),
+            "error_count": self.error_count,
+            "errors": self.errors,
+        }
+
+
+def _column_values(row):
+    """Insert parameters for an unsaved row, with column defaults filled in."""
+    values = {}
+    for column in row.__table__.columns:
+        if column.primary_key:
+            continue
+        value = getattr(row, column.key)
+        if value is None and column.default is not None:
+            value = column.default.arg(None) if column.default.is_callable else column.default.arg
+        values[column.key] = value
+    return values
+
+
+def _last_rank(user_id):
+    return db.session.execute(
+        select(func.max(SavedItem.custom_rank)).where(SavedItem.user_id == user_id)
+    ).scalar()
+
+
+def _bulk_insert(rows, user_id):
+    """Insert ``[(kind, row)]`` with one executemany per table.
+
+    Saved items are inserted with RETURNING, which hands their new ids back
+    in parameter order (SQLAlchemy runs it a row at a time where the
+    database cannot promise that order), and the tags are attached by those
+    ids. Ranks are allocated up front in file order.
+    """
+    by_kind = {}
+    for kind, row in rows:
+        by_kind.setdefault(kind, []).append(row)
+
+    items = by_kind.pop("saved_item", [])
+    if items:
+        last = _last_rank(user_id)
+        for item in items:
+            item.custom_rank = last = key_between(last, None)
+        ids = db.session.execute(
+            insert(SavedItem.__table__).returning(SavedItem.__table__.c.id, sort_by_parameter_order=True),
+            [_column_values(item) for item in items]
+        ).scalars().all()
+
+        tags = [
+            {"item_id": item_id, "user_id": user_id, "tag": tag}
+            for item_id, item in zip(ids, items) for tag in item.tags
+        ]
+        if tags:
+            db.session.execute(insert(SavedItemTag.__table__), tags)
+        # Core inserts skip the search index's session hook: rebuild it instead
+        bump_version(SEARCH, db.session.connection())
+
+    for kind, kind_rows in by_kind.items():
+        model = KINDS[kind][0]
+        db.session.execute(insert(model.__table__), [_column_values(row) for row in kind_rows])
+
+
+def _insert_chunk(chunk, user_id, report):
+    """Insert ``[(line no, record, kind, row)]`` in one transaction.
+
+    If the database refuses the chunk, it is retried a row at a time (one
+    savepoint each, with rows rebuilt from their records) so the failing
+    lines can be named. Saved items get their ranks again, after the last
+    one that made it in.
+    """
+    try:
+        _bulk_insert([(kind, row) for _, _, kind, row in chunk], user_id)
+        db.session.commit()
+    except SQLAlchemyError:
+        db.session.rollback()
+    else:
+        for _, _, kind, _ in chunk:
+            report.imported[kind] += 1
+        return
+
+    last = _last_rank(user_id)
+    for line_no, record, _, _ in chunk:
+        kind, row = _build(record, user_id)
+        if kind == "saved_item":
+            row.custom_rank = key_between(last, None)
+        try:
+            with db.session.begin_nested():
+                db.session.add(row)
+        except SQLAlchemyError as e:
+            report.error(line_no, f"database error: {getattr(e, 'orig', None) or e}")
+        else:
+            report.imported[kind] += 1
+            if kind == "saved_item":
+                last = row.custom_rank
+    db.session.commit()
+
+
+def import_lines(lines, user_id):
+    """Import NDJSON ``lines`` (bytes or str) for the user; returns an ``ImportReport``."""
+    report = ImportReport()
+    chunk = []
+    for line_no, line in enumerate(lines, 1):
+        try:
+            if isinstance(line, bytes):
+                line = line.decode("utf-8")
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            kind, row = _build(record, user_id)
+        except UnicodeDecodeError:
+            report.error(line_no, "line is not valid UTF-8")
+            continue
+        except ValueError as e:
+            report.error(line_no, f"invalid JSON: {e}" if isinstance(e, json.JSONDecodeError) else str(e))
+            continue
+
+        chunk.append((line_no, record, kind, row))
+        if len(chunk) >= IMPORT_CHUNK:
+            _insert_chunk(chunk, user_id, report)
+            chunk = []
+    if chunk:
+        _insert_chunk(chunk, user_id, report)
+    return report